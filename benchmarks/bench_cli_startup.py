@@ -0,0 +1,67 @@
+"""
+Cold-start benchmark for the weather-pipeline CLI.
+
+Starts a fresh interpreter for each run, parses the command line and imports
+the stage module a subcommand needs, then reports the median wall time and
+which heavy modules were loaded. Exits non-zero when the ``extract`` path is
+over the startup budget or pulls in a heavy dependency.
+
+    python benchmarks/bench_cli_startup.py [--runs 10] [--budget 1.0]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["pandas", "numpy", "boto3", "psycopg2", "pyarrow"]
+
+STAGE_MODULES = {
+    "extract": "src.data.extraction.extract_weather",
+    "transform": "src.data.processing.transform_weather",
+    "load": "src.data.storage.load_weather",
+}
+
+PROBE = """
+import json, sys
+from src.cli import build_parser
+build_parser().parse_args([{command!r}])
+import {module}
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]))
+"""
+
+def measure(command: str, runs: int) -> dict:
+    code = PROBE.format(command=command, module=STAGE_MODULES[command], heavy=HEAVY_MODULES)
+    timings = []
+    heavy = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], cwd=project_root,
+                                capture_output=True, text=True, check=True)
+        timings.append(time.perf_counter() - started)
+        heavy = json.loads(result.stdout.strip().splitlines()[-1])
+    return {"command": command, "median_s": statistics.median(timings), "min_s": min(timings), "heavy_modules": heavy}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Interpreter starts per command")
+    parser.add_argument("--budget", type=float, default=1.0, help="Maximum median startup of 'extract' in seconds")
+    args = parser.parse_args()
+
+    results = [measure(command, args.runs) for command in STAGE_MODULES]
+    for result in results:
+        print(f"{result['command']:<10} median {result['median_s'] * 1000:7.1f} ms  "
+              f"min {result['min_s'] * 1000:7.1f} ms  heavy: {', '.join(result['heavy_modules']) or '-'}")
+
+    extract = results[0]
+    if extract["median_s"] > args.budget or extract["heavy_modules"]:
+        print(f"extract startup exceeds the {args.budget:.2f}s budget or imports heavy modules", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Throughput benchmark for the derived-metrics kernels.
+
+Builds a synthetic frame of raw temp/humidity/wind_speed values and times
+apply_derived_metrics against the previous per-metric helpers (frame copy plus
+boolean ``.loc`` masking per metric), reporting the cost per million rows.
+
+    python benchmarks/bench_derived_metrics.py [--rows 1000000] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.utils.derived_metrics import apply_derived_metrics
+
+def synthetic_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'temp': rng.uniform(250.0, 320.0, rows).round(2),
+        'humidity': rng.integers(5, 100, rows),
+        'wind_speed': rng.uniform(0.0, 20.0, rows).round(2),
+    })
+
+def masked_baseline(df: pd.DataFrame) -> pd.DataFrame:
+    """The previous style: one frame copy and boolean .loc assignments per metric."""
+    df = df.copy()
+    df['temperature'] = (df['temp'] - 273.15) * 9/5 + 32
+    mask = df['temperature'] >= 80
+    T = df.loc[mask, 'temperature']
+    RH = df.loc[mask, 'humidity']
+    df.loc[mask, 'heat_index'] = (
+        -42.379 + 2.04901523*T + 10.14333127*RH - 0.22475541*T*RH - 6.83783e-3*T**2
+        - 5.481717e-2*RH**2 + 1.22874e-3*T**2*RH + 8.5282e-4*T*RH**2 - 1.99e-6*T**2*RH**2
+    )
+    df.loc[~mask, 'heat_index'] = df.loc[~mask, 'temperature']
+
+    df = df.copy()
+    wind_mph = df['wind_speed'] * 2.2369362920544
+    mask = (df['temperature'] <= 50) & (wind_mph > 3)
+    T = df.loc[mask, 'temperature']
+    V = wind_mph[mask]
+    df.loc[mask, 'wind_chill'] = 35.74 + 0.6215*T - 35.75*V**0.16 + 0.4275*T*V**0.16
+    df.loc[~mask, 'wind_chill'] = df.loc[~mask, 'temperature']
+    return df
+
+def time_it(func, df: pd.DataFrame, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        frame = df.copy()
+        started = time.perf_counter()
+        func(frame)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows in the synthetic frame")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per implementation (median reported)")
+    args = parser.parse_args()
+
+    df = synthetic_frame(args.rows)
+    per_million = 1_000_000 / args.rows
+    kernels = time_it(apply_derived_metrics, df, args.repeat)
+    baseline = time_it(masked_baseline, df, args.repeat)
+
+    print(f"rows: {args.rows:,}")
+    print(f"apply_derived_metrics (4 metrics)   {kernels * per_million * 1000:8.1f} ms per million rows")
+    print(f"masked helpers (heat index + chill) {baseline * per_million * 1000:8.1f} ms per million rows")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Scaling benchmark for the multi-process transform.
+
+Generates a synthetic raw CSV, then times the single-process chunked
+transform and parallel_transform with 1, 2, 4, ... workers (up to the core
+count, or ``--workers``), reporting speedup and parallel efficiency.
+
+    python benchmarks/bench_parallel_transform.py [--rows 1000000] [--shard-by day] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from loguru import logger
+
+from benchmarks.synthetic import write_raw_csv
+from src.utils.def_transformations import process_weather_data_chunked
+from src.utils.parallel_transform import parallel_transform
+
+def worker_counts(limit: int) -> list:
+    counts = [1]
+    while counts[-1] * 2 <= limit:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != limit:
+        counts.append(limit)
+    return counts
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows in the synthetic raw file")
+    parser.add_argument("--locations", type=int, default=200, help="Distinct stations in the synthetic data")
+    parser.add_argument("--days", type=int, default=30, help="Days covered by the synthetic data")
+    parser.add_argument("--shard-by", choices=["day", "location"], default="day")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Worker counts to measure (default: powers of two up to the core count)")
+    args = parser.parse_args()
+    logger.remove()
+
+    counts = args.workers or worker_counts(os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory(prefix="bench-parallel-") as work_dir:
+        raw_file = write_raw_csv(os.path.join(work_dir, "raw.csv"), args.rows, args.locations, args.days)
+        output_file = os.path.join(work_dir, "processed.csv")
+        print(f"rows: {args.rows:,}  shard by: {args.shard_by}  cores: {os.cpu_count()}")
+
+        started = time.perf_counter()
+        process_weather_data_chunked(raw_file, output_file)
+        baseline = time.perf_counter() - started
+        print(f"{'single process (chunked)':<26} {baseline:8.2f} s")
+
+        for workers in counts:
+            started = time.perf_counter()
+            results = parallel_transform([raw_file], output_file=output_file,
+                                         shard_by=args.shard_by, workers=workers)
+            elapsed = time.perf_counter() - started
+            speedup = baseline / elapsed
+            print(f"{f'{workers} worker(s), {len(results)} shards':<26} {elapsed:8.2f} s  "
+                  f"speedup {speedup:5.2f}x  efficiency {speedup / workers:6.1%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
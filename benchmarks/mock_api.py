@@ -0,0 +1,140 @@
+"""
+Local HTTP stand-in for the OpenWeatherMap API.
+
+Serves synthetic current weather payloads on ``/data/2.5/weather`` and History
+API payloads on ``/data/2.5/history/city`` with a configurable per-request
+latency and share of ``429 Too Many Requests`` responses (with a
+``Retry-After`` header), so the API client can be benchmarked and exercised
+without network access or an API key.
+
+    with MockWeatherAPI(latency=0.05, throttle_rate=0.01) as api:
+        config["openweathermap"]["base_url"] = api.base_url
+        config["openweathermap"]["history_base_url"] = api.base_url
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import owm_history, owm_response
+
+API_PREFIX = "/data/2.5"
+
+class MockWeatherAPI:
+    """
+    Threaded HTTP server answering OpenWeatherMap-shaped requests.
+
+    ``routes`` maps paths below ``/data/2.5`` to handlers taking the query
+    parameters and returning ``(status, payload)``; ``requests`` and
+    ``throttled`` count what was served.
+    """
+
+    def __init__(self, latency: float = 0.0, throttle_rate: float = 0.0, retry_after: int = 1,
+                 seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.seed = seed
+        self.requests = 0
+        self.throttled = 0
+        self.routes: Dict[str, Callable[[Dict[str, str]], Tuple[int, Any]]] = {
+            "/weather": self._current_weather,
+            "/history/city": self._history,
+        }
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def _current_weather(self, params: Dict[str, str]) -> Tuple[int, Any]:
+        try:
+            lat, lon = float(params["lat"]), float(params["lon"])
+        except (KeyError, ValueError):
+            return 400, {"cod": "400", "message": "wrong latitude or longitude"}
+        # Observations change every 10 minutes, as on the real API
+        dt = int(time.time()) // 600 * 600
+        return 200, owm_response(lat, lon, dt, self.seed)
+
+    def _history(self, params: Dict[str, str]) -> Tuple[int, Any]:
+        try:
+            lat, lon = float(params["lat"]), float(params["lon"])
+            start, end = int(params["start"]), int(params["end"])
+        except (KeyError, ValueError):
+            return 400, {"cod": "400", "message": "lat, lon, start and end are required"}
+        if not 0 <= end - start <= 7 * 86400:
+            return 400, {"cod": "400", "message": "requested period exceeds one week"}
+        return 200, owm_history(lat, lon, start, end, self.seed)
+
+    def _should_throttle(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            throttle = self.throttle_rate > 0 and self._random.random() < self.throttle_rate
+            if throttle:
+                self.throttled += 1
+        return throttle
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Send headers and body in one segment, otherwise Nagle's algorithm
+            # and delayed ACKs add ~40 ms to every keep-alive response
+            disable_nagle_algorithm = True
+            wbufsize = 1 << 16
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                if api.latency:
+                    time.sleep(api.latency)
+
+                route = api.routes.get(url.path[len(API_PREFIX):]) if url.path.startswith(API_PREFIX) else None
+                headers = {}
+                if route is None:
+                    status, payload = 404, {"cod": "404", "message": "not found"}
+                elif api._should_throttle():
+                    status, payload = 429, {"cod": 429, "message": "rate limit exceeded"}
+                    headers["Retry-After"] = str(api.retry_after)
+                else:
+                    status, payload = route(params)
+
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "MockWeatherAPI":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-weather-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockWeatherAPI":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
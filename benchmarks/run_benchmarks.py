@@ -0,0 +1,407 @@
+"""
+End-to-end benchmark suite for the extract, transform and upload stages.
+
+Each measurement runs in a fresh interpreter so timings and peak memory are
+not skewed by earlier runs:
+
+- ``get_latest_weather``: sequential requests against the local mock API
+  (benchmarks/mock_api.py) with ``--latency`` seconds per request and a
+  ``--throttle-rate`` share of 429 responses;
+- ``get_weather_for_locations``: one concurrent fetch of ``--locations`` locations;
+- ``backfill_weather``: ``--backfill-days`` days of hourly history for ``--locations``
+  locations, fetched concurrently in one-day work units into a fresh raw CSV;
+- ``stream_pipeline``: ``--stream-rounds`` fetches of ``--locations`` locations
+  through the streaming pipeline (spool, transform, processed CSV sink),
+  reporting the mean seconds from extraction to the sink;
+- ``process_weather_data``: the whole-file transform of a synthetic raw CSV per ``--sizes``;
+- ``save_weather_data_to_url``: the streaming S3 upload of the processed data,
+  against moto's in-process S3 stand-in or ``--s3-endpoint`` (e.g. MinIO);
+- ``compact_archive``: merging the processed data, uploaded as one object per
+  day, into compressed monthly objects on the same S3 stand-in.
+
+Results (median/min seconds, throughput, peak RSS) can be saved with
+``--output`` and compared with a saved run via ``--baseline``; the exit status
+is 1 when a case got slower or bigger than ``--tolerance`` allows.
+
+    python benchmarks/run_benchmarks.py [--sizes 10k 1m 10m] [--repeat 3]
+                                        [--output results.json] [--baseline baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+BUCKET = "weather-benchmark"
+
+CASES = ["get_latest_weather", "get_weather_for_locations", "backfill_weather", "stream_pipeline", "process_weather_data",
+         "save_weather_data_to_url", "compact_archive"]
+
+SIZED_CASES = {"process_weather_data", "save_weather_data_to_url", "compact_archive"}
+
+def parse_size(text: str) -> int:
+    text = text.lower().replace("_", "")
+    if text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def raw_file(data_dir: str, rows: int) -> str:
+    return os.path.join(data_dir, f"raw_{rows}.csv")
+
+def processed_file(data_dir: str, rows: int) -> str:
+    return os.path.join(data_dir, f"processed_{rows}.csv")
+
+def prepare_data(data_dir: str, rows: int) -> None:
+    """Generate the synthetic raw and processed files for ``rows`` once, outside any timing."""
+    from loguru import logger
+    from benchmarks.synthetic import write_raw_csv
+    from src.utils.def_transformations import process_weather_data_chunked
+
+    logger.remove()
+    raw = raw_file(data_dir, rows)
+    if not os.path.exists(raw):
+        print(f"Generating {rows:,} synthetic rows in {raw}", file=sys.stderr)
+        write_raw_csv(raw, rows, locations=500, days=max(1, rows // 100_000))
+    processed = processed_file(data_dir, rows)
+    if not os.path.exists(processed):
+        process_weather_data_chunked(raw, processed)
+
+def _client_config(base_url: str, locations: List[Dict[str, Any]], directory: str) -> str:
+    """Write an API config pointing at the mock API, without cache, persisted budget or observation index."""
+    import yaml
+
+    with open(os.path.join(project_root, "config", "api_config.template.yaml"), "r") as f:
+        config = yaml.safe_load(f)
+    config["openweathermap"]["base_url"] = base_url
+    config["openweathermap"]["history_base_url"] = base_url
+    config["cache"] = {"backend": "none"}
+    config["dedup"] = {}
+    config["locations"] = locations
+    config["collection"].update({
+        "max_requests_per_second": 100_000,
+        "max_requests_per_day": None,
+        "rate_limit_state_file": None,
+    })
+    path = os.path.join(directory, "api_config.yaml")
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f)
+    return path
+
+def _api_client(api, locations: List[Dict[str, Any]], directory: str):
+    from src.utils.api_client import OpenWeatherMapClient
+
+    os.environ.setdefault("OPENWEATHERMAP_API_KEY", "benchmark")
+    return OpenWeatherMapClient(config_path=_client_config(api.base_url, locations, directory))
+
+def case_get_latest_weather(options: Dict[str, Any]) -> Dict[str, Any]:
+    from benchmarks.mock_api import MockWeatherAPI
+    from benchmarks.synthetic import synthetic_locations
+
+    locations = synthetic_locations(options["locations"])
+    with MockWeatherAPI(latency=options["latency"], throttle_rate=options["throttle_rate"]) as api, \
+            tempfile.TemporaryDirectory() as directory:
+        client = _api_client(api, locations, directory)
+        latencies = []
+        started = time.perf_counter()
+        for i in range(options["requests"]):
+            location = locations[i % len(locations)]
+            call_started = time.perf_counter()
+            client.get_latest_weather(location["lat"], location["lon"])
+            latencies.append(time.perf_counter() - call_started)
+        elapsed = time.perf_counter() - started
+        client.close()
+    latencies.sort()
+    return {
+        "seconds": elapsed,
+        "rows": options["requests"],
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "throttled": api.throttled,
+    }
+
+def case_get_weather_for_locations(options: Dict[str, Any]) -> Dict[str, Any]:
+    from benchmarks.mock_api import MockWeatherAPI
+    from benchmarks.synthetic import synthetic_locations
+
+    locations = synthetic_locations(options["locations"])
+    with MockWeatherAPI(latency=options["latency"], throttle_rate=options["throttle_rate"]) as api, \
+            tempfile.TemporaryDirectory() as directory:
+        client = _api_client(api, locations, directory)
+        started = time.perf_counter()
+        successes, failures = client.get_weather_for_locations(locations)
+        elapsed = time.perf_counter() - started
+        client.close()
+    return {"seconds": elapsed, "rows": len(successes), "failures": len(failures), "throttled": api.throttled}
+
+def case_backfill_weather(options: Dict[str, Any]) -> Dict[str, Any]:
+    from benchmarks.mock_api import MockWeatherAPI
+    from benchmarks.synthetic import synthetic_locations
+    from src.data.extraction.extract_weather import backfill_weather
+
+    locations = synthetic_locations(options["locations"])
+    end = datetime(2024, 12, 1) + timedelta(days=options["backfill_days"])
+    with MockWeatherAPI(latency=options["latency"], throttle_rate=options["throttle_rate"]) as api, \
+            tempfile.TemporaryDirectory() as directory:
+        client = _api_client(api, locations, directory)
+        started = time.perf_counter()
+        saved = backfill_weather(datetime(2024, 12, 1), end, client=client,
+                                 checkpoint=os.path.join(directory, "backfill.json"),
+                                 output_file=Path(directory) / "weather_data.csv")
+        elapsed = time.perf_counter() - started
+        client.close()
+    return {"seconds": elapsed, "rows": saved, "requests": api.requests, "throttled": api.throttled}
+
+def case_stream_pipeline(options: Dict[str, Any]) -> Dict[str, Any]:
+    from benchmarks.mock_api import MockWeatherAPI
+    from benchmarks.synthetic import synthetic_locations
+    from src.data.extraction.extract_weather import fetch_locations_batch
+    from src.utils.streaming import STREAM_LATENCY_SECONDS, CsvSink, Spool, StreamPipeline
+
+    locations = synthetic_locations(options["locations"])
+    with MockWeatherAPI(latency=options["latency"], throttle_rate=options["throttle_rate"]) as api, \
+            tempfile.TemporaryDirectory() as directory:
+        client = _api_client(api, locations, directory)
+        pipeline = StreamPipeline(CsvSink(os.path.join(directory, "processed.csv")),
+                                  spool=Spool(os.path.join(directory, "spool")))
+        pipeline.start()
+        started = time.perf_counter()
+        rows = 0
+        for _ in range(options["stream_rounds"]):
+            batch = fetch_locations_batch(client, locations)
+            pipeline.submit(batch.columns)
+            rows += batch.rows
+        pipeline.close()
+        elapsed = time.perf_counter() - started
+        client.close()
+    totals = {name: value for name, _, labels, value in STREAM_LATENCY_SECONDS.samples() if "le" not in labels}
+    return {"seconds": elapsed, "rows": rows,
+            "mean_latency_s": totals[f"{STREAM_LATENCY_SECONDS.name}_sum"] / totals[f"{STREAM_LATENCY_SECONDS.name}_count"]}
+
+def case_process_weather_data(options: Dict[str, Any]) -> Dict[str, Any]:
+    from src.utils.def_transformations import process_weather_data
+
+    rows = options["size"]
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "processed.csv")
+        rss_before = _peak_rss_mb()
+        started = time.perf_counter()
+        df = process_weather_data(raw_file(options["data_dir"], rows), output)
+        elapsed = time.perf_counter() - started
+        return {"seconds": elapsed, "rows": len(df), "bytes": os.path.getsize(output),
+                "rss_increase_mb": _peak_rss_mb() - rss_before}
+
+def _with_s3(options: Dict[str, Any], func: Callable[[Any, Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+    """Run ``func(s3_client, storage_options)`` against moto or ``--s3-endpoint``, with the benchmark bucket created."""
+    import boto3
+
+    storage_options = {"key": "benchmark", "secret": "benchmark", "region": "us-east-1",
+                       "endpoint_url": options["s3_endpoint"]}
+
+    def run() -> Dict[str, Any]:
+        s3 = boto3.client("s3", aws_access_key_id="benchmark", aws_secret_access_key="benchmark",
+                          region_name="us-east-1", endpoint_url=options["s3_endpoint"])
+        try:
+            s3.create_bucket(Bucket=BUCKET)
+        except s3.exceptions.BucketAlreadyOwnedByYou:
+            pass
+        return func(s3, storage_options)
+
+    if options["s3_endpoint"]:
+        return run()
+    from moto import mock_aws
+
+    with mock_aws():
+        return run()
+
+def case_save_weather_data_to_url(options: Dict[str, Any]) -> Dict[str, Any]:
+    from src.utils.save_data import save_weather_data_to_url
+    from src.utils.weather_loader import load_weather_data
+
+    df = load_weather_data(processed_file(options["data_dir"], options["size"]))
+
+    def upload(s3, storage_options: Dict[str, Any]) -> Dict[str, Any]:
+        key = f"weather_data_{os.getpid()}.csv"
+        rss_before = _peak_rss_mb()
+        started = time.perf_counter()
+        save_weather_data_to_url(df, f"s3://{BUCKET}/{key}", storage_options, compression=options["compression"])
+        elapsed = time.perf_counter() - started
+        size = s3.head_object(Bucket=BUCKET, Key=key)["ContentLength"]
+        return {"seconds": elapsed, "rows": len(df), "bytes": size, "rss_increase_mb": _peak_rss_mb() - rss_before}
+
+    return _with_s3(options, upload)
+
+def case_compact_archive(options: Dict[str, Any]) -> Dict[str, Any]:
+    from datetime import date
+    from src.utils.compaction import compact_archive
+    from src.utils.manifest import DataManifest
+    from src.utils.weather_loader import load_weather_data
+
+    df = load_weather_data(processed_file(options["data_dir"], options["size"]))
+
+    def compact(s3, storage_options: Dict[str, Any]) -> Dict[str, Any]:
+        root = f"s3://{BUCKET}/compaction_{os.getpid()}"
+        manifest = DataManifest(root, storage_options)
+        for day, part in df.groupby(df['timestamp'].dt.strftime('%Y%m%d')):
+            manifest.write(f"weather_data_{day}.csv", part)
+            manifest.add(f"weather_data_{day}.csv", part)
+        manifest.save()
+        rss_before = _peak_rss_mb()
+        started = time.perf_counter()
+        plan = compact_archive(manifest, today=date(2100, 1, 1), compression=options["compression"] or "gzip")
+        elapsed = time.perf_counter() - started
+        size = sum(s3.head_object(Bucket=BUCKET, Key=f"compaction_{os.getpid()}/{name}")["ContentLength"]
+                   for name in plan.merges)
+        return {"seconds": elapsed, "rows": len(df), "bytes": size, "rss_increase_mb": _peak_rss_mb() - rss_before}
+
+    return _with_s3(options, compact)
+
+CASE_FUNCTIONS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "get_latest_weather": case_get_latest_weather,
+    "get_weather_for_locations": case_get_weather_for_locations,
+    "backfill_weather": case_backfill_weather,
+    "stream_pipeline": case_stream_pipeline,
+    "process_weather_data": case_process_weather_data,
+    "save_weather_data_to_url": case_save_weather_data_to_url,
+    "compact_archive": case_compact_archive,
+}
+
+def run_child(case: str, options: Dict[str, Any]) -> None:
+    from loguru import logger
+
+    logger.remove()
+    result = CASE_FUNCTIONS[case](options)
+    result["peak_rss_mb"] = _peak_rss_mb()
+    print(json.dumps(result))
+
+def measure(case: str, options: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", case, json.dumps(options)],
+            cwd=project_root, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"{case} failed:\n{completed.stderr.strip()}")
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    seconds = [run["seconds"] for run in runs]
+    summary = {key: value for key, value in runs[0].items() if key not in ("seconds", "peak_rss_mb")}
+    summary.update({
+        "median_s": statistics.median(seconds),
+        "min_s": min(seconds),
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+        "rows_per_s": runs[0]["rows"] / statistics.median(seconds) if statistics.median(seconds) else None,
+    })
+    return summary
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print each case against the baseline and return the regressions."""
+    regressions = []
+    print(f"\n{'case':<40} {'time vs baseline':>18} {'peak RSS vs baseline':>22}")
+    for name, current in results["cases"].items():
+        previous = baseline.get("cases", {}).get(name)
+        if previous is None:
+            print(f"{name:<40} {'(new)':>18}")
+            continue
+        time_change = current["median_s"] / previous["median_s"] - 1
+        rss_change = current["peak_rss_mb"] / previous["peak_rss_mb"] - 1
+        flags = []
+        if time_change > tolerance:
+            flags.append("slower")
+        if rss_change > tolerance:
+            flags.append("more memory")
+        if flags:
+            regressions.append(f"{name}: {', '.join(flags)}")
+        print(f"{name:<40} {time_change:>+17.1%} {rss_change:>+21.1%}  {' '.join(flags)}")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES, help="Cases to run")
+    parser.add_argument("--sizes", nargs="+", default=["10k", "1m"], help="Raw row counts for the data cases (e.g. 10k 1m 10m)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case, each in a fresh interpreter")
+    parser.add_argument("--requests", type=int, default=200, help="Sequential get_latest_weather calls")
+    parser.add_argument("--locations", type=int, default=200, help="Locations fetched by get_weather_for_locations")
+    parser.add_argument("--backfill-days", type=int, default=7, help="Days of history fetched by backfill_weather")
+    parser.add_argument("--stream-rounds", type=int, default=5, help="Fetches of all locations in stream_pipeline")
+    parser.add_argument("--latency", type=float, default=0.02, help="Mock API latency per request in seconds")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="Share of mock API responses that are 429 (exercises retries and backoff)")
+    parser.add_argument("--compression", choices=["none", "gzip", "zstd"], default="none", help="Upload compression")
+    parser.add_argument("--s3-endpoint", default=None, help="S3-compatible endpoint to upload to instead of moto")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "weather-benchmarks"),
+                        help="Where synthetic input files are generated and reused")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="Compare against results saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown or memory growth vs the baseline")
+    parser.add_argument("--child", nargs=2, metavar=("CASE", "OPTIONS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], json.loads(args.child[1]))
+        return 0
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    common = {
+        "requests": args.requests, "locations": args.locations, "latency": args.latency,
+        "backfill_days": args.backfill_days, "stream_rounds": args.stream_rounds,
+        "throttle_rate": args.throttle_rate, "data_dir": args.data_dir, "s3_endpoint": args.s3_endpoint,
+        "compression": None if args.compression == "none" else args.compression,
+    }
+    results = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "options": {key: value for key, value in vars(args).items() if key not in ("child", "output", "baseline")},
+        },
+        "cases": {},
+    }
+
+    print(f"{'case':<40} {'median':>9} {'min':>9} {'rows/s':>12} {'peak RSS':>10}")
+    for case in args.cases:
+        sizes = [parse_size(size) for size in args.sizes] if case in SIZED_CASES else [None]
+        for size in sizes:
+            name = f"{case}[{size}]" if size is not None else case
+            if size is not None:
+                prepare_data(args.data_dir, size)
+            summary = measure(case, dict(common, size=size), args.repeat)
+            results["cases"][name] = summary
+            print(f"{name:<40} {summary['median_s']:>8.3f}s {summary['min_s']:>8.3f}s "
+                  f"{summary['rows_per_s'] or 0:>12,.0f} {summary['peak_rss_mb']:>8.1f}MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions beyond tolerance:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Synthetic weather data shared by the benchmarks.
+
+Rows follow the raw CSV layout written by the extractor (RAW_COLUMNS), spread
+over ``locations`` stations with distinct coordinates and ``days`` days of
+observations, and are generated deterministically from ``seed``. API payloads
+follow the OpenWeatherMap current weather response consumed by the extractor.
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.utils.weather_schema import RAW_COLUMNS
+
+WEATHER = [
+    ("Clear", "clear sky", "01d"),
+    ("Clouds", "few clouds", "02d"),
+    ("Clouds", "scattered clouds", "03d"),
+    ("Clouds", "overcast clouds", "04d"),
+    ("Rain", "light rain", "10d"),
+    ("Mist", "mist", "50d"),
+]
+
+def synthetic_locations(count: int) -> List[Dict[str, object]]:
+    """``count`` locations in the format of the ``locations`` config section, with distinct coordinates."""
+    return [
+        {"name": f"Station {i}", "country": "MA",
+         "lat": round(-60 + 130 * i / max(count - 1, 1), 4),
+         "lon": round(-170 + 340 * i / max(count - 1, 1), 4)}
+        for i in range(count)
+    ]
+
+def owm_response(lat: float, lon: float, dt: int, seed: int = 0) -> Dict[str, object]:
+    """An OpenWeatherMap current weather payload for (lat, lon) at unix time ``dt``."""
+    rng = random.Random(f"{lat}:{lon}:{dt}:{seed}")
+    main, description, icon = WEATHER[rng.randrange(len(WEATHER))]
+    temp = round(rng.uniform(255.0, 315.0), 2)
+    day_start = dt - dt % 86400
+    return {
+        "coord": {"lon": lon, "lat": lat},
+        "weather": [{"id": 800, "main": main, "description": description, "icon": icon}],
+        "base": "stations",
+        "main": {
+            "temp": temp,
+            "feels_like": round(temp - rng.uniform(0, 3), 2),
+            "temp_min": round(temp - rng.uniform(0, 2), 2),
+            "temp_max": round(temp + rng.uniform(0, 2), 2),
+            "pressure": rng.randint(980, 1040),
+            "humidity": rng.randint(5, 100),
+            "sea_level": rng.randint(980, 1040),
+            "grnd_level": rng.randint(900, 1040),
+        },
+        "visibility": rng.randint(1000, 10000),
+        "wind": {"speed": round(rng.uniform(0, 20), 2), "deg": rng.randint(0, 359)},
+        "clouds": {"all": rng.randint(0, 100)},
+        "dt": dt,
+        "sys": {"country": "MA", "sunrise": day_start + 7 * 3600, "sunset": day_start + 18 * 3600},
+        "timezone": 3600,
+        "id": abs(hash((lat, lon))) % 10_000_000,
+        "name": f"{lat:.2f},{lon:.2f}",
+        "cod": 200,
+    }
+
+def owm_history(lat: float, lon: float, start: int, end: int, seed: int = 0) -> Dict[str, object]:
+    """An OpenWeatherMap History API payload with one observation per hour in [start, end]."""
+    observations = []
+    for dt in range(-(-start // 3600) * 3600, end + 1, 3600):
+        current = owm_response(lat, lon, dt, seed)
+        observations.append({key: current[key] for key in ("dt", "main", "wind", "clouds", "weather")})
+    return {"message": f"Count: {len(observations)}", "cod": "200", "city_id": 0,
+            "calctime": 0.01, "cnt": len(observations), "list": observations}
+
+def raw_frame(rows: int, locations: int = 100, days: int = 30, seed: int = 0,
+              start: datetime = datetime(2024, 12, 1)) -> pd.DataFrame:
+    """Build ``rows`` raw observations in timestamp order."""
+    rng = np.random.default_rng(seed)
+    station = rng.integers(0, locations, rows)
+    offsets = np.sort(rng.integers(0, days * 86400, rows))
+    timestamps = np.datetime64(start, 's') + offsets.astype('timedelta64[s]')
+    latitudes = np.round(np.linspace(-60, 70, locations) + rng.uniform(-0.5, 0.5, locations), 4)
+    longitudes = np.round(np.linspace(-170, 170, locations) + rng.uniform(-0.5, 0.5, locations), 4)
+    weather = rng.integers(0, len(WEATHER), rows)
+    temp = np.round(rng.uniform(255.0, 315.0, rows), 2)
+    day_start = timestamps.astype('datetime64[D]')
+
+    frame = pd.DataFrame({
+        'timestamp': np.datetime_as_string(timestamps, unit='s'),
+        'location_name': np.char.add('Station ', station.astype(str)),
+        'latitude': latitudes[station],
+        'longitude': longitudes[station],
+        'weather_main': [WEATHER[i][0] for i in weather],
+        'weather_description': [WEATHER[i][1] for i in weather],
+        'weather_icon': [WEATHER[i][2] for i in weather],
+        'temp': temp,
+        'feels_like': np.round(temp - rng.uniform(0, 3, rows), 2),
+        'temp_min': np.round(temp - rng.uniform(0, 2, rows), 2),
+        'temp_max': np.round(temp + rng.uniform(0, 2, rows), 2),
+        'pressure': rng.integers(980, 1040, rows),
+        'humidity': rng.integers(5, 100, rows),
+        'sea_level': rng.integers(980, 1040, rows),
+        'ground_level': rng.integers(900, 1040, rows),
+        'wind_speed': np.round(rng.uniform(0, 20, rows), 2),
+        'wind_direction': rng.integers(0, 360, rows),
+        'cloud_cover': rng.integers(0, 100, rows),
+        'visibility': rng.integers(1000, 10001, rows),
+        'country': 'MA',
+        'sunrise': np.datetime_as_string(day_start + np.timedelta64(7 * 3600, 's'), unit='s'),
+        'sunset': np.datetime_as_string(day_start + np.timedelta64(18 * 3600, 's'), unit='s'),
+        'timezone': 3600,
+    })
+    return frame[RAW_COLUMNS]
+
+def write_raw_csv(path: str, rows: int, locations: int = 100, days: int = 30, seed: int = 0,
+                  chunk_rows: int = 1_000_000) -> str:
+    """Write a synthetic raw CSV of ``rows`` rows, generated in chunks to bound memory."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    chunks = max(1, -(-rows // chunk_rows))
+    days_per_chunk = max(1, days // chunks)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        for i in range(chunks):
+            size = min(chunk_rows, rows - i * chunk_rows)
+            start = datetime(2024, 12, 1) + timedelta(days=i * days_per_chunk)
+            frame = raw_frame(size, locations, days_per_chunk if chunks > 1 else days, seed + i, start)
+            frame.to_csv(f, index=False, header=(i == 0))
+    return path
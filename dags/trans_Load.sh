@@ -2,7 +2,7 @@
 
 
 # Run the weather data transformation script
-/home/ubuntu/WeatherTrendsPipeline/venv/bin/python /home/ubuntu/WeatherTrendsPipeline/src/data/processing/transform_weather.py
+/home/ubuntu/WeatherTrendsPipeline/venv/bin/python /home/ubuntu/WeatherTrendsPipeline/src/data/processing/transform_weather.py --rollups
 # Log the transformation
 echo "$(date) Weather data transformed successfully" >> /home/ubuntu/WeatherTrendsPipeline/logs/etl.log
 echo "=========" >> /home/ubuntu/WeatherTrendsPipeline/logs/etl.log
@@ -14,3 +14,9 @@ echo "=========" >> /home/ubuntu/WeatherTrendsPipeline/logs/etl.log
 echo "$(date) Weather data saved successfully" >> /home/ubuntu/WeatherTrendsPipeline/logs/etl.log
 echo "=========" >> /home/ubuntu/WeatherTrendsPipeline/logs/etl.log
 
+
+# Merge past months of daily uploads and apply the retention period
+/home/ubuntu/WeatherTrendsPipeline/venv/bin/python /home/ubuntu/WeatherTrendsPipeline/src/data/storage/compact_weather.py
+# Log the compaction
+echo "$(date) Weather data archive compacted" >> /home/ubuntu/WeatherTrendsPipeline/logs/etl.log
+echo "=========" >> /home/ubuntu/WeatherTrendsPipeline/logs/etl.log
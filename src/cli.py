@@ -0,0 +1,302 @@
+"""
+Unified command line entry point for the pipeline stages.
+
+    weather-pipeline extract   [--all-locations] [--max-workers N] [--daemon]
+    weather-pipeline backfill  --start T [--end T] [--location NAME] [--max-workers N] [--restart]
+    weather-pipeline transform [--chunksize N] [--incremental] [--format csv|parquet]
+                               [--workers N [--shard-by file|day|location] [--input PATH ...]]
+    weather-pipeline load      [--target s3|database]
+    weather-pipeline run       (extract all locations, transform, load)
+    weather-pipeline stream    [--sink csv|database|s3] [--max-workers N] [--no-spool]
+    weather-pipeline rollups   [--granularity hourly|daily] [--location NAME] [--start T] [--end T]
+    weather-pipeline index     [--root DIR|s3://BUCKET] [--rebuild]
+    weather-pipeline query     [--root DIR|s3://BUCKET] [--location NAME] [--start T] [--end T] [--column NAME]
+    weather-pipeline compact   [--root DIR|s3://BUCKET] [--retention-days N] [--compression gzip|zstd] [--dry-run]
+
+Per-stage timings and throughput are exported after every command to the
+outputs in the ``metrics`` config section (or ``--metrics-textfile`` /
+``--metrics-jsonl``, given before the subcommand).
+
+Only the standard library is imported at startup; each subcommand imports the
+stage it runs, so ``extract`` never loads pandas, numpy, boto3 or psycopg2.
+"""
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+def _extract(args: argparse.Namespace) -> None:
+    from src.data.extraction.extract_weather import extract_and_save_weather, run_daemon
+
+    if args.daemon:
+        run_daemon(max_workers=args.max_workers)
+    else:
+        extract_and_save_weather(all_locations=args.all_locations, max_workers=args.max_workers)
+
+def _backfill(args: argparse.Namespace) -> None:
+    from datetime import datetime
+    from src.data.extraction.extract_weather import backfill_weather
+
+    end = datetime.fromisoformat(args.end) if args.end else datetime.now()
+    saved = backfill_weather(
+        start=datetime.fromisoformat(args.start),
+        end=end,
+        location_names=args.location,
+        max_workers=args.max_workers,
+        checkpoint=args.checkpoint,
+        restart=args.restart
+    )
+    print(f"Backfilled {saved} weather records")
+
+def _transform(args: argparse.Namespace) -> None:
+    from src.data.processing import transform_weather
+
+    transform_weather.transform(
+        chunksize=args.chunksize,
+        incremental=args.incremental,
+        checkpoint=args.checkpoint or transform_weather.default_checkpoint,
+        output_format=args.format,
+        parquet_dir=args.parquet_dir or transform_weather.default_parquet_dir,
+        rollup_dir=(args.rollup_dir or transform_weather.default_rollup_dir) if args.rollups else None,
+        workers=args.workers,
+        shard_by=args.shard_by,
+        inputs=args.input
+    )
+
+def _load(args: argparse.Namespace) -> None:
+    if args.target == "database":
+        from src.data.storage.load_database import load_processed_data_to_database
+
+        rows = load_processed_data_to_database()
+        print(f"Loaded {rows} rows into the database")
+    else:
+        from src.data.storage.load_weather import load_processed_data
+
+        load_processed_data()
+
+def _rollups(args: argparse.Namespace) -> None:
+    from src.data.processing.transform_weather import default_rollup_dir
+    from src.utils.rollups import RollupStore
+
+    result = RollupStore(args.rollup_dir or default_rollup_dir).query(
+        granularity=args.granularity,
+        locations=args.location,
+        start=args.start,
+        end=args.end,
+        metrics=args.metric
+    )
+    print(result.to_csv(index=False), end="")
+
+def _manifest(args: argparse.Namespace):
+    from src.data.storage.load_weather import BUCKET_NAME, get_aws_credentials
+    from src.utils.manifest import DataManifest
+
+    root = args.root or (f"s3://{BUCKET_NAME}" if BUCKET_NAME else None)
+    if root is None:
+        raise ValueError("No storage root: pass --root or set BUCKET_NAME")
+    return DataManifest(root, storage_options=get_aws_credentials() if root.startswith("s3://") else None)
+
+def _index(args: argparse.Namespace) -> None:
+    manifest = _manifest(args)
+    indexed = manifest.scan(rebuild=args.rebuild)
+    manifest.save()
+    print(f"Indexed {indexed} new files, {len(manifest.files)} files in {manifest.url}")
+
+def _query(args: argparse.Namespace) -> None:
+    from src.utils.weather_loader import to_csv_frame
+
+    result = _manifest(args).query(
+        locations=args.location,
+        start=args.start,
+        end=args.end,
+        columns=args.column
+    )
+    print(to_csv_frame(result).to_csv(index=False), end="")
+
+def _compact(args: argparse.Namespace) -> None:
+    from src.data.storage.compact_weather import compact_archived_data
+
+    plan = compact_archived_data(
+        root=args.root,
+        retention_days=args.retention_days,
+        compression=args.compression,
+        dry_run=args.dry_run
+    )
+    merged = sum(len(sources) for sources in plan.merges.values())
+    action = "Would merge" if args.dry_run else "Merged"
+    print(f"{action} {merged} files into {len(plan.merges)} monthly files and "
+          f"{'delete' if args.dry_run else 'deleted'} {len(plan.expired)} expired files")
+
+def _run(args: argparse.Namespace) -> None:
+    from src.data.extraction.extract_weather import extract_and_save_weather
+
+    extract_and_save_weather(all_locations=True, max_workers=args.max_workers)
+    _transform(args)
+    _load(args)
+
+def _stream(args: argparse.Namespace) -> None:
+    from src.data.streaming.stream_weather import run_stream
+
+    run_stream(sink=args.sink, max_workers=args.max_workers, spool=not args.no_spool)
+
+def _add_transform_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the raw file in chunks of this many rows to bound memory use")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only process rows added since the last run and append them to the output")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Checkpoint file used by --incremental (default: data/state/transform_checkpoint.json)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="Storage format of the processed output")
+    parser.add_argument("--parquet-dir", default=None,
+                        help="Root of the partitioned Parquet dataset used by --format parquet")
+    parser.add_argument("--rollups", action="store_true",
+                        help="Update the hourly/daily trend rollups with the processed rows")
+    parser.add_argument("--rollup-dir", default=None,
+                        help="Directory of the trend rollups (default: data/rollups)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Transform on this many processes in parallel")
+    parser.add_argument("--shard-by", choices=["file", "day", "location"], default="day",
+                        help="How --workers splits the input into independent shards")
+    parser.add_argument("--input", action="append", default=None,
+                        help="Raw CSV to transform with --workers (repeatable, default: data/raw/weather_data.csv)")
+
+def _add_load_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--target", choices=["s3", "database"], default="s3",
+                        help="Where to load the processed data")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="weather-pipeline", description="WeatherTrendsPipeline stages")
+    parser.add_argument("--metrics-textfile", default=None,
+                        help="Write stage metrics in Prometheus text format here (default: metrics.prometheus_textfile)")
+    parser.add_argument("--metrics-jsonl", default=None,
+                        help="Append stage metrics as JSON lines here (default: metrics.json_lines)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract = subparsers.add_parser("extract", help="Extract current weather into the raw data store")
+    extract.add_argument("--all-locations", action="store_true",
+                         help="Fetch every configured location concurrently")
+    extract.add_argument("--max-workers", type=int, default=None,
+                         help="Maximum concurrent API requests (defaults to collection.max_concurrency)")
+    extract.add_argument("--daemon", action="store_true",
+                         help="Keep running and extract every configured location on the schedule "
+                              "from the daemon config section")
+    extract.set_defaults(handler=_extract)
+
+    backfill = subparsers.add_parser("backfill", help="Fetch hourly history for a time range into the raw data store")
+    backfill.add_argument("--start", required=True, help="First time to fetch (e.g. 2024-12-01 or 2024-12-01T06:00)")
+    backfill.add_argument("--end", default=None, help="Exclusive end of the range (default: now)")
+    backfill.add_argument("--location", action="append", default=None,
+                          help="Configured location name to backfill (repeatable, default: all)")
+    backfill.add_argument("--max-workers", type=int, default=None,
+                          help="Maximum concurrent API requests (defaults to collection.max_concurrency)")
+    backfill.add_argument("--checkpoint", default=None,
+                          help="Progress file used to resume (default: backfill.checkpoint)")
+    backfill.add_argument("--restart", action="store_true",
+                          help="Forget the recorded progress and fetch every work unit again")
+    backfill.set_defaults(handler=_backfill)
+
+    transform = subparsers.add_parser("transform", help="Transform raw weather data into the processed store")
+    _add_transform_arguments(transform)
+    transform.set_defaults(handler=_transform)
+
+    load = subparsers.add_parser("load", help="Load processed data into S3 or the database")
+    _add_load_arguments(load)
+    load.set_defaults(handler=_load)
+
+    rollups = subparsers.add_parser("rollups", help="Query hourly/daily trend rollups as CSV")
+    rollups.add_argument("--granularity", choices=["hourly", "daily"], default="daily")
+    rollups.add_argument("--location", action="append", default=None,
+                         help="Location name to include (repeatable, default: all)")
+    rollups.add_argument("--metric", action="append", default=None,
+                         choices=["temperature", "humidity", "pressure", "wind_speed"],
+                         help="Metric to include (repeatable, default: all)")
+    rollups.add_argument("--start", default=None, help="First bucket to include (e.g. 2024-12-01)")
+    rollups.add_argument("--end", default=None, help="Exclusive end of the range")
+    rollups.add_argument("--rollup-dir", default=None,
+                         help="Directory of the trend rollups (default: data/rollups)")
+    rollups.set_defaults(handler=_rollups)
+
+    stream = subparsers.add_parser("stream", help="Run extract, transform and load as one streaming process")
+    stream.add_argument("--sink", choices=["csv", "database", "s3"], default=None,
+                        help="Where processed micro-batches are written (default: stream.sink)")
+    stream.add_argument("--max-workers", type=int, default=None,
+                        help="Maximum concurrent API requests (defaults to collection.max_concurrency)")
+    stream.add_argument("--no-spool", action="store_true",
+                        help="Do not spool extracted batches to disk (rows in flight are lost on a crash)")
+    stream.set_defaults(handler=_stream)
+
+    index = subparsers.add_parser("index", help="Index stored files in the manifest used by query")
+    index.add_argument("--root", default=None,
+                       help="Directory or s3:// URL of the stored files (default: s3://$BUCKET_NAME)")
+    index.add_argument("--rebuild", action="store_true",
+                       help="Re-index every file instead of only the ones missing from the manifest")
+    index.set_defaults(handler=_index)
+
+    query = subparsers.add_parser("query", help="Query stored weather rows as CSV, reading only matching files")
+    query.add_argument("--root", default=None,
+                       help="Directory or s3:// URL of the stored files (default: s3://$BUCKET_NAME)")
+    query.add_argument("--location", action="append", default=None,
+                       help="Location name to include (repeatable, default: all)")
+    query.add_argument("--start", default=None, help="First time to include (e.g. 2024-12-01)")
+    query.add_argument("--end", default=None, help="Exclusive end of the range")
+    query.add_argument("--column", action="append", default=None,
+                       help="Column to include (repeatable, default: all)")
+    query.set_defaults(handler=_query)
+
+    compact = subparsers.add_parser("compact", help="Merge past months of daily uploads and apply retention")
+    compact.add_argument("--root", default=None,
+                         help="Directory or s3:// URL of the stored files (default: s3://$BUCKET_NAME)")
+    compact.add_argument("--retention-days", type=int, default=None,
+                         help="Delete files older than this many days (default: backup.retention_days)")
+    compact.add_argument("--compression", choices=["gzip", "zstd"], default="gzip",
+                         help="Compression of the monthly files")
+    compact.add_argument("--dry-run", action="store_true",
+                         help="Only log what would be merged and deleted")
+    compact.set_defaults(handler=_compact)
+
+    run = subparsers.add_parser("run", help="Run extract (all locations), transform and load in one process")
+    run.add_argument("--max-workers", type=int, default=None,
+                     help="Maximum concurrent API requests (defaults to collection.max_concurrency)")
+    _add_transform_arguments(run)
+    _add_load_arguments(run)
+    run.set_defaults(handler=_run)
+
+    return parser
+
+def _export_metrics(args: argparse.Namespace, status: str) -> None:
+    import yaml
+    from src.utils.metrics import export_metrics
+
+    config_path = os.path.join(project_root, "config", "api_config.yaml")
+    config = {}
+    if os.path.exists(config_path):
+        with open(config_path, "r") as f:
+            config = yaml.safe_load(f) or {}
+    metrics_config = dict(config.get("metrics") or {})
+    if args.metrics_textfile:
+        metrics_config["prometheus_textfile"] = args.metrics_textfile
+    if args.metrics_jsonl:
+        metrics_config["json_lines"] = args.metrics_jsonl
+    export_metrics({"metrics": metrics_config}, command=args.command, status=status)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    status = 0
+    try:
+        args.handler(args)
+    except Exception as e:
+        print(f"Error running {args.command}: {str(e)}", file=sys.stderr)
+        status = 1
+    try:
+        _export_metrics(args, "ok" if status == 0 else "error")
+    except Exception as e:
+        print(f"Error exporting metrics: {str(e)}", file=sys.stderr)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
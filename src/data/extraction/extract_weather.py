@@ -12,6 +12,9 @@ if str(project_root) not in sys.path:
 
 try:
     from src.utils.api_client import OpenWeatherMapClient
+    from src.utils.dedup_index import ObservationIndex, observation_key
+    from src.utils.flattener import CompiledFlattener, FlattenedBatch
+    from src.utils.raw_schema import HISTORY_FIELDS
 except ImportError as e:
     print(f"Error importing utils: {e}")
     print(f"sys.path: {sys.path}")
@@ -19,9 +22,154 @@ except ImportError as e:
 
 from loguru import logger
 
-def extract_and_save_weather():
+# Live payloads carry every raw column; History API observations lack the
+# location (supplied per work unit) and sunrise, sunset and timezone, and may
+# lack feels_like, temp_min/max, wind and clouds (HISTORY_FIELDS)
+FLATTENER = CompiledFlattener()
+HISTORY_FLATTENER = CompiledFlattener(
+    HISTORY_FIELDS,
+    constants=('location_name', 'latitude', 'longitude', 'country'),
+    omit=('sunrise', 'sunset', 'timezone')
+)
+
+def flatten_weather_data(weather_data: dict) -> dict:
+    """
+    Flatten a nested OpenWeatherMap current weather payload into a CSV row
+    """
+    return FLATTENER.flatten(weather_data)
+
+def flatten_history_item(item: dict, location: dict) -> dict:
+    """
+    Flatten one hourly History API observation for a configured location into
+    a CSV row with the same columns as flatten_weather_data. Fields the History
+    API does not return (sunrise, sunset, timezone) are left empty, as are
+    the optional ones an observation lacks.
+    """
+    return HISTORY_FLATTENER.flatten(item, location_name=location['name'], latitude=location['lat'],
+                                     longitude=location['lon'], country=location.get('country'))
+
+def flatten_history_batch(items: list, location: dict) -> FlattenedBatch:
+    """Flatten the History API observations of one location into columns in one pass"""
+    return HISTORY_FLATTENER.flatten_batch(items, location_name=location['name'], latitude=location['lat'],
+                                           longitude=location['lon'], country=location.get('country'))
+
+def filter_new_records(batch: FlattenedBatch, index: ObservationIndex) -> FlattenedBatch:
+    """
+    Drop records whose observation (same location and observation time) is
+    already in the index, adding the new ones to it (the caller saves it)
+    """
+    columns = batch.columns
+    if not batch.rows:
+        return batch
+    keys = [observation_key(lat, lon, timestamp) for lat, lon, timestamp
+            in zip(columns['latitude'], columns['longitude'], columns['timestamp'])]
+    timestamps = [datetime.fromisoformat(timestamp).timestamp() for timestamp in columns['timestamp']]
+    is_new = index.filter_new(keys, timestamps)
+    if all(is_new):
+        return batch
+    return FlattenedBatch(
+        {name: [value for value, keep in zip(values, is_new) if keep] for name, values in columns.items()},
+        batch.errors
+    )
+
+def save_weather_records(batch: FlattenedBatch, output_file: Path, index: ObservationIndex = None) -> int:
+    """
+    Append a flattened batch of weather records to the raw CSV in a single write
+    
+    The header comes from the field spec the batch was flattened with. When an
+    observation index is given, records already written (same location and
+    observation time) are skipped and the index is saved after the write.
+    Returns the number of records written.
+    """
+    if index is not None:
+        batch = filter_new_records(batch, index)
+    columns = batch.columns
+    rows = list(zip(*columns.values()))
+    
+    if not rows:
+        return 0
+    
+    # Check if file exists to write headers
+    file_exists = output_file.exists()
+    
+    # Write to CSV file
+    mode = 'a' if file_exists else 'w'
+    with open(output_file, mode, newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        
+        # Write headers if file is new or empty
+        if not file_exists:
+            writer.writerow(columns)
+        
+        writer.writerows(rows)
+    
+    if index is not None:
+        index.save()
+    return len(rows)
+
+def _validated_data(response: dict) -> dict:
+    """Return the payload of a client response or raise on an unexpected format"""
+    if response.get('message') != 'success' or 'data' not in response:
+        raise ValueError("Invalid API response format")
+    return response['data']
+
+def _observation_index(client: OpenWeatherMapClient) -> ObservationIndex:
+    """Open the persistent observation index when the config enables it"""
+    path = (client.config.get("dedup") or {}).get("path")
+    if not path:
+        return None
+    return ObservationIndex.from_config(client.config, path=project_root / path)
+
+def fetch_locations_batch(client: OpenWeatherMapClient, locations: list, max_workers: int = None) -> FlattenedBatch:
+    """
+    Fetch several locations concurrently and flatten the successful records in one batch.
+    Failed locations and malformed responses are logged and skipped.
+    """
+    results, failures = client.get_weather_for_locations(locations, max_workers=max_workers)
+    if not results and failures:
+        raise RuntimeError(f"Weather extraction failed for all {len(failures)} locations")
+    
+    payloads, fetched = [], []
+    for location, response in results:
+        try:
+            payloads.append(_validated_data(response))
+            fetched.append(location)
+        except ValueError as e:
+            logger.error(f"Skipping malformed response for {location['name']}: {str(e)}")
+    
+    batch = FLATTENER.flatten_batch(payloads)
+    for position, error in batch.errors:
+        logger.error(f"Skipping malformed response for {fetched[position]['name']}: {error!r}")
+    return batch
+
+def fetch_and_save_locations(client: OpenWeatherMapClient, locations: list, output_file: Path,
+                             max_workers: int = None, index: ObservationIndex = None) -> int:
+    """
+    Fetch several locations concurrently and append the successful records in one batch.
+    Returns the number of records written.
+    """
+    batch = fetch_locations_batch(client, locations, max_workers=max_workers)
+    return save_weather_records(batch, output_file, index=index)
+
+def location_groups(client: OpenWeatherMapClient) -> dict:
+    """
+    Configured locations grouped by their ``interval`` (seconds, defaulting to
+    ``daemon.extraction_interval``)
+    """
+    default_interval = client.config.get("daemon", {}).get("extraction_interval", 840)
+    groups = {}
+    for location in client.get_locations():
+        groups.setdefault(location.get("interval", default_interval), []).append(location)
+    return groups
+
+def extract_and_save_weather(all_locations: bool = False, max_workers: int = None):
     """
     Extract weather data using the OpenWeatherMap API and save it to the raw data folder as CSV
+    
+    By default only Casablanca is fetched. With ``all_locations`` every configured
+    location is fetched concurrently (at most ``max_workers`` requests in flight),
+    failed locations are logged and skipped, and all successful results are
+    appended to the raw store in one batch.
     """
     # Initialize API client
     client = OpenWeatherMapClient()
@@ -34,71 +182,157 @@ def extract_and_save_weather():
     output_file = raw_data_dir / "weather_data.csv"
     
     try:
-        # Get locations from config and find Casablanca
         locations = client.get_locations()
-        casablanca = next(loc for loc in locations if loc["name"] == "Casablanca")
-        
-        # Get weather for Casablanca
-        response = client.get_latest_weather(casablanca["lat"], casablanca["lon"])
-        logger.debug(f"Raw weather data: {response}")
+        index = _observation_index(client)
         
-        if response.get('message') != 'success' or 'data' not in response:
-            raise ValueError("Invalid API response format")
-            
-        weather_data = response['data']
+        if all_locations:
+            saved = fetch_and_save_locations(client, locations, output_file, max_workers=max_workers, index=index)
+        else:
+            # Find Casablanca and get its weather
+            casablanca = next(loc for loc in locations if loc["name"] == "Casablanca")
+            response = client.get_latest_weather(casablanca["lat"], casablanca["lon"])
+            logger.debug(f"Raw weather data: {response}")
+            batch = FLATTENER.flatten_batch([_validated_data(response)])
+            if batch.errors:
+                raise batch.errors[0][1]
+            saved = save_weather_records(batch, output_file, index=index)
         
-        # Flatten the nested JSON data for CSV format
-        flattened_data = {
-            'timestamp': datetime.fromtimestamp(weather_data['dt']).isoformat(),
-            'location_name': weather_data['name'],
-            'latitude': weather_data['coord']['lat'],
-            'longitude': weather_data['coord']['lon'],
-            # Main weather data
-            'weather_main': weather_data['weather'][0]['main'],
-            'weather_description': weather_data['weather'][0]['description'],
-            'weather_icon': weather_data['weather'][0]['icon'],
-            # Temperature data
-            'temp': weather_data['main']['temp'],
-            'feels_like': weather_data['main']['feels_like'],
-            'temp_min': weather_data['main']['temp_min'],
-            'temp_max': weather_data['main']['temp_max'],
-            # Pressure and humidity
-            'pressure': weather_data['main']['pressure'],
-            'humidity': weather_data['main']['humidity'],
-            'sea_level': weather_data['main'].get('sea_level'),
-            'ground_level': weather_data['main'].get('grnd_level'),
-            # Wind data
-            'wind_speed': weather_data['wind']['speed'],
-            'wind_direction': weather_data['wind'].get('deg'),
-            # Clouds and visibility
-            'cloud_cover': weather_data['clouds']['all'],
-            'visibility': weather_data.get('visibility'),
-            # System data
-            'country': weather_data['sys']['country'],
-            'sunrise': datetime.fromtimestamp(weather_data['sys']['sunrise']).isoformat(),
-            'sunset': datetime.fromtimestamp(weather_data['sys']['sunset']).isoformat(),
-            'timezone': weather_data['timezone']
-        }
-        
-        # Check if file exists to write headers
-        file_exists = output_file.exists()
-        
-        # Write to CSV file
-        mode = 'a' if file_exists else 'w'
-        with open(output_file, mode, newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=flattened_data.keys())
-            
-            # Write headers if file is new or empty
-            if not file_exists:
-                writer.writeheader()
-            
-            writer.writerow(flattened_data)
-            
-        logger.info(f"Successfully saved weather data to {output_file}")
+        logger.info(f"Successfully saved {saved} weather records to {output_file}")
         
     except Exception as e:
         logger.error(f"Error extracting weather data: {str(e)}")
         raise
+    finally:
+        # Persists the requests drawn from the shared daily budget
+        client.close()
+
+def backfill_weather(start: datetime, end: datetime, location_names: list = None, max_workers: int = None,
+                     checkpoint: Path = None, restart: bool = False, client: OpenWeatherMapClient = None,
+                     output_file: Path = None) -> int:
+    """
+    Fill a gap in the raw data store with hourly observations from the History API
+    
+    The range [start, end) of every location (all configured ones unless
+    ``location_names`` is given) is split into work units of
+    ``backfill.unit_hours`` hours that are fetched concurrently within the
+    shared request budget. Each finished unit is appended to the raw CSV, like
+    live data and through the same observation index, and then recorded in the
+    checkpoint, so rerunning after an interruption only fetches the missing
+    units (``restart`` forgets the progress). Returns the number of records written.
+    """
+    from src.utils.backfill import BackfillProgress, plan_units
+    
+    own_client = client is None
+    if own_client:
+        client = OpenWeatherMapClient()
+    backfill_config = client.config.get("backfill") or {}
+    
+    if output_file is None:
+        raw_data_dir = project_root / "data" / "raw"
+        raw_data_dir.mkdir(parents=True, exist_ok=True)
+        output_file = raw_data_dir / "weather_data.csv"
+    if checkpoint is None:
+        checkpoint = project_root / backfill_config.get("checkpoint", "data/state/backfill_checkpoint.json")
+    
+    try:
+        locations = client.get_locations()
+        if location_names:
+            unknown = set(location_names) - {location["name"] for location in locations}
+            if unknown:
+                raise ValueError(f"Unknown locations: {', '.join(sorted(unknown))}")
+            locations = [location for location in locations if location["name"] in location_names]
+        
+        progress = BackfillProgress(checkpoint)
+        if restart:
+            progress.reset()
+        units = plan_units(locations, start, end, backfill_config.get("unit_hours", 24))
+        pending = progress.pending(units)
+        logger.info(f"Backfilling {start} to {end}: {len(pending)} of {len(units)} work units left")
+        
+        index = _observation_index(client)
+        saved = 0
+        
+        def save_unit(unit, items):
+            nonlocal saved
+            batch = flatten_history_batch(items, unit.location)
+            for position, error in batch.errors:
+                logger.error(f"Skipping malformed history observation {position} for {unit.key}: {error!r}")
+            saved += save_weather_records(batch, output_file, index=index)
+            progress.mark_done(unit)
+        
+        failures = client.backfill(pending, save_unit, max_workers=max_workers)
+        logger.info(f"Backfill saved {saved} weather records to {output_file}")
+        if failures:
+            raise RuntimeError(f"{len(failures)} of {len(pending)} backfill work units failed, rerun to resume")
+        return saved
+    finally:
+        if own_client:
+            client.close()
+
+def run_daemon(max_workers: int = None) -> None:
+    """
+    Run extraction as a resident process with an in-process scheduler.
+    
+    The API client (config, pooled connections, cache) is created once and
+    reused. Locations are grouped by their ``interval`` (seconds, defaulting to
+    ``daemon.extraction_interval``) and each group is fetched on its own
+    schedule with up to ``daemon.jitter`` seconds of random delay. The transform
+    and load stages run in-process every day at ``daemon.transform_load_at``.
+    SIGINT/SIGTERM stop the daemon after the job in progress completes.
+    """
+    import signal
+    from src.utils.metrics import export_metrics
+    from src.utils.scheduler import Scheduler
+    
+    client = OpenWeatherMapClient()
+    daemon_config = client.config.get("daemon", {})
+    jitter = daemon_config.get("jitter", 0)
+    
+    raw_data_dir = project_root / "data" / "raw"
+    raw_data_dir.mkdir(parents=True, exist_ok=True)
+    output_file = raw_data_dir / "weather_data.csv"
+    index = _observation_index(client)
+    
+    groups = location_groups(client)
+    
+    scheduler = Scheduler()
+    for interval, locations in sorted(groups.items()):
+        def extract_group(locations=locations):
+            saved = fetch_and_save_locations(client, locations, output_file, max_workers=max_workers, index=index)
+            logger.info(f"Successfully saved {saved} weather records to {output_file}")
+            export_metrics(client.config, command="daemon", job="extract")
+        scheduler.add_job(f"extract every {interval}s", extract_group, interval, jitter=jitter)
+    
+    def transform_and_load():
+        from src.data.processing import transform_weather
+        from src.data.storage.load_weather import load_processed_data
+        
+        if not output_file.exists():
+            logger.info("No raw data to transform")
+            return
+        transform_weather.transform(rollup_dir=transform_weather.default_rollup_dir)
+        load_processed_data()
+        export_metrics(client.config, command="daemon", job="transform_load")
+    
+    transform_load_at = daemon_config.get("transform_load_at")
+    if transform_load_at:
+        scheduler.add_daily_job("transform and load", transform_and_load, transform_load_at)
+    
+    def shutdown(signum, frame):
+        logger.info(f"Received signal {signum}, shutting down after the current job")
+        scheduler.stop()
+    
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    
+    logger.info(f"Extraction daemon started with {len(groups)} location group(s)")
+    try:
+        scheduler.run()
+    finally:
+        client.close()
+        logger.info("Extraction daemon stopped")
 
 if __name__ == "__main__":
-    extract_and_save_weather()
+    from src.cli import main
+    
+    sys.exit(main(["extract"] + sys.argv[1:]))
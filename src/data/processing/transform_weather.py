@@ -1,22 +1,114 @@
 import os
 import sys
 from pathlib import Path
+from typing import List, Optional
 
 # Add the project root directory to Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
 sys.path.append(project_root)
 
-from src.utils.def_transformations import process_weather_data
+from src.utils.def_transformations import (
+    process_weather_data,
+    process_weather_data_chunked,
+    process_weather_data_incremental
+)
+from src.utils.parquet_store import discard_parquet_runs, write_processed_parquet
+
+# Define input and output paths
+input_file = os.path.join(project_root, "data", "raw", "weather_data.csv")
+output_file = os.path.join(project_root, "data", "processed", "weather_data_processed.csv")
+default_checkpoint = os.path.join(project_root, "data", "state", "transform_checkpoint.json")
+default_parquet_dir = os.path.join(project_root, "data", "processed", "parquet")
+dedup_index_file = os.path.join(project_root, "data", "state", "transform_dedup_index.json")
+default_rollup_dir = os.path.join(project_root, "data", "rollups")
+
+def transform(
+    chunksize: Optional[int] = None,
+    incremental: bool = False,
+    checkpoint: str = default_checkpoint,
+    output_format: str = "csv",
+    parquet_dir: str = default_parquet_dir,
+    rollup_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    shard_by: str = "day",
+    inputs: Optional[List[str]] = None
+) -> None:
+    """
+    Run the transform stage over the raw data file.
+    
+    The whole file is processed at once unless ``chunksize`` (bounded memory)
+    or ``incremental`` (only rows added since the last run) is given.
+    ``output_format`` selects the processed CSV or the partitioned Parquet dataset.
+    With ``rollup_dir`` the hourly/daily trend rollups stored there are updated
+    with every processed batch. ``workers`` transforms ``inputs`` (default: the
+    raw data file) on that many processes, sharded by ``shard_by``; shards that
+    fail are reported and the run fails after the others have been written.
+    """
+    sinks = []
+    current_run = {}
+    if output_format == "parquet":
+        sinks.append(lambda batch: write_processed_parquet(batch, parquet_dir, run=current_run.get("run")))
+    rollups = None
+    if rollup_dir:
+        from src.utils.rollups import RollupStore
+        
+        rollups = RollupStore(rollup_dir)
+        sinks.append(rollups.update)
+    
+    def on_batch(batch):
+        for sink in sinks:
+            sink(batch)
+    
+    if workers:
+        from src.utils.parallel_transform import parallel_transform
+        
+        if incremental:
+            raise ValueError("Incremental mode cannot be combined with parallel workers")
+        results = parallel_transform(
+            inputs or [input_file],
+            output_file=output_file if output_format == "csv" else None,
+            shard_by=shard_by,
+            workers=workers,
+            chunksize=chunksize or 100_000,
+            parquet_dir=parquet_dir if output_format == "parquet" else None,
+            on_batch=rollups.update if rollups is not None else None
+        )
+        if rollups is not None:
+            rollups.save()
+        failed = [result.shard for result in results if result.error]
+        if failed:
+            raise RuntimeError(f"{len(failed)} of {len(results)} shards failed: {', '.join(failed)}")
+        print(f"Processed {sum(result.rows for result in results)} rows in {len(results)} shards.")
+        return
+    
+    if incremental:
+        def on_run(run):
+            # Parquet files of runs that crashed before their checkpoint are rolled back
+            # like the processed CSV; rollups skip replayed rows through their own index
+            current_run["run"] = run
+            if output_format == "parquet":
+                discarded = discard_parquet_runs(parquet_dir, run)
+                if discarded:
+                    print(f"Discarded {discarded} Parquet files of an uncommitted run.")
+        
+        # The processed CSV doubles as the rollback point, so it is kept in both formats
+        rows = process_weather_data_incremental(input_file, output_file, checkpoint,
+                                                chunksize=chunksize or 100_000, on_batch=on_batch if sinks else None,
+                                                dedup_index=dedup_index_file, on_run=on_run)
+        print(f"Processed {rows} new rows.")
+    elif chunksize:
+        csv_output = output_file if output_format == "csv" else None
+        process_weather_data_chunked(input_file, csv_output, chunksize=chunksize, on_batch=on_batch if sinks else None)
+    else:
+        processed_df = process_weather_data(input_file, output_file if output_format == "csv" else None)
+        on_batch(processed_df)
+    
+    if rollups is not None:
+        rollups.save()
+    print("Data processing complete. Check the output file for results.")
 
 if __name__ == "__main__":
-    # Define input and output paths
-    input_file = os.path.join(project_root, "data", "raw", "weather_data.csv")
-    output_file = os.path.join(project_root, "data", "processed", "weather_data_processed.csv")
+    from src.cli import main
     
-    try:
-        # Process the weather data
-        processed_df = process_weather_data(input_file, output_file)
-        print("Data processing complete. Check the output file for results.")
-    except Exception as e:
-        print(f"Error processing weather data: {str(e)}")
+    sys.exit(main(["transform"] + sys.argv[1:]))
@@ -0,0 +1,52 @@
+import os
+import sys
+from typing import Optional
+
+import yaml
+
+# Add the project root directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+sys.path.append(project_root)
+
+from src.data.storage.load_weather import BUCKET_NAME, get_aws_credentials
+from src.utils.compaction import CompactionPlan, compact_archive
+from src.utils.manifest import DataManifest
+
+db_config_file = os.path.join(project_root, "config", "db_config.yaml")
+
+def get_retention_days(config_path: str = db_config_file) -> Optional[int]:
+    """``backup.retention_days`` from the database config, or None when backups are disabled or unset"""
+    if not os.path.exists(config_path):
+        return None
+    with open(config_path, "r") as f:
+        backup = (yaml.safe_load(f) or {}).get("backup") or {}
+    if not backup.get("enabled", True):
+        return None
+    return backup.get("retention_days")
+
+def compact_archived_data(
+    root: Optional[str] = None,
+    retention_days: Optional[int] = None,
+    compression: str = "gzip",
+    dry_run: bool = False
+) -> CompactionPlan:
+    """
+    Merge the daily uploads of past months into compressed monthly files and
+    delete uploads older than the retention period, updating the manifest
+
+    ``root`` defaults to the bucket uploads go to (``s3://$BUCKET_NAME``) and
+    ``retention_days`` to ``backup.retention_days`` in db_config.yaml.
+    """
+    root = root or (f"s3://{BUCKET_NAME}" if BUCKET_NAME else None)
+    if root is None:
+        raise ValueError("No storage root: pass --root or set BUCKET_NAME")
+    if retention_days is None:
+        retention_days = get_retention_days()
+    manifest = DataManifest(root, storage_options=get_aws_credentials() if root.startswith("s3://") else None)
+    return compact_archive(manifest, retention_days=retention_days, compression=compression, dry_run=dry_run)
+
+if __name__ == "__main__":
+    from src.cli import main
+
+    sys.exit(main(["compact"] + sys.argv[1:]))
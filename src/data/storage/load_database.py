@@ -0,0 +1,29 @@
+import os
+import sys
+
+# Add the project root directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+sys.path.append(project_root)
+
+from src.utils.db_loader import WeatherDatabaseLoader
+from src.utils.weather_loader import load_weather_data
+
+processed_file = os.path.join(project_root, "data", "processed", "weather_data_processed.csv")
+
+def load_processed_data_to_database(path: str = processed_file) -> int:
+    """Create the database tables if needed and upsert the processed CSV into them."""
+    loader = WeatherDatabaseLoader.from_config_files(
+        os.path.join(project_root, "config", "db_config.yaml"),
+        os.path.join(project_root, "config", "api_config.yaml")
+    )
+    try:
+        loader.create_tables()
+        return loader.load_dataframe(load_weather_data(path, columns=loader.input_columns))
+    finally:
+        loader.close()
+
+if __name__ == "__main__":
+    from src.cli import main
+    
+    sys.exit(main(["load", "--target", "database"] + sys.argv[1:]))
@@ -1,44 +1,95 @@
 import os
 import time
+import shutil
 from dotenv import load_dotenv
 from pathlib import Path
 import sys
 
-time.sleep(10)
-
 # Add the project root directory to Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
 sys.path.append(project_root)
 
-from src.utils.save_data import load_weather_data, save_weather_data_to_url
+from src.utils.save_data import save_weather_data_to_url
+from src.utils.weather_loader import load_weather_data
+from src.utils.s3_upload import COMPRESSION_EXTENSIONS, check_compression
 
 load_dotenv()
 BUCKET_NAME = os.getenv("BUCKET_NAME")
-date = time.strftime("%Y%m%d")
+STORAGE_FORMAT = os.getenv("STORAGE_FORMAT", "csv")
+UPLOAD_COMPRESSION = os.getenv("UPLOAD_COMPRESSION") or None
 path_raw_data = os.path.join(project_root, "data", "raw", "weather_data.csv")
 path = os.path.join(project_root, "data", "processed", "weather_data_processed.csv")
+parquet_dir = os.path.join(project_root, "data", "processed", "parquet")
 
-try:
-    # Load the data
-    data = load_weather_data(path)
-    
-    # Set up AWS credentials (without token)
-    aws_credentials = {
+def get_aws_credentials() -> dict:
+    """AWS credentials (without token) from the environment, as storage options"""
+    return {
         "key": os.getenv("AWS_ACCESS_KEY_ID"),
         "secret": os.getenv("AWS_SECRET_ACCESS_KEY")
     }
+
+def load_processed_data() -> None:
+    """
+    Upload the processed data to S3 and delete the local raw and processed files on success
     
-    # Save to S3
-    s3_path = f"s3://{BUCKET_NAME}/weather_data_{date}.csv"
-    save_weather_data_to_url(data, s3_path, aws_credentials)
-    print(f"Data saved successfully to {s3_path}")
+    CSV uploads are recorded in the bucket's manifest (see src/utils/manifest.py)
+    so they can be queried without reading every file.
+    """
+    date = time.strftime("%Y%m%d")
     
-    # Delete the local file after successful upload
-    if os.path.exists(path):
-        os.remove(path)
-        os.remove(path_raw_data)
-        print(f"Successfully deleted local files: {path} , {path_raw_data}")
+    # Set up AWS credentials (without token)
+    aws_credentials = get_aws_credentials()
+    
+    if STORAGE_FORMAT == "parquet":
+        from src.utils.parquet_store import read_processed_parquet, write_processed_parquet
+        
+        # Append the local partitioned dataset to the one on S3
+        data = read_processed_parquet(parquet_dir)
+        s3_path = f"s3://{BUCKET_NAME}/processed"
+        write_processed_parquet(data, s3_path, storage_options=aws_credentials)
+        print(f"Data saved successfully to {s3_path}")
+        
+        shutil.rmtree(parquet_dir)
+        # Either file may already be gone (e.g. after --workers --input runs or an earlier partial cleanup)
+        for local_file in (path, path_raw_data):
+            if os.path.exists(local_file):
+                os.remove(local_file)
+        print(f"Successfully deleted local files: {parquet_dir} , {path_raw_data}")
+    else:
+        # Fail on an unknown or uninstalled codec before loading anything
+        check_compression(UPLOAD_COMPRESSION)
+        
+        # Load the data
+        data = load_weather_data(path)
+        
+        # Save to S3
+        name = f"weather_data_{date}.csv{COMPRESSION_EXTENSIONS[UPLOAD_COMPRESSION]}"
+        s3_path = f"s3://{BUCKET_NAME}/{name}"
+        save_weather_data_to_url(data, s3_path, aws_credentials, compression=UPLOAD_COMPRESSION)
+        print(f"Data saved successfully to {s3_path}")
+        
+        # Index the upload; a failure here only delays queries until the next `weather-pipeline index`
+        try:
+            from src.utils.manifest import DataManifest
+            
+            manifest = DataManifest(f"s3://{BUCKET_NAME}", storage_options=aws_credentials)
+            manifest.add(name, data)
+            manifest.save()
+        except Exception as e:
+            print(f"Error updating the manifest of s3://{BUCKET_NAME}: {str(e)}")
+        
+        # Delete the local file after successful upload
+        if os.path.exists(path):
+            os.remove(path)
+            if os.path.exists(path_raw_data):
+                os.remove(path_raw_data)
+            print(f"Successfully deleted local files: {path} , {path_raw_data}")
 
-except Exception as e:
-    print(f"Error occurred: {str(e)}")
+if __name__ == "__main__":
+    # Give the transform stage time to flush its output when chained from cron
+    time.sleep(10)
+    
+    from src.cli import main
+    
+    sys.exit(main(["load"] + sys.argv[1:]))
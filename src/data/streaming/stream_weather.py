@@ -0,0 +1,114 @@
+import os
+import sys
+
+# Add the project root directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
+sys.path.append(project_root)
+
+from src.data.extraction.extract_weather import (
+    OpenWeatherMapClient,
+    _observation_index,
+    fetch_locations_batch,
+    filter_new_records,
+    location_groups
+)
+from src.utils.streaming import CsvSink, DatabaseSink, S3Sink, Spool, StreamPipeline
+
+from loguru import logger
+
+SINKS = ("csv", "database", "s3")
+processed_file = os.path.join(project_root, "data", "processed", "weather_data_processed.csv")
+
+def create_sink(name: str):
+    """Build the sink a streaming pipeline writes processed micro-batches to"""
+    if name == "csv":
+        return CsvSink(processed_file)
+    if name == "database":
+        from src.utils.db_loader import WeatherDatabaseLoader
+
+        return DatabaseSink(WeatherDatabaseLoader.from_config_files(
+            os.path.join(project_root, "config", "db_config.yaml"),
+            os.path.join(project_root, "config", "api_config.yaml")
+        ))
+    if name == "s3":
+        from src.data.storage.load_weather import BUCKET_NAME, UPLOAD_COMPRESSION, get_aws_credentials
+        from src.utils.manifest import DataManifest
+
+        if not BUCKET_NAME:
+            raise ValueError("The s3 sink needs BUCKET_NAME to be set")
+        return S3Sink(DataManifest(f"s3://{BUCKET_NAME}", storage_options=get_aws_credentials()),
+                      compression=UPLOAD_COMPRESSION)
+    raise ValueError(f"Unknown sink '{name}', expected one of {list(SINKS)}")
+
+def run_stream(sink: str = None, max_workers: int = None, spool: bool = True) -> None:
+    """
+    Run extract, transform and load as one streaming process.
+
+    Locations are fetched on the daemon schedule (see run_daemon). Each
+    fetched batch skips observations already extracted, is spooled to disk
+    for durability and flows through bounded in-memory queues into the
+    transform and then the sink (``stream.sink``: the processed CSV, the
+    database or S3), so rows are stored seconds after they are fetched
+    instead of at the daily transform and load. When the sink falls behind or
+    fails the queues fill up and extraction waits until it catches up.
+    Spooled batches the sink has not stored are replayed on the next start.
+    SIGINT/SIGTERM stop after the queued batches are written (or given up on,
+    if the sink is still failing).
+    """
+    import signal
+    from src.utils.metrics import export_metrics
+    from src.utils.scheduler import Scheduler
+
+    client = OpenWeatherMapClient()
+    stream_config = client.config.get("stream") or {}
+    jitter = client.config.get("daemon", {}).get("jitter", 0)
+    spool_dir = stream_config.get("spool_dir", "data/state/stream_spool")
+
+    pipeline = StreamPipeline(
+        create_sink(sink or stream_config.get("sink", "csv")),
+        spool=Spool(os.path.join(project_root, spool_dir)) if spool and spool_dir else None,
+        queue_size=stream_config.get("queue_size", 8),
+        max_batch_rows=stream_config.get("max_batch_rows", 5000),
+        flush_rows=stream_config.get("flush_rows", 1),
+        flush_interval=stream_config.get("flush_interval", 0),
+        max_retry_interval=stream_config.get("max_retry_interval", 60)
+    )
+    index = _observation_index(client)
+    groups = location_groups(client)
+
+    scheduler = Scheduler()
+    for interval, locations in sorted(groups.items()):
+        def extract_group(locations=locations):
+            batch = fetch_locations_batch(client, locations, max_workers=max_workers)
+            if index is not None:
+                batch = filter_new_records(batch, index)
+            # Spool before saving the index, so a crash in between refetches rather than loses rows
+            pipeline.submit(batch.columns)
+            if index is not None:
+                index.save()
+            logger.info(f"Queued {batch.rows} weather records")
+            export_metrics(client.config, command="stream", job="extract")
+        scheduler.add_job(f"extract every {interval}s", extract_group, interval, jitter=jitter)
+
+    def shutdown(signum, frame):
+        logger.info(f"Received signal {signum}, shutting down after the queued batches are written")
+        scheduler.stop()
+        pipeline.interrupt()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    pipeline.start()
+    logger.info(f"Streaming pipeline started with {len(groups)} location group(s)")
+    try:
+        scheduler.run()
+    finally:
+        pipeline.close()
+        client.close()
+        logger.info("Streaming pipeline stopped")
+
+if __name__ == "__main__":
+    from src.cli import main
+
+    sys.exit(main(["stream"] + sys.argv[1:]))
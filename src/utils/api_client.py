@@ -2,12 +2,38 @@ import os
 import yaml
 import requests
 import time
-from typing import Dict, Any, Optional, List
-from retry import retry
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Dict, Any, Optional, List, Tuple
+from retry.api import retry_call
 from loguru import logger
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException, Timeout, TooManyRedirects, HTTPError
 
+from src.utils.backfill import BackfillUnit
+from src.utils.metrics import REGISTRY
+from src.utils.rate_limiter import RateLimiter, parse_retry_after
+from src.utils.response_cache import ResponseCache, create_cache
+
+try:
+    # Optional, decodes responses about 2-3x faster than the standard library
+    import orjson
+except ImportError:
+    orjson = None
+
+API_REQUEST_SECONDS = REGISTRY.histogram(
+    "weather_api_request_seconds", "Latency of OpenWeatherMap HTTP requests", ["endpoint", "status"]
+)
+API_RETRIES = REGISTRY.counter(
+    "weather_api_retries_total", "OpenWeatherMap requests retried after a connection error or throttling", ["endpoint"]
+)
+API_CACHE_LOOKUPS = REGISTRY.counter(
+    "weather_api_cache_lookups_total", "Response cache lookups by result (hit or miss)", ["result"]
+)
+API_ERRORS = REGISTRY.counter(
+    "weather_api_errors_total", "Failed OpenWeatherMap requests by error type", ["error"]
+)
+
 class WeatherAPIError(Exception):
     """Base exception for weather API errors."""
     pass
@@ -16,10 +42,18 @@ class APIRateLimitError(WeatherAPIError):
     """Raised when API rate limit is exceeded."""
     pass
 
+class RequestBudgetExceededError(WeatherAPIError):
+    """Raised when the configured request budget does not allow another call."""
+    pass
+
 class APIConnectionError(WeatherAPIError):
     """Raised when connection to API fails."""
     pass
 
+class DeadlineExceededError(WeatherAPIError):
+    """Raised when a request cannot finish before its deadline."""
+    pass
+
 class APIResponseError(WeatherAPIError):
     """Raised when API returns an error response."""
     pass
@@ -29,13 +63,20 @@ class DataValidationError(WeatherAPIError):
     pass
 
 class OpenWeatherMapClient:
-    def __init__(self, config_path: str = "config/api_config.yaml"):
-        """Initialize the OpenWeatherMap API client with configuration."""
+    def __init__(self, config_path: str = "config/api_config.yaml", cache: Optional[ResponseCache] = None):
+        """
+        Initialize the OpenWeatherMap API client with configuration.
+        
+        Responses are cached by the given cache, or by the one described in the
+        ``cache`` section of the config when no cache is passed.
+        """
         # Load environment variables
         load_dotenv()
         
         self.config = self._load_config(config_path)
         self.base_url = self.config["openweathermap"]["base_url"]
+        # The History API is served from its own host, the same as base_url for local stand-ins
+        self.history_base_url = self.config["openweathermap"].get("history_base_url") or self.base_url
         
         # Get API key from environment
         self.api_key = os.getenv("OPENWEATHERMAP_API_KEY")
@@ -43,7 +84,36 @@ class OpenWeatherMapClient:
             raise ValueError("OPENWEATHERMAP_API_KEY environment variable is not set")
         
         # Load locations from config
-        self.locations = self.config["locations"]
+        self.locations = self.config.get("locations") or self.config.get("default_locations", [])
+        
+        # Shared request budget and a pooled keep-alive session
+        self.rate_limiter = RateLimiter.from_config(self.config)
+        self.max_budget_wait = self.config.get("collection", {}).get("max_budget_wait", 60)
+        self.session = self._create_session()
+        # Decode with orjson when installed, unless request.fast_json is false
+        use_orjson = orjson is not None and self.config.get("request", {}).get("fast_json", True)
+        self._json_loads = orjson.loads if use_orjson else None
+        self.cache = cache if cache is not None else create_cache(self.config)
+        
+    def _create_session(self) -> requests.Session:
+        """Create a keep-alive session with a connection pool sized for concurrent extraction."""
+        pool_size = self.config.get("collection", {}).get("max_concurrency", 8)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self) -> None:
+        """Close pooled connections and save the request budget used."""
+        self.session.close()
+        self.rate_limiter.close()
+
+    def __enter__(self) -> "OpenWeatherMapClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
         
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         """Load configuration from YAML file."""
@@ -67,44 +137,277 @@ class OpenWeatherMapClient:
         if not all(field in data for field in required_fields):
             raise DataValidationError("Response data missing required fields")
 
+    def _validate_history_data(self, data: Dict[str, Any]) -> None:
+        """Validate a History API response."""
+        if not isinstance(data.get("list"), list):
+            raise DataValidationError("History response is missing the list of observations")
+        for item in data["list"]:
+            if not all(field in item for field in ("dt", "main", "weather")):
+                raise DataValidationError("History observation missing required fields")
+
     def get_locations(self) -> List[Dict[str, Any]]:
         """Get list of configured locations."""
         return self.locations
 
-    @retry(exceptions=(APIConnectionError, Timeout), tries=3, delay=5, backoff=2, logger=logger)
-    def get_latest_weather(self, lat: float, lng: float) -> Dict[str, Any]:
+    def get_weather_for_locations(
+        self,
+        locations: Optional[List[Dict[str, Any]]] = None,
+        max_workers: Optional[int] = None,
+        deadline: Optional[float] = None
+    ) -> Tuple[List[Tuple[Dict[str, Any], Dict[str, Any]]], List[Tuple[Dict[str, Any], Exception]]]:
+        """
+        Fetch the latest weather for several locations concurrently.
+        
+        Requests run on a bounded thread pool so one slow or failing location
+        does not hold up the others. Every request is given at most the time
+        left before the deadline, and is not retried past it, so no request
+        outlives the batch; locations still pending when the deadline expires
+        are reported as failures.
+        
+        Args:
+            locations (List[Dict[str, Any]], optional): Locations to fetch, defaults to all configured locations
+            max_workers (int, optional): Maximum concurrent requests, defaults to collection.max_concurrency
+            deadline (float, optional): Seconds to wait for the whole batch, defaults to collection.extraction_deadline
+            
+        Returns:
+            Tuple of (successes, failures) where successes is a list of (location, response)
+            and failures is a list of (location, exception), both in configured order
+        """
+        if locations is None:
+            locations = self.get_locations()
+        
+        collection = self.config.get("collection", {})
+        if max_workers is None:
+            max_workers = collection.get("max_concurrency", 8)
+        if deadline is None:
+            deadline = collection.get("extraction_deadline")
+        
+        successes = []
+        failures = []
+        if not locations:
+            return successes, failures
+        
+        expires_at = None if deadline is None else time.monotonic() + deadline
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(locations))))
+        try:
+            futures = [
+                executor.submit(self.get_latest_weather, location["lat"], location["lon"], expires_at)
+                for location in locations
+            ]
+            wait(futures, timeout=deadline)
+            
+            for location, future in zip(locations, futures):
+                if not future.done():
+                    future.cancel()
+                    logger.error(f"Timed out fetching weather for {location['name']}")
+                    failures.append((location, DeadlineExceededError("Extraction deadline exceeded")))
+                elif future.exception() is not None:
+                    logger.error(f"Failed to fetch weather for {location['name']}: {future.exception()}")
+                    failures.append((location, future.exception()))
+                else:
+                    successes.append((location, future.result()))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        logger.info(f"Fetched weather for {len(successes)}/{len(locations)} locations")
+        if self.cache is not None:
+            logger.info(f"Response cache stats: {self.cache.stats()}")
+        return successes, failures
+
+    def get_latest_weather(self, lat: float, lng: float, expires_at: Optional[float] = None) -> Dict[str, Any]:
         """
         Get latest weather data for a specific latitude and longitude.
         
+        Connection errors, timeouts and throttling are retried up to 3 times
+        with exponential backoff (5s, then 10s).
+        
         Args:
             lat (float): Latitude
             lng (float): Longitude
+            expires_at (float, optional): time.monotonic() instant the request and its retries must finish by
             
         Returns:
             Dict[str, Any]: Complete weather data response
             
         Raises:
             APIConnectionError: When connection to API fails
+            APIRateLimitError: When the API throttles the request
+            RequestBudgetExceededError: When the configured request budget is spent
+            DeadlineExceededError: When ``expires_at`` passes before a response arrives
             APIResponseError: When API returns an error response
             DataValidationError: When data validation fails
         """
         self._validate_coordinates(lat, lng)
         
         endpoint = self.config["openweathermap"]["endpoints"]["current_weather"]
-        url = f"{self.base_url}{endpoint}"
         
-        params = {
-            "lat": lat,
-            "lon": lng,
-            "appid": self.api_key
-        }
+        # Current conditions only refresh every few minutes, serve repeats from cache
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(endpoint, lat, lng)
+            cached = self.cache.get(cache_key)
+            API_CACHE_LOOKUPS.inc(result="hit" if cached is not None else "miss")
+            if cached is not None:
+                logger.debug(f"Cache hit for {cache_key}")
+                return cached
+        
+        result = self._request_with_retries(endpoint, {"lat": lat, "lon": lng}, expires_at=expires_at)
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        return result
+
+    def get_weather_history(self, lat: float, lng: float, start: int, end: int) -> Dict[str, Any]:
+        """
+        Get hourly historical observations between two unix times from the History API.
+        
+        The API returns at most one week per call. Retries and errors are the
+        same as for get_latest_weather; responses are not cached.
+        
+        Args:
+            lat (float): Latitude
+            lng (float): Longitude
+            start (int): First unix time to include
+            end (int): Last unix time to include
+            
+        Returns:
+            Dict[str, Any]: Response whose ``data["list"]`` holds the hourly observations
+        """
+        self._validate_coordinates(lat, lng)
+        
+        endpoint = self.config["openweathermap"]["endpoints"].get("history", "/history/city")
+        params = {"lat": lat, "lon": lng, "type": "hour", "start": int(start), "end": int(end)}
+        return self._request_with_retries(endpoint, params, base_url=self.history_base_url,
+                                          validate=self._validate_history_data)
+
+    def backfill(
+        self,
+        units: List[BackfillUnit],
+        on_unit: Callable[[BackfillUnit, List[Dict[str, Any]]], None],
+        max_workers: Optional[int] = None
+    ) -> List[Tuple[BackfillUnit, Exception]]:
+        """
+        Fetch the history of several work units concurrently.
+        
+        Requests run on a bounded thread pool and draw from the same request
+        budget as live extraction. ``on_unit`` is called in the calling thread
+        with each unit and its observations (those with ``start <= dt < end``) as
+        soon as it completes, so it can save and checkpoint without locking.
+        When the request budget runs out the remaining units are not attempted.
+        
+        Returns:
+            List of (unit, exception) for the units that failed or were not attempted
+        """
+        if max_workers is None:
+            max_workers = self.config.get("collection", {}).get("max_concurrency", 8)
         
+        failures = []
+        if not units:
+            return failures
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(units))))
+        try:
+            futures = {
+                executor.submit(self.get_weather_history, unit.location["lat"], unit.location["lon"],
+                                unit.start, unit.end): unit
+                for unit in units
+            }
+            for future in as_completed(futures):
+                unit = futures[future]
+                if future.cancelled():
+                    continue
+                error = future.exception()
+                if error is not None:
+                    logger.error(f"Failed to backfill {unit.key}: {error}")
+                    failures.append((unit, error))
+                    if isinstance(error, RequestBudgetExceededError):
+                        for pending in futures:
+                            pending.cancel()
+                    continue
+                items = [item for item in future.result()["data"]["list"] if unit.start <= item["dt"] < unit.end]
+                on_unit(unit, items)
+            failures.extend((unit, RequestBudgetExceededError("Not attempted, request budget exhausted"))
+                            for future, unit in futures.items() if future.cancelled())
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        logger.info(f"Backfilled {len(units) - len(failures)}/{len(units)} work units")
+        return failures
+
+    def _request_with_retries(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        expires_at: Optional[float] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Call _request, retrying connection errors, timeouts and throttling up to
+        3 times with exponential backoff (5s, then 10s). With ``expires_at`` no
+        retry is attempted when its backoff would end past the deadline.
+        """
+        attempts = 0
+        
+        def attempt() -> Dict[str, Any]:
+            nonlocal attempts
+            attempts += 1
+            if attempts > 1:
+                API_RETRIES.inc(endpoint=endpoint)
+            try:
+                return self._request(endpoint, params, expires_at=expires_at, **kwargs)
+            except (APIConnectionError, APIRateLimitError) as e:
+                API_ERRORS.inc(error=type(e).__name__)
+                if expires_at is not None and attempts < 3 and time.monotonic() + 5 * 2 ** (attempts - 1) >= expires_at:
+                    raise DeadlineExceededError(f"No time left to retry: {str(e)}") from e
+                raise
+            except WeatherAPIError as e:
+                API_ERRORS.inc(error=type(e).__name__)
+                raise
+        
+        return retry_call(attempt, exceptions=(APIConnectionError, APIRateLimitError, Timeout),
+                          tries=3, delay=5, backoff=2, logger=logger)
+
+    @staticmethod
+    def _time_left(expires_at: float) -> float:
+        """Seconds left until ``expires_at``, raising DeadlineExceededError once it has passed."""
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceededError("Extraction deadline exceeded")
+        return remaining
+
+    def _request(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        base_url: Optional[str] = None,
+        validate: Optional[Callable[[Dict[str, Any]], None]] = None,
+        expires_at: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Make one budgeted request to ``endpoint`` and wrap the payload checked by ``validate``.
+        With ``expires_at`` the budget wait and the HTTP timeout are capped by the time left.
+        """
+        url = f"{base_url or self.base_url}{endpoint}"
+        max_wait = self.max_budget_wait
+        if expires_at is not None:
+            remaining = self._time_left(expires_at)
+            max_wait = remaining if max_wait is None else min(max_wait, remaining)
+        if not self.rate_limiter.acquire(max_wait=max_wait):
+            raise RequestBudgetExceededError("Request budget exhausted, try again later")
+        timeout = self.config["request"]["timeout"]
+        if expires_at is not None:
+            timeout = min(timeout, self._time_left(expires_at))
+        
+        params = dict(params, appid=self.api_key)
+        
+        started = time.perf_counter()
+        status = "error"
         try:
-            response = requests.get(
+            response = self.session.get(
                 url,
                 params=params,
-                timeout=self.config["request"]["timeout"]
+                timeout=timeout
             )
+            status = str(response.status_code)
             
             # Handle different HTTP status codes
             if response.status_code == 401:
@@ -112,22 +415,23 @@ class OpenWeatherMapClient:
             elif response.status_code == 404:
                 raise APIResponseError("Resource not found")
             elif response.status_code == 429:
+                self.rate_limiter.record_throttle(parse_retry_after(response.headers.get("Retry-After")))
                 raise APIRateLimitError("API rate limit exceeded")
             
             response.raise_for_status()
+            self.rate_limiter.update_from_headers(response.headers)
+            self.rate_limiter.record_success()
             
-            data = response.json()
-            self._validate_response_data(data)
+            data = self._json_loads(response.content) if self._json_loads else response.json()
+            (validate or self._validate_response_data)(data)
             
             # Add timestamp and success message
-            result = {
+            return {
                 "message": "success",
                 "timestamp": time.time(),
                 "data": data
             }
             
-            return result
-            
         except Timeout:
             logger.error("Request timed out")
             raise APIConnectionError("Request timed out")
@@ -143,6 +447,8 @@ class OpenWeatherMapClient:
         except ValueError as e:
             logger.error(f"JSON decode error: {str(e)}")
             raise DataValidationError(f"Invalid JSON response: {str(e)}")
+        finally:
+            API_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status=status)
 
 if __name__ == "__main__":
     # Example usage
@@ -151,11 +457,15 @@ if __name__ == "__main__":
         # Get all configured locations
         locations = client.get_locations()
         
-        # Get weather for each location
-        for location in locations:
-            weather = client.get_latest_weather(location["lat"], location["lon"])
+        # Get weather for all locations concurrently
+        results, failed = client.get_weather_for_locations(locations)
+        for location, weather in results:
             print(f"\nWeather for {location['name']}:")
             print(weather)
+        for location, error in failed:
+            print(f"\nFailed to get weather for {location['name']}: {error}")
             
     except WeatherAPIError as e:
         logger.error(f"Weather API error: {str(e)}")
+    finally:
+        client.close()
@@ -0,0 +1,89 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Union
+
+from src.utils.checkpoint import read_checkpoint, write_checkpoint
+
+# The History API returns at most one week of hourly observations per call
+MAX_UNIT_HOURS = 7 * 24
+
+class BackfillUnit(NamedTuple):
+    """One History API call: a location and a [start, end) range of unix seconds."""
+    location: Dict[str, Any]
+    start: int
+    end: int
+
+    @property
+    def slot(self) -> str:
+        """The location and start of the unit; a rerun with a later ``end`` can extend the last unit of a slot."""
+        location = self.location
+        return f"{location['name']}|{location['lat']}:{location['lon']}|{self.start}"
+
+    @property
+    def key(self) -> str:
+        return f"{self.slot}-{self.end}"
+
+def _unix(value: Union[datetime, int, float]) -> int:
+    return int(value.timestamp()) if isinstance(value, datetime) else int(value)
+
+def plan_units(
+    locations: Iterable[Dict[str, Any]],
+    start: Union[datetime, int],
+    end: Union[datetime, int],
+    unit_hours: int = 24
+) -> List[BackfillUnit]:
+    """
+    Split [start, end) for every location into units of ``unit_hours`` hours.
+
+    Both ends are floored to whole hours, so a rerun within the same hour
+    (e.g. with the default ``end`` of now) plans the same units, and the
+    current, incomplete hour is left to live extraction. Units are ordered
+    oldest first across all locations, so an interrupted backfill leaves one
+    contiguous gap per location.
+    """
+    if not 1 <= unit_hours <= MAX_UNIT_HOURS:
+        raise ValueError(f"unit_hours must be between 1 and {MAX_UNIT_HOURS}")
+    start = _unix(start) // 3600 * 3600
+    end = _unix(end) // 3600 * 3600
+    step = unit_hours * 3600
+    locations = list(locations)
+    return [
+        BackfillUnit(location, unit_start, min(unit_start + step, end))
+        for unit_start in range(start, end, step)
+        for location in locations
+    ]
+
+class BackfillProgress:
+    """
+    Completed backfill units, persisted in a JSON checkpoint after every unit
+    so an interrupted backfill resumes where it stopped.
+
+    Only the furthest end completed per slot (location and unit start) is
+    kept, so a unit is done when a unit of its slot reaching at least as far
+    was, and a shorter last unit completed by an earlier run is simply
+    extended instead of leaving a stale entry behind.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.completed: Dict[str, int] = {}
+        for key in read_checkpoint(self.path).get("completed", []):
+            slot, _, end = key.rpartition("-")
+            self.completed[slot] = max(self.completed.get(slot, int(end)), int(end))
+
+    def pending(self, units: Iterable[BackfillUnit]) -> List[BackfillUnit]:
+        return [unit for unit in units if unit.slot not in self.completed or self.completed[unit.slot] < unit.end]
+
+    def mark_done(self, unit: BackfillUnit) -> None:
+        self.completed[unit.slot] = max(self.completed.get(unit.slot, 0), unit.end)
+        self._save()
+
+    def reset(self) -> None:
+        self.completed = {}
+        self._save()
+
+    def _save(self) -> None:
+        write_checkpoint(self.path, {
+            "completed": sorted(f"{slot}-{end}" for slot, end in self.completed.items()),
+            "updated_at": datetime.now().isoformat()
+        })
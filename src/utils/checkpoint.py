@@ -0,0 +1,28 @@
+import os
+import json
+from pathlib import Path
+from typing import Dict, Any, Union
+from loguru import logger
+
+def read_checkpoint(path: Union[str, Path]) -> Dict[str, Any]:
+    """Load a JSON checkpoint, returning an empty state if it is missing or unreadable."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (ValueError, OSError) as e:
+        logger.warning(f"Ignoring unreadable checkpoint {path}: {str(e)}")
+        return {}
+
+def write_checkpoint(path: Union[str, Path], state: Dict[str, Any]) -> None:
+    """Atomically replace a JSON checkpoint so a crash never leaves it half written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,136 @@
+import calendar
+import re
+import pandas as pd
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from loguru import logger
+
+from src.utils.manifest import DataManifest
+from src.utils.metrics import REGISTRY
+from src.utils.s3_upload import COMPRESSION_EXTENSIONS, check_compression
+
+# Daily uploads (weather_data_YYYYMMDD.csv[.gz|.zst]), streamed micro-batches
+# (weather_data_YYYYMMDD_HHMMSS_NNNNNNNNN.csv[...]) and compacted months (weather_data_YYYYMM.csv[...])
+ARCHIVE_PATTERN = re.compile(r"^weather_data_(?P<date>\d{8}(_\d{6}(_\d{9})?)?|\d{6})\.csv(\.gz|\.zst)?$")
+
+# Observations are unique per coordinates and time, as in the transform's deduplication
+OBSERVATION_COLUMNS = ['latitude', 'longitude', 'timestamp']
+
+COMPACTED_FILES = REGISTRY.counter(
+    "compaction_files_total", "Archived files merged into monthly files or deleted by retention", labels=("action",)
+)
+
+class CompactionPlan(NamedTuple):
+    """Monthly files to write with the files merged into each, and files past retention."""
+    merges: Dict[str, List[str]]
+    expired: List[str]
+
+    @property
+    def empty(self) -> bool:
+        return not self.merges and not self.expired
+
+def _is_monthly(name: str) -> bool:
+    return len(ARCHIVE_PATTERN.match(name).group('date')) == 6
+
+def _last_day(name: str) -> date:
+    """Last day covered by an archive file, from the date in its name."""
+    text = ARCHIVE_PATTERN.match(name).group('date')
+    year, month = int(text[:4]), int(text[4:6])
+    if _is_monthly(name):
+        return date(year, month, calendar.monthrange(year, month)[1])
+    return date(year, month, int(text[6:8]))
+
+def monthly_name(month: str, compression: Optional[str] = "gzip") -> str:
+    """Name of the compacted file of ``month`` (YYYYMM)."""
+    return f"weather_data_{month}.csv{COMPRESSION_EXTENSIONS[compression]}"
+
+def plan_compaction(
+    names: Iterable[str],
+    today: date,
+    retention_days: Optional[int] = None,
+    compression: Optional[str] = "gzip"
+) -> CompactionPlan:
+    """
+    Plan compaction of the archive files among ``names``.
+
+    Files whose last day is more than ``retention_days`` before ``today``
+    expire. The daily files of every complete month (before the month of
+    ``today``) that did not expire are merged into that month's file,
+    together with monthly files already written for it, so a rerun only picks
+    up daily files added since. Other names are ignored.
+    """
+    names = sorted(name for name in names if ARCHIVE_PATTERN.match(name))
+    expired = []
+    if retention_days is not None:
+        cutoff = today - timedelta(days=retention_days)
+        expired = [name for name in names if _last_day(name) < cutoff]
+
+    current_month = today.strftime("%Y%m")
+    months: Dict[str, List[str]] = {}
+    for name in names:
+        if name in expired:
+            continue
+        month = ARCHIVE_PATTERN.match(name).group('date')[:6]
+        if month < current_month:
+            months.setdefault(month, []).append(name)
+
+    merges = {}
+    for month, sources in sorted(months.items()):
+        if all(_is_monthly(name) for name in sources):
+            continue
+        # Existing monthly files first, so their rows win over re-merged daily copies
+        sources.sort(key=lambda name: (not _is_monthly(name), name))
+        merges[monthly_name(month, compression)] = sources
+    return CompactionPlan(merges, expired)
+
+def merge_files(manifest: DataManifest, names: List[str]) -> pd.DataFrame:
+    """Concatenate stored files in order, keeping the first copy of each observation."""
+    df = pd.concat([manifest.read(name) for name in names], ignore_index=True)
+    df = df.drop_duplicates(subset=[column for column in OBSERVATION_COLUMNS if column in df.columns])
+    return df.sort_values('timestamp', kind='stable', ignore_index=True)
+
+def compact_archive(
+    manifest: DataManifest,
+    today: Optional[date] = None,
+    retention_days: Optional[int] = None,
+    compression: Optional[str] = "gzip",
+    dry_run: bool = False
+) -> CompactionPlan:
+    """
+    Merge the daily archive files of complete months into one compressed file
+    per month and delete files past retention (see plan_compaction).
+
+    Each monthly file is written in full before the manifest is switched from
+    its sources to it, and sources are deleted only after the manifest is
+    saved. An interrupted run therefore leaves every row readable, and a
+    rerun merges the leftovers again without duplicating observations. With
+    ``dry_run`` the plan is logged and returned without changing anything.
+    """
+    check_compression(compression)
+    plan = plan_compaction(manifest.list_files(), today or date.today(), retention_days, compression)
+    prefix = "[dry run] " if dry_run else ""
+    for name in plan.expired:
+        logger.info(f"{prefix}Deleting {manifest.root}/{name} (past {retention_days} days retention)")
+    for target, sources in plan.merges.items():
+        logger.info(f"{prefix}Merging {len(sources)} files into {manifest.root}/{target}")
+    if dry_run or plan.empty:
+        return plan
+
+    if plan.expired:
+        for name in plan.expired:
+            manifest.remove(name)
+        manifest.save()
+        manifest.delete(plan.expired)
+        COMPACTED_FILES.inc(len(plan.expired), action="expired")
+
+    for target, sources in plan.merges.items():
+        merged = merge_files(manifest, sources)
+        manifest.write(target, merged, compression=compression)
+        for name in sources:
+            manifest.remove(name)
+        manifest.add(target, merged)
+        manifest.save()
+        manifest.delete([name for name in sources if name != target])
+        COMPACTED_FILES.inc(len(sources), action="merged")
+        logger.info(f"Compacted {len(sources)} files ({len(merged)} rows) into {manifest.root}/{target}")
+    return plan
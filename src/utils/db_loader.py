@@ -0,0 +1,247 @@
+import io
+import queue
+import sqlite3
+import yaml
+import pandas as pd
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+from loguru import logger
+
+from src.utils.weather_loader import format_datetimes
+
+INTEGER_TYPES = ("INTEGER", "INT", "SMALLINT", "BIGINT")
+
+class SQLiteConnectionPool:
+    """
+    Minimal stand-in for ``psycopg2.pool.ThreadedConnectionPool`` backed by SQLite,
+    used to run the loader against a local file in development and tests.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, database: str):
+        self.database = database
+        self._idle = queue.LifoQueue(maxsize=maxconn)
+        for _ in range(minconn):
+            self._idle.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.database, check_same_thread=False)
+
+    def getconn(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def putconn(self, conn: sqlite3.Connection) -> None:
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def closeall(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+def create_connection_pool(db_config: Dict[str, Any]):
+    """
+    Build a connection pool from db_config.yaml.
+
+    Uses the ``sqlite`` section when present (local stand-in), otherwise a
+    psycopg2 ``ThreadedConnectionPool`` sized by ``postgresql.pool``.
+    """
+    if db_config.get("sqlite"):
+        pool_config = db_config["sqlite"].get("pool", {})
+        return SQLiteConnectionPool(
+            pool_config.get("min_connections", 1),
+            pool_config.get("max_connections", 10),
+            db_config["sqlite"]["path"]
+        )
+
+    from psycopg2.pool import ThreadedConnectionPool
+
+    pg = db_config["postgresql"]
+    pool_config = pg.get("pool", {})
+    return ThreadedConnectionPool(
+        pool_config.get("min_connections", 1),
+        pool_config.get("max_connections", 10),
+        host=pg["host"],
+        port=pg["port"],
+        dbname=pg["database"],
+        user=pg["user"],
+        password=pg["password"],
+        connect_timeout=pool_config.get("connection_timeout", 30)
+    )
+
+class WeatherDatabaseLoader:
+    """
+    Bulk loader for processed weather data into the tables defined in db_config.yaml.
+
+    Measurements are keyed by (location_id, timestamp) and upserted, so loading
+    the same rows twice is harmless. Location ids are assigned by the database
+    (identity column on PostgreSQL, rowid on SQLite), so concurrent loaders can
+    register the same location safely. On PostgreSQL each batch is streamed into a
+    temporary staging table with ``COPY FROM STDIN`` and merged with
+    ``INSERT ... ON CONFLICT``; on SQLite the same upsert runs via executemany.
+    """
+
+    def __init__(self, db_config: Dict[str, Any], batch_size: int = 100, pool=None):
+        self.db_config = db_config
+        self.batch_size = batch_size
+        self.dialect = "sqlite" if db_config.get("sqlite") else "postgresql"
+        self.pool = pool if pool is not None else create_connection_pool(db_config)
+
+        tables = db_config["tables"]
+        self.measurements = tables["weather_data"]
+        self.locations = tables["locations"]
+        self.source_columns = self.measurements.get("source_columns", {})
+
+    @classmethod
+    def from_config_files(cls, db_config_path: str = "config/db_config.yaml",
+                          api_config_path: str = "config/api_config.yaml") -> "WeatherDatabaseLoader":
+        """Create a loader using db_config.yaml and the batch size from api_config.yaml."""
+        with open(db_config_path, 'r') as f:
+            db_config = yaml.safe_load(f)
+        batch_size = 100
+        try:
+            with open(api_config_path, 'r') as f:
+                batch_size = yaml.safe_load(f).get("collection", {}).get("batch_size", batch_size)
+        except FileNotFoundError:
+            logger.warning(f"{api_config_path} not found, using batch size {batch_size}")
+        return cls(db_config, batch_size=batch_size)
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Borrow a pooled connection, committing on success and rolling back on error."""
+        conn = self.pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+
+    def close(self) -> None:
+        self.pool.closeall()
+
+    @property
+    def _placeholder(self) -> str:
+        return "?" if self.dialect == "sqlite" else "%s"
+
+    def _column_names(self, table: Dict[str, Any]) -> List[str]:
+        return [column["name"] for column in table["schema"]]
+
+    def _ddl(self, table: Dict[str, Any], constraint: str, generated: str = None) -> str:
+        columns = [f'"{column["name"]}" {column["type"]}' for column in table["schema"]]
+        if generated is not None:
+            columns = [f'{column} GENERATED BY DEFAULT AS IDENTITY' if column.startswith(f'"{generated}" ') else column
+                       for column in columns]
+        return f'CREATE TABLE IF NOT EXISTS {table["name"]} ({", ".join(columns + [constraint])})'
+
+    def create_tables(self) -> None:
+        """Create the locations and measurements tables if they do not exist."""
+        with self.connection() as conn:
+            cur = conn.cursor()
+            # An INTEGER primary key is the rowid on SQLite, which assigns it like the identity column
+            cur.execute(self._ddl(self.locations, 'PRIMARY KEY ("id"), UNIQUE ("name")',
+                                  generated="id" if self.dialect == "postgresql" else None))
+            cur.execute(self._ddl(self.measurements, 'UNIQUE ("location_id", "timestamp")'))
+
+    def _location_ids(self, df: pd.DataFrame) -> Dict[str, int]:
+        """Return ids for every location in ``df``, registering new ones."""
+        table = self.locations["name"]
+        p = self._placeholder
+        with self.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f'SELECT "name", "id" FROM {table}')
+            ids = {name: location_id for name, location_id in cur.fetchall()}
+
+            new_locations = [
+                (row.location_name, getattr(row, "country", None), float(row.latitude), float(row.longitude))
+                for row in df.drop_duplicates("location_name").itertuples(index=False)
+                if row.location_name not in ids
+            ]
+            if new_locations:
+                # The database assigns the ids; a location registered concurrently by another loader is skipped
+                cur.executemany(
+                    f'INSERT INTO {table} ("name", "country", "latitude", "longitude") VALUES ({p}, {p}, {p}, {p}) '
+                    f'ON CONFLICT ("name") DO NOTHING',
+                    new_locations
+                )
+                cur.execute(f'SELECT "name", "id" FROM {table}')
+                ids = {name: location_id for name, location_id in cur.fetchall()}
+        return ids
+
+    @property
+    def input_columns(self) -> List[str]:
+        """Processed columns read by load_dataframe, for loading only what is needed."""
+        columns = ["location_name", "country", "latitude", "longitude"]
+        for column in self.measurements["schema"]:
+            source = self.source_columns.get(column["name"], column["name"])
+            if column["name"] != "location_id" and source not in columns:
+                columns.append(source)
+        return columns
+
+    def _measurement_frame(self, df: pd.DataFrame, location_ids: Dict[str, int]) -> pd.DataFrame:
+        """Project processed rows onto the measurements schema."""
+        frame = pd.DataFrame(index=df.index)
+        for column in self.measurements["schema"]:
+            name = column["name"]
+            if name == "location_id":
+                frame[name] = df["location_name"].astype(str).map(location_ids)
+            else:
+                values = df[self.source_columns.get(name, name)]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    values = values.astype(object)
+                elif pd.api.types.is_datetime64_any_dtype(values):
+                    # Same ISO text as when the CSV was loaded untyped
+                    values = format_datetimes(values)
+                frame[name] = values
+            if column["type"].upper().startswith(INTEGER_TYPES):
+                frame[name] = pd.to_numeric(frame[name]).round().astype("Int64")
+        return frame
+
+    def _upsert_sql(self, source: str) -> str:
+        columns = self._column_names(self.measurements)
+        quoted = ", ".join(f'"{c}"' for c in columns)
+        updates = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in columns if c not in ("location_id", "timestamp"))
+        return (f'INSERT INTO {self.measurements["name"]} ({quoted}) {source} '
+                f'ON CONFLICT ("location_id", "timestamp") DO UPDATE SET {updates}')
+
+    def _copy_batch(self, cur, batch: pd.DataFrame) -> None:
+        table = self.measurements["name"]
+        columns = ", ".join(f'"{c}"' for c in batch.columns)
+        cur.execute(f'CREATE TEMP TABLE IF NOT EXISTS weather_staging (LIKE {table} INCLUDING DEFAULTS)')
+        cur.execute('TRUNCATE weather_staging')
+        buffer = io.StringIO()
+        batch.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cur.copy_expert(f'COPY weather_staging ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+        cur.execute(self._upsert_sql(
+            f'SELECT DISTINCT ON ("location_id", "timestamp") {columns} FROM weather_staging'
+        ))
+
+    def _insert_batch(self, cur, batch: pd.DataFrame) -> None:
+        placeholders = ", ".join(self._placeholder for _ in batch.columns)
+        rows = batch.astype(object).where(batch.notna(), None).itertuples(index=False, name=None)
+        # SQLite needs a WHERE clause to disambiguate the upsert from a join
+        cur.executemany(self._upsert_sql(f"SELECT {placeholders} WHERE true"), list(rows))
+
+    def load_dataframe(self, df: pd.DataFrame) -> int:
+        """Upsert processed rows in batches of ``batch_size``. Returns the number of rows loaded."""
+        if df.empty:
+            return 0
+        frame = self._measurement_frame(df, self._location_ids(df))
+        frame = frame.drop_duplicates(subset=["location_id", "timestamp"], keep="last")
+
+        for start in range(0, len(frame), self.batch_size):
+            batch = frame.iloc[start:start + self.batch_size]
+            with self.connection() as conn:
+                cur = conn.cursor()
+                if self.dialect == "postgresql":
+                    self._copy_batch(cur, batch)
+                else:
+                    self._insert_batch(cur, batch)
+        logger.info(f"Loaded {len(frame)} rows into {self.measurements['name']}")
+        return len(frame)
@@ -0,0 +1,173 @@
+import base64
+import hashlib
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+from loguru import logger
+
+from src.utils.checkpoint import read_checkpoint, write_checkpoint
+
+def observation_key(latitude: float, longitude: float, timestamp: str) -> str:
+    """Identify an observation by its location (rounded coordinates) and observation time."""
+    return f"{round(float(latitude), 4)}:{round(float(longitude), 4)}|{timestamp}"
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over a BLAKE2b digest."""
+
+    def __init__(self, num_bits: int = 1 << 24, num_hashes: int = 10, bits: Optional[bytearray] = None, count: int = 0):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray(num_bits // 8)
+        self.count = count
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "count": self.count,
+            "bits": base64.b64encode(zlib.compress(bytes(self.bits))).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "BloomFilter":
+        bits = bytearray(zlib.decompress(base64.b64decode(data["bits"])))
+        return cls(data["num_bits"], data["num_hashes"], bits, data["count"])
+
+class ObservationIndex:
+    """
+    Constant-memory index of observations already written, keyed by observation_key.
+
+    Observations newer than ``window_seconds`` before the newest one seen are
+    answered exactly from a bounded dict (at most ``max_recent`` keys). Keys
+    leaving that window are moved into two generations of fixed-size Bloom
+    filters, rotated every ``generation_capacity`` insertions, which answer for
+    older observations (these only show up when re-reading or backfilling
+    history). Memory therefore stays constant however long the pipeline runs;
+    the price is a tiny false-positive rate (about one in a million with the
+    defaults) for observations outside the window.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        window_seconds: float = 7 * 24 * 3600,
+        max_recent: int = 100_000,
+        bloom_bits: int = 1 << 24,
+        bloom_hashes: int = 10,
+        generation_capacity: int = 500_000
+    ):
+        self.path = Path(path) if path else None
+        self.window_seconds = window_seconds
+        self.max_recent = max_recent
+        self.bloom_bits = bloom_bits
+        self.bloom_hashes = bloom_hashes
+        self.generation_capacity = generation_capacity
+
+        self.recent: Dict[str, float] = {}
+        self.exact_since = float("-inf")
+        self.newest = float("-inf")
+        self.current = BloomFilter(bloom_bits, bloom_hashes)
+        self.previous = BloomFilter(bloom_bits, bloom_hashes)
+        if self.path is not None:
+            self._load()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, object], path: Optional[Union[str, Path]] = None) -> "ObservationIndex":
+        """Build an index from the ``dedup`` section of the API config."""
+        dedup = config.get("dedup") or {}
+        return cls(
+            path=path if path is not None else dedup.get("path"),
+            window_seconds=dedup.get("window_days", 7) * 24 * 3600,
+            max_recent=dedup.get("max_recent", 100_000)
+        )
+
+    def _load(self) -> None:
+        state = read_checkpoint(self.path)
+        if not state:
+            return
+        self.recent = state["recent"]
+        self.exact_since = state["exact_since"] if state["exact_since"] is not None else float("-inf")
+        self.newest = state["newest"] if state["newest"] is not None else float("-inf")
+        self.current = BloomFilter.from_dict(state["current"])
+        self.previous = BloomFilter.from_dict(state["previous"])
+
+    def save(self) -> None:
+        """Persist the index atomically (no-op for an in-memory index)."""
+        if self.path is None:
+            return
+        self._evict()
+        write_checkpoint(self.path, {
+            "recent": self.recent,
+            "exact_since": self.exact_since if self.exact_since != float("-inf") else None,
+            "newest": self.newest if self.newest != float("-inf") else None,
+            "current": self.current.to_dict(),
+            "previous": self.previous.to_dict()
+        })
+
+    def _to_bloom(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            if self.current.count >= self.generation_capacity:
+                self.previous = self.current
+                self.current = BloomFilter(self.bloom_bits, self.bloom_hashes)
+            self.current.add(key)
+
+    def _evict(self) -> None:
+        """Move exact entries that left the window, then the oldest ones beyond max_recent, to the Bloom filters."""
+        cutoff = self.newest - self.window_seconds
+        if cutoff > self.exact_since:
+            self._to_bloom(key for key, ts in self.recent.items() if ts < cutoff)
+            self.recent = {key: ts for key, ts in self.recent.items() if ts >= cutoff}
+            self.exact_since = cutoff
+        if len(self.recent) > self.max_recent:
+            by_age = sorted(self.recent.items(), key=lambda item: item[1])
+            drop = len(self.recent) - int(self.max_recent * 0.9)
+            self._to_bloom(key for key, _ in by_age[:drop])
+            self.exact_since = max(self.exact_since, by_age[drop - 1][1])
+            self.recent = dict(by_age[drop:])
+
+    def seen(self, key: str, timestamp: float) -> bool:
+        """Return True if the observation was already added."""
+        if key in self.recent:
+            return True
+        if timestamp > self.exact_since:
+            return False
+        return key in self.current or key in self.previous
+
+    def add(self, key: str, timestamp: float) -> None:
+        if timestamp <= self.exact_since:
+            # Too old for the exact window, record it straight in the Bloom filters
+            self._to_bloom([key])
+            return
+        self.recent[key] = timestamp
+        if timestamp > self.newest:
+            self.newest = timestamp
+        if len(self.recent) > self.max_recent:
+            self._evict()
+
+    def filter_new(self, keys: Iterable[str], timestamps: Iterable[float]) -> List[bool]:
+        """Add a batch of observations, returning True for each one not seen before (including earlier in the batch)."""
+        is_new = []
+        for key, timestamp in zip(keys, timestamps):
+            if self.seen(key, timestamp):
+                is_new.append(False)
+            else:
+                self.add(key, timestamp)
+                is_new.append(True)
+        skipped = is_new.count(False)
+        if skipped:
+            logger.debug(f"Skipping {skipped} duplicate observations")
+        return is_new
@@ -1,14 +1,61 @@
+import hashlib
+import io
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from pathlib import Path
 import os
 import sys
-from typing import Union, Optional
+import time
+from typing import Callable, Dict, Iterable, Iterator, Union, Optional
 
-def load_weather_data(file_path: Union[str, Path]) -> pd.DataFrame:
-    """Load weather data from CSV file"""
-    return pd.read_csv(file_path)
+from src.utils.checkpoint import read_checkpoint, write_checkpoint
+from src.utils.dedup_index import ObservationIndex
+from src.utils.derived_metrics import apply_derived_metrics, heat_index_fahrenheit, wind_chill_fahrenheit
+from src.utils.metrics import REGISTRY
+from src.utils.weather_loader import format_datetimes, iter_weather_data, load_weather_data, to_csv_frame
+from src.utils.unit_conversions import Conversion, apply_conversions
+from src.utils.weather_schema import PROCESSED_SCHEMA
+
+TRANSFORM_STEP_SECONDS = REGISTRY.histogram(
+    "transform_step_seconds", "Wall time of each transform step per batch", ["step"]
+)
+TRANSFORM_STEP_ROWS = REGISTRY.counter(
+    "transform_step_rows_total", "Rows handled by each transform step (rows/s = rows / seconds sum)", ["step"]
+)
+TRANSFORM_BYTES = REGISTRY.counter(
+    "transform_bytes_total", "Bytes of raw input read and processed output written", ["direction"]
+)
+TRANSFORM_DUPLICATES = REGISTRY.counter(
+    "transform_duplicates_dropped_total", "Duplicate observations dropped by the transform"
+)
+
+# Parser dtype overrides used by every transform path. Any chunk, shard or run may
+# miss values of an integer column, so they are always read as nullable Int64:
+# every path then writes them alike (as integers) without first scanning the input.
+TRANSFORM_DTYPES: Dict[str, str] = {
+    name: 'Int64' for name, logical_type in PROCESSED_SCHEMA if logical_type.startswith('int')
+}
+
+def _record_step(step: str, rows: int, started: float) -> None:
+    TRANSFORM_STEP_SECONDS.observe(time.perf_counter() - started, step=step)
+    TRANSFORM_STEP_ROWS.inc(rows, step=step)
+
+def _timed_chunks(reader: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Yield the chunks of a CSV reader, recording the time spent parsing each one."""
+    chunks = iter(reader)
+    while True:
+        started = time.perf_counter()
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        _record_step('read', len(chunk), started)
+        yield chunk
+
+def _write_csv(df: pd.DataFrame, output, **kwargs) -> None:
+    started = time.perf_counter()
+    to_csv_frame(df).to_csv(output, index=False, **kwargs)
+    _record_step('write', len(df), started)
 
 def kelvin_to_celsius(temp_in_kelvin):
     """Convert temperature from Kelvin to Celsius."""
@@ -40,65 +87,52 @@ def meters_to_kilometers(distance):
         return None
     return distance / 1000
 
-def fahrenheit_to_celsius(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+def fahrenheit_to_celsius(df: pd.DataFrame, columns: list, inplace: bool = False) -> pd.DataFrame:
     """Convert temperature from Fahrenheit to Celsius"""
-    df = df.copy()
-    for col in columns:
-        if col in df.columns:
-            df[f'{col}_celsius'] = (df[col] - 32) * 5/9
-    return df
+    if not inplace:
+        df = df.copy()
+    return apply_conversions(df, [Conversion(col, 'F', 'C', f'{col}_celsius', None) for col in columns])
 
-def convert_wind_speed(df: pd.DataFrame, from_unit: str = 'mph', to_unit: str = 'kmh') -> pd.DataFrame:
+def convert_wind_speed(df: pd.DataFrame, from_unit: str = 'mph', to_unit: str = 'kmh', inplace: bool = False) -> pd.DataFrame:
     """Convert wind speed between different units"""
-    df = df.copy()
-    if 'wind_speed' not in df.columns:
+    units = {'mph': 'mph', 'ms': 'm/s', 'kmh': 'km/h'}
+    if not inplace:
+        df = df.copy()
+    if (from_unit, to_unit) not in [('mph', 'kmh'), ('mph', 'ms'), ('ms', 'kmh')]:
         return df
-        
-    if from_unit == 'mph' and to_unit == 'kmh':
-        df['wind_speed_kmh'] = df['wind_speed'] * 1.60934
-    elif from_unit == 'mph' and to_unit == 'ms':
-        df['wind_speed_ms'] = df['wind_speed'] * 0.44704
-    elif from_unit == 'ms' and to_unit == 'kmh':
-        df['wind_speed_kmh'] = df['wind_speed'] * 3.6
-        
-    return df
+    return apply_conversions(df, [Conversion('wind_speed', units[from_unit], units[to_unit], f'wind_speed_{to_unit}', None)])
 
-def convert_pressure(df: pd.DataFrame, from_unit: str = 'mb', to_unit: str = 'hpa') -> pd.DataFrame:
+def convert_pressure(df: pd.DataFrame, from_unit: str = 'mb', to_unit: str = 'hpa', inplace: bool = False) -> pd.DataFrame:
     """Convert pressure between different units"""
-    df = df.copy()
-    if 'pressure' not in df.columns:
+    units = {'mb': 'mb', 'hpa': 'hPa', 'atm': 'atm'}
+    if not inplace:
+        df = df.copy()
+    if (from_unit, to_unit) not in [('mb', 'hpa'), ('mb', 'atm')]:
         return df
-        
-    if from_unit == 'mb' and to_unit == 'hpa':
-        df['pressure_hpa'] = df['pressure']
-    elif from_unit == 'mb' and to_unit == 'atm':
-        df['pressure_atm'] = df['pressure'] / 1013.25
-        
-    return df
+    return apply_conversions(df, [Conversion('pressure', units[from_unit], units[to_unit], f'pressure_{to_unit}', None)])
 
-def convert_visibility(df: pd.DataFrame, from_unit: str = 'miles', to_unit: str = 'km') -> pd.DataFrame:
+def convert_visibility(df: pd.DataFrame, from_unit: str = 'miles', to_unit: str = 'km', inplace: bool = False) -> pd.DataFrame:
     """Convert visibility distance"""
-    df = df.copy()
-    if 'visibility' not in df.columns:
+    if not inplace:
+        df = df.copy()
+    if (from_unit, to_unit) != ('miles', 'km'):
         return df
-        
-    if from_unit == 'miles' and to_unit == 'km':
-        df['visibility_km'] = df['visibility'] * 1.60934
-        
-    return df
+    return apply_conversions(df, [Conversion('visibility', 'mi', 'km', 'visibility_km', None)])
 
-def process_timestamps(df: pd.DataFrame) -> pd.DataFrame:
+def process_timestamps(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
     """Process timestamp column to extract useful time components"""
-    df = df.copy()
+    if not inplace:
+        df = df.copy()
     if 'timestamp' not in df.columns:
         return df
     
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df['date'] = df['timestamp'].dt.date
-    df['hour'] = df['timestamp'].dt.hour
-    df['day_of_week'] = df['timestamp'].dt.day_name()
-    df['month'] = df['timestamp'].dt.month_name()
-    df['season'] = df['timestamp'].dt.month.map({
+    timestamps = pd.to_datetime(df['timestamp'])
+    df['timestamp'] = timestamps
+    df['date'] = timestamps.dt.date
+    df['hour'] = timestamps.dt.hour
+    df['day_of_week'] = timestamps.dt.day_name()
+    df['month'] = timestamps.dt.month_name()
+    df['season'] = timestamps.dt.month.map({
         12: 'Winter', 1: 'Winter', 2: 'Winter',
         3: 'Spring', 4: 'Spring', 5: 'Spring',
         6: 'Summer', 7: 'Summer', 8: 'Summer',
@@ -107,44 +141,189 @@ def process_timestamps(df: pd.DataFrame) -> pd.DataFrame:
     
     return df
 
-def calculate_heat_index(df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate heat index using temperature and humidity"""
-    df = df.copy()
+def calculate_heat_index(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Calculate heat index (°F) using temperature (°F) and humidity"""
+    if not inplace:
+        df = df.copy()
     if 'temperature' not in df.columns or 'humidity' not in df.columns:
         return df
     
-    mask = df['temperature'] >= 80
-    
-    c1, c2, c3 = -42.379, 2.04901523, 10.14333127
-    c4, c5, c6 = -0.22475541, -6.83783e-3, -5.481717e-2
-    c7, c8, c9 = 1.22874e-3, 8.5282e-4, -1.99e-6
-    
-    T = df.loc[mask, 'temperature']
-    RH = df.loc[mask, 'humidity']
-    
-    df.loc[mask, 'heat_index'] = (
-        c1 + c2*T + c3*RH + c4*T*RH + c5*T**2 + c6*RH**2 + 
-        c7*T**2*RH + c8*T*RH**2 + c9*T**2*RH**2
+    df['heat_index'] = heat_index_fahrenheit(
+        df['temperature'].to_numpy(dtype=np.float64, na_value=np.nan),
+        df['humidity'].to_numpy(dtype=np.float64, na_value=np.nan)
     )
-    
-    df.loc[~mask, 'heat_index'] = df.loc[~mask, 'temperature']
     return df
 
-def calculate_wind_chill(df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate wind chill temperature"""
-    df = df.copy()
+def calculate_wind_chill(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Calculate wind chill temperature (°F) using temperature (°F) and wind speed (mph)"""
+    if not inplace:
+        df = df.copy()
     if 'temperature' not in df.columns or 'wind_speed' not in df.columns:
         return df
     
-    mask = (df['temperature'] <= 50) & (df['wind_speed'] > 3)
-    T = df.loc[mask, 'temperature']
-    V = df.loc[mask, 'wind_speed']
-    
-    df.loc[mask, 'wind_chill'] = (
-        35.74 + 0.6215*T - 35.75*V**0.16 + 0.4275*T*V**0.16
+    df['wind_chill'] = wind_chill_fahrenheit(
+        df['temperature'].to_numpy(dtype=np.float64, na_value=np.nan),
+        df['wind_speed'].to_numpy(dtype=np.float64, na_value=np.nan)
     )
+    return df
+
+def observation_hashes(df: pd.DataFrame, timestamps: Optional[pd.Series] = None) -> np.ndarray:
+    """64-bit hash of every row's observation: coordinates rounded like observation_key, and timestamp."""
+    return pd.util.hash_pandas_object(pd.DataFrame({
+        'latitude': df['latitude'].round(4),
+        'longitude': df['longitude'].round(4),
+        'timestamp': pd.to_datetime(df['timestamp']) if timestamps is None else timestamps
+    }), index=False).to_numpy()
+
+def _group_by_day(days: np.ndarray) -> Iterator[tuple]:
+    """Yield (day, row positions) for every distinct day in ``days``."""
+    order = np.argsort(days, kind='stable')
+    unique, starts = np.unique(days[order], return_index=True)
+    for day, rows in zip(unique.tolist(), np.split(order, starts[1:])):
+        yield day, rows
+
+class SeenObservations:
+    """
+    Bounded set of observation hashes, for deduplicating the chunks of one run
+    without a persistent index. Works like ObservationIndex, vectorized:
+    observations from the ``window_days`` days up to the newest one seen are
+    answered exactly from one sorted uint64 array per day. Older days, and the
+    oldest ones once more than ``max_recent`` hashes are held, are folded into a
+    fixed-size Bloom filter that answers for rows arriving out of order (e.g.
+    backfilled history), at a tiny false-positive rate. Memory stays bounded
+    by ``max_recent`` hashes plus the filter, however large the input.
+    """
+
+    def __init__(
+        self,
+        window_days: int = 7,
+        max_recent: int = 2_000_000,
+        bloom_bits: int = 1 << 27,
+        bloom_hashes: int = 7
+    ):
+        self.window_days = window_days
+        self.max_recent = max_recent
+        self.bloom_bits = bloom_bits
+        self.bloom_hashes = bloom_hashes
+        
+        self.days: Dict[int, np.ndarray] = {}
+        self.size = 0
+        self.exact_since: Optional[int] = None
+        self.newest: Optional[int] = None
+        self.bits = np.zeros(bloom_bits // 8, dtype=np.uint8)
+
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        i = np.arange(self.bloom_hashes, dtype=np.uint64)
+        return (h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.bloom_bits)
+
+    def _bloom_add(self, hashes: np.ndarray) -> None:
+        positions = self._positions(hashes).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), (1 << (positions & np.uint64(7))).astype(np.uint8))
+
+    def _bloom_contains(self, hashes: np.ndarray) -> np.ndarray:
+        positions = self._positions(hashes)
+        return ((self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1).all(axis=1)
+
+    def _is_old(self, days: np.ndarray) -> np.ndarray:
+        if self.exact_since is None:
+            return np.zeros(len(days), dtype=bool)
+        return days < self.exact_since
+
+    def contains(self, hashes: np.ndarray, days: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(hashes), dtype=bool)
+        old = self._is_old(days)
+        if old.any():
+            found[old] = self._bloom_contains(hashes[old])
+        recent = np.flatnonzero(~old)
+        for day, rows in _group_by_day(days[recent]):
+            stored = self.days.get(day)
+            if stored is None:
+                continue
+            rows = recent[rows]
+            positions = np.minimum(np.searchsorted(stored, hashes[rows]), len(stored) - 1)
+            found[rows] = stored[positions] == hashes[rows]
+        return found
+
+    def add(self, hashes: np.ndarray, days: np.ndarray) -> None:
+        if not len(hashes):
+            return
+        old = self._is_old(days)
+        if old.any():
+            # Too old for the exact window, record them straight in the Bloom filter
+            self._bloom_add(hashes[old])
+        recent = np.flatnonzero(~old)
+        for day, rows in _group_by_day(days[recent]):
+            stored = self.days.get(day, np.empty(0, dtype=np.uint64))
+            merged = np.union1d(stored, hashes[recent[rows]])
+            self.size += len(merged) - len(stored)
+            self.days[day] = merged
+        newest = int(days.max())
+        self.newest = newest if self.newest is None else max(self.newest, newest)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Fold days that left the window, then the oldest ones beyond max_recent, into the Bloom filter."""
+        for day in sorted(self.days):
+            if day > self.newest - self.window_days and self.size <= self.max_recent:
+                break
+            stored = self.days.pop(day)
+            self._bloom_add(stored)
+            self.size -= len(stored)
+            self.exact_since = day + 1 if self.exact_since is None else max(self.exact_since, day + 1)
+
+def drop_duplicate_observations(
+    df: pd.DataFrame,
+    index: Optional[ObservationIndex] = None,
+    seen: Optional[SeenObservations] = None
+) -> pd.DataFrame:
+    """
+    Drop rows whose (location, timestamp) observation was already seen: earlier
+    in this frame, in previous frames recorded by ``seen``, or by the
+    persistent ``index``. Keeps the first occurrence. Duplicates within the
+    frame and against ``seen`` are found vectorized; only the remaining rows
+    are looked up in ``index``.
+    """
+    if df.empty or not {'latitude', 'longitude', 'timestamp'} <= set(df.columns):
+        return df
+    started = time.perf_counter()
+    
+    timestamps = pd.to_datetime(df['timestamp'])
+    hashes = observation_hashes(df, timestamps)
+    is_new = ~pd.Series(hashes).duplicated().to_numpy()
+    if seen is not None:
+        days = timestamps.to_numpy().astype('datetime64[D]').astype('int64')
+        is_new &= ~seen.contains(hashes, days)
+        seen.add(hashes[is_new], days[is_new])
+    if index is not None and is_new.any():
+        new = df.loc[is_new]
+        # Same format as dedup_index.observation_key, built column-wise
+        keys = (new['latitude'].round(4).astype(str) + ':' + new['longitude'].round(4).astype(str)
+                + '|' + format_datetimes(new['timestamp']))
+        timestamps = pd.to_datetime(new['timestamp']).to_numpy().astype('datetime64[s]').astype('int64')
+        is_new[is_new] = np.array(index.filter_new(keys.tolist(), timestamps.tolist()), dtype=bool)
+    _record_step('deduplicate', len(df), started)
+    if is_new.all():
+        return df
+    TRANSFORM_DUPLICATES.inc(int((~is_new).sum()))
+    return df.loc[is_new].copy()
+
+def transform_weather_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Apply the transform stage to a frame of raw rows in place.
+    Shared by the whole-file and chunked paths so both produce the same output.
+    """
+    # Convert temperature, wind speed, pressure and visibility in one vectorized pass
+    started = time.perf_counter()
+    apply_conversions(df)
+    _record_step('convert', len(df), started)
+    
+    # Heat index, wind chill, dew point and humidex from the raw temp/humidity/wind_speed arrays
+    started = time.perf_counter()
+    apply_derived_metrics(df)
+    _record_step('derive', len(df), started)
     
-    df.loc[~mask, 'wind_chill'] = df.loc[~mask, 'temperature']
     return df
 
 def process_weather_data(input_file: Union[str, Path], output_file: Optional[Union[str, Path]] = None) -> pd.DataFrame:
@@ -154,39 +333,244 @@ def process_weather_data(input_file: Union[str, Path], output_file: Optional[Uni
     """
     try:
         # Read the input CSV file
-        df = load_weather_data(input_file)
-        
-        # Convert temperature from Kelvin to Celsius
-        temp_columns = ['temp', 'feels_like', 'temp_min', 'temp_max']
-        for col in temp_columns:
-            if col in df.columns:
-                df[f'{col}_celsius'] = df[col].apply(kelvin_to_celsius).round(2)
-                df[f'{col}_fahrenheit'] = df[col].apply(kelvin_to_fahrenheit).round(2)
+        started = time.perf_counter()
+        df = load_weather_data(input_file, dtypes=TRANSFORM_DTYPES)
+        _record_step('read', len(df), started)
+        TRANSFORM_BYTES.inc(os.path.getsize(input_file), direction='in')
         
-        # Convert wind speed to km/h
-        if 'wind_speed' in df.columns:
-            df['wind_speed_kmh'] = df['wind_speed'].apply(meters_per_second_to_kilometers_per_hour).round(2)
+        df = drop_duplicate_observations(df)
+        transform_weather_frame(df)
         
-        # Convert pressure to inHg
-        pressure_columns = ['pressure', 'sea_level', 'ground_level']
-        for col in pressure_columns:
-            if col in df.columns:
-                df[f'{col}_inHg'] = df[col].apply(hectopascal_to_inches_mercury).round(2)
+        # Save processed data if output file is specified
+        if output_file:
+            output_dir = os.path.dirname(output_file)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            _write_csv(df, output_file)
+            TRANSFORM_BYTES.inc(os.path.getsize(output_file), direction='out')
         
-        # Convert visibility to kilometers
-        if 'visibility' in df.columns:
-            df['visibility_km'] = df['visibility'].apply(meters_to_kilometers).round(2)
+        return df
         
-        # Calculate additional metrics or add any derived fields here
+    except Exception as e:
+        print(f"Error processing weather data: {str(e)}")
+        raise
+
+def process_weather_data_chunked(
+    input_file: Union[str, Path],
+    output_file: Optional[Union[str, Path]],
+    chunksize: int = 100_000,
+    on_batch: Optional[Callable[[pd.DataFrame], None]] = None,
+    dtypes: Optional[Dict[str, str]] = None
+) -> int:
+    """
+    Process weather data in chunks of ``chunksize`` rows, writing output incrementally.
+    Peak memory is bounded by the chunk size; the output file is byte-identical
+    to the one written by process_weather_data. ``on_batch`` is called with every
+    processed chunk (e.g. to feed another storage backend). ``dtypes`` replaces
+    the parser dtype overrides (TRANSFORM_DTYPES). Returns the number of rows processed.
+    """
+    try:
+        if dtypes is None:
+            dtypes = TRANSFORM_DTYPES
         
-        # Save processed data if output file is specified
+        f = None
         if output_file:
             output_dir = os.path.dirname(output_file)
             if output_dir:
                 os.makedirs(output_dir, exist_ok=True)
-            df.to_csv(output_file, index=False)
+            f = open(output_file, 'w', newline='', encoding='utf-8')
         
-        return df
+        # One bounded set across chunks so duplicates are dropped as in the whole-file path
+        seen = SeenObservations()
+        
+        rows = 0
+        try:
+            for i, chunk in enumerate(_timed_chunks(iter_weather_data(input_file, chunksize, dtypes=dtypes))):
+                chunk = drop_duplicate_observations(chunk, seen=seen)
+                transform_weather_frame(chunk)
+                if f is not None:
+                    _write_csv(chunk, f, header=(i == 0))
+                if on_batch is not None:
+                    on_batch(chunk)
+                rows += len(chunk)
+        finally:
+            if f is not None:
+                f.close()
+        
+        TRANSFORM_BYTES.inc(os.path.getsize(input_file), direction='in')
+        if output_file:
+            TRANSFORM_BYTES.inc(os.path.getsize(output_file), direction='out')
+        return rows
+        
+    except Exception as e:
+        print(f"Error processing weather data: {str(e)}")
+        raise
+
+# Bytes at the start of the raw file hashed into the checkpoint, to tell a replaced file from a grown one
+FINGERPRINT_BYTES = 64 * 1024
+# Block size used to find the last complete line of the raw file
+_TAIL_BLOCK = 64 * 1024
+
+def _fingerprint(f, size: int) -> str:
+    """Hash of the first ``size`` bytes of a binary file."""
+    f.seek(0)
+    return hashlib.blake2b(f.read(size), digest_size=16).hexdigest()
+
+def _last_line_end(f, start: int, stop: int) -> int:
+    """Position just after the last newline in bytes [start, stop) of a binary file, or ``start`` if there is none."""
+    position = stop
+    while position > start:
+        block_start = max(start, position - _TAIL_BLOCK)
+        f.seek(block_start)
+        newline = f.read(position - block_start).rfind(b'\n')
+        if newline >= 0:
+            return block_start + newline + 1
+        position = block_start
+    return start
+
+class _RangeReader(io.RawIOBase):
+    """Reads ``prefix`` followed by bytes [start, stop) of a binary file, without loading them at once."""
+
+    def __init__(self, f, prefix: bytes, start: int, stop: int):
+        self._f = f
+        self._prefix = prefix
+        self._stop = stop
+        f.seek(start)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._prefix:
+            n = min(len(buffer), len(self._prefix))
+            buffer[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            return n
+        data = self._f.read(min(len(buffer), self._stop - self._f.tell()))
+        buffer[:len(data)] = data
+        return len(data)
+
+def process_weather_data_incremental(
+    input_file: Union[str, Path],
+    output_file: Union[str, Path],
+    checkpoint_file: Union[str, Path],
+    chunksize: int = 100_000,
+    on_batch: Optional[Callable[[pd.DataFrame], None]] = None,
+    dedup_index: Optional[Union[str, Path]] = None,
+    on_run: Optional[Callable[[int], None]] = None
+) -> int:
+    """
+    Process only the raw rows appended since the last run and append them to the output.
+    
+    The checkpoint records the byte offset reached in the raw file, the size of
+    the output after the last successful run and the latest timestamp seen per
+    location. A run interrupted before its checkpoint is written is rolled back
+    by truncating the output, so rows are never appended twice. When the raw
+    file is replaced (e.g. deleted after a successful upload) processing starts
+    over from its first row; a replacement is recognised by its inode, header
+    or a hash of its first FINGERPRINT_BYTES bytes, since a recreated file may
+    reuse the inode. New bytes are parsed ``chunksize`` rows at a time
+    straight from the file. ``on_batch`` is called with every processed chunk
+    after it has been appended. Runs are numbered in the checkpoint and
+    ``on_run`` is called with this run's number before the first batch; output
+    its sinks wrote under that number or a higher one belongs to runs that never
+    committed and must be discarded, as the processed CSV is rolled back.
+    Observations already processed by earlier runs are dropped using the
+    persistent ``dedup_index`` (in-memory for this run only when omitted).
+    Returns the number of rows processed.
+    """
+    try:
+        input_file = Path(input_file)
+        output_file = Path(output_file)
+        if not input_file.exists():
+            return 0
+        
+        state = read_checkpoint(checkpoint_file)
+        with open(input_file, 'rb') as raw:
+            stat = os.fstat(raw.fileno())
+            header = raw.readline()
+            offset = state.get("offset", 0)
+            fingerprint_size = state.get("fingerprint_size", 0)
+            fingerprint = _fingerprint(raw, fingerprint_size)
+            if (state.get("inode") != stat.st_ino or state.get("header") != header.decode('utf-8')
+                    or offset < len(header) or offset > stat.st_size
+                    or state.get("fingerprint", fingerprint) != fingerprint):
+                # New or rotated raw file, start over
+                state = {"locations": {}, "run": state.get("run", 0)}
+                offset = len(header)
+            
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            output_size = output_file.stat().st_size if output_file.exists() else 0
+            if "output_size" not in state:
+                # Record where this run starts, so a crash before its commit can be rolled back too
+                write_checkpoint(checkpoint_file, {
+                    "inode": stat.st_ino,
+                    "header": header.decode('utf-8'),
+                    "fingerprint": _fingerprint(raw, 0),
+                    "fingerprint_size": 0,
+                    "offset": offset,
+                    "output_size": output_size,
+                    "locations": {},
+                    "run": state.get("run", 0),
+                    "updated_at": datetime.now().isoformat()
+                })
+            elif output_size > state["output_size"]:
+                # Roll back rows appended by a run that never committed its checkpoint
+                with open(output_file, 'r+b') as f:
+                    f.truncate(state["output_size"])
+                output_size = state["output_size"]
+            run = state.get("run", 0) + 1
+            if on_run is not None:
+                on_run(run)
+            
+            rows = 0
+            written = False
+            watermarks = state.get("locations", {})
+            index = ObservationIndex(dedup_index) if dedup_index else None
+            seen = SeenObservations() if index is None else None
+            
+            # Only consume complete lines, a partial one may still be being written
+            end = _last_line_end(raw, offset, stat.st_size)
+            
+            if end > offset:
+                with open(output_file, 'a', newline='', encoding='utf-8') as f:
+                    reader = iter_weather_data(io.BufferedReader(_RangeReader(raw, header, offset, end)), chunksize,
+                                               dtypes=TRANSFORM_DTYPES)
+                    for chunk in _timed_chunks(reader):
+                        chunk = drop_duplicate_observations(chunk, index, seen)
+                        transform_weather_frame(chunk)
+                        _write_csv(chunk, f, header=(output_size == 0 and not written))
+                        written = True
+                        if on_batch is not None:
+                            on_batch(chunk)
+                        rows += len(chunk)
+                        if 'location_name' in chunk.columns and 'timestamp' in chunk.columns:
+                            latest = format_datetimes(chunk.groupby('location_name', observed=True)['timestamp'].max())
+                            for location, timestamp in latest.items():
+                                watermarks[location] = max(watermarks.get(location, ''), timestamp)
+                new_size = output_file.stat().st_size
+                TRANSFORM_BYTES.inc(end - offset, direction='in')
+                TRANSFORM_BYTES.inc(new_size - output_size, direction='out')
+                output_size = new_size
+            
+            fingerprint_size = min(end, FINGERPRINT_BYTES)
+            fingerprint = _fingerprint(raw, fingerprint_size)
+        
+        write_checkpoint(checkpoint_file, {
+            "inode": stat.st_ino,
+            "header": header.decode('utf-8'),
+            "fingerprint": fingerprint,
+            "fingerprint_size": fingerprint_size,
+            "offset": end,
+            "output_size": output_size,
+            "locations": watermarks,
+            "run": run,
+            "updated_at": datetime.now().isoformat()
+        })
+        # Saved after the checkpoint: a crash in between can let a duplicate through, never lose a row
+        if index is not None:
+            index.save()
+        return rows
         
     except Exception as e:
         print(f"Error processing weather data: {str(e)}")
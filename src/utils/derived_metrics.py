@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+# Apparent-temperature and moisture metrics derived from the raw ``temp`` (K),
+# ``humidity`` (%) and ``wind_speed`` (m/s) columns. Every kernel works on
+# float64 arrays in one vectorized pass and returns degrees Celsius (humidex is
+# unitless but on the same scale); NaN inputs propagate to NaN outputs.
+
+# Output columns added by apply_derived_metrics, in order
+DERIVED_COLUMNS: List[str] = [
+    'heat_index_celsius',
+    'wind_chill_celsius',
+    'dew_point_celsius',
+    'humidex',
+]
+
+# Rothfusz regression coefficients (NWS), in °F and %
+_HEAT_INDEX_COEFFICIENTS = (
+    -42.379, 2.04901523, 10.14333127,
+    -0.22475541, -6.83783e-3, -5.481717e-2,
+    1.22874e-3, 8.5282e-4, -1.99e-6,
+)
+
+# Magnus formula constants (Sonntag 1990), valid from -45 °C to 60 °C
+_MAGNUS_A = 17.62
+_MAGNUS_B = 243.12
+
+def heat_index_fahrenheit(temp_f: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    """Heat index in °F from air temperature in °F; equal to the temperature below 80 °F."""
+    c1, c2, c3, c4, c5, c6, c7, c8, c9 = _HEAT_INDEX_COEFFICIENTS
+    t2 = temp_f * temp_f
+    rh2 = humidity * humidity
+    index = (c1 + c2*temp_f + c3*humidity + c4*temp_f*humidity + c5*t2 + c6*rh2
+             + c7*t2*humidity + c8*temp_f*rh2 + c9*t2*rh2)
+    return np.where(temp_f >= 80, index, temp_f)
+
+def wind_chill_fahrenheit(temp_f: np.ndarray, wind_mph: np.ndarray) -> np.ndarray:
+    """Wind chill in °F; equal to the temperature above 50 °F or in winds of 3 mph or less."""
+    v16 = np.power(wind_mph, 0.16)
+    chill = 35.74 + 0.6215*temp_f - 35.75*v16 + 0.4275*temp_f*v16
+    return np.where((temp_f <= 50) & (wind_mph > 3), chill, temp_f)
+
+def dew_point_celsius(temp_c: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    """Dew point in °C (Magnus formula). Zero humidity has no dew point and yields NaN."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gamma = np.log(np.where(humidity > 0, humidity, np.nan) / 100) + _MAGNUS_A * temp_c / (_MAGNUS_B + temp_c)
+    return _MAGNUS_B * gamma / (_MAGNUS_A - gamma)
+
+def humidex(temp_c: np.ndarray, dew_point_c: np.ndarray) -> np.ndarray:
+    """Canadian humidex from air temperature and dew point in °C."""
+    vapour_pressure = 6.11 * np.exp(5417.7530 * (1/273.16 - 1/(273.15 + dew_point_c)))
+    return temp_c + 0.5555 * (vapour_pressure - 10)
+
+def _fahrenheit_to_celsius(values: np.ndarray) -> np.ndarray:
+    return (values - 32) * 5/9
+
+def derived_metrics(temp_k: np.ndarray, humidity: np.ndarray, wind_speed_ms: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Compute every derived metric from raw temperature (K), relative humidity (%)
+    and wind speed (m/s). Shared intermediates (°C, °F, mph) are computed once.
+    """
+    temp_c = temp_k - 273.15
+    temp_f = temp_c * (9/5) + 32
+    wind_mph = wind_speed_ms * 2.2369362920544
+    dew_point = dew_point_celsius(temp_c, humidity)
+    return {
+        'heat_index_celsius': _fahrenheit_to_celsius(heat_index_fahrenheit(temp_f, humidity)),
+        'wind_chill_celsius': _fahrenheit_to_celsius(wind_chill_fahrenheit(temp_f, wind_mph)),
+        'dew_point_celsius': dew_point,
+        'humidex': humidex(temp_c, dew_point),
+    }
+
+def apply_derived_metrics(df: pd.DataFrame, decimals: Optional[int] = 2) -> pd.DataFrame:
+    """
+    Add the DERIVED_COLUMNS to ``df`` in place and return it for chaining.
+    Frames without the ``temp``/``humidity``/``wind_speed`` columns are left unchanged.
+    """
+    if not {'temp', 'humidity', 'wind_speed'} <= set(df.columns):
+        return df
+    metrics = derived_metrics(
+        df['temp'].to_numpy(dtype=np.float64, na_value=np.nan),
+        df['humidity'].to_numpy(dtype=np.float64, na_value=np.nan),
+        df['wind_speed'].to_numpy(dtype=np.float64, na_value=np.nan)
+    )
+    for column in DERIVED_COLUMNS:
+        values = metrics[column]
+        df[column] = np.round(values, decimals) if decimals is not None else values
+    return df
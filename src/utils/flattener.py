@@ -0,0 +1,113 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+from src.utils.raw_schema import RAW_FIELDS, RawField
+
+# Errors raised by a payload that does not match the spec (missing key, empty list, null object)
+MALFORMED_ERRORS = (KeyError, IndexError, TypeError)
+
+@lru_cache(maxsize=65536)
+def unix_time_to_iso(value: int) -> str:
+    """Unix seconds to naive local ISO-8601, cached since sunrise/sunset repeat across records."""
+    return datetime.fromtimestamp(value).isoformat()
+
+# Logical type -> converter applied to the JSON value
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    'datetime': unix_time_to_iso,
+}
+
+class FlattenedBatch(NamedTuple):
+    """Columnar result of a batch: one list per column, and (position, error) of skipped payloads."""
+    columns: Dict[str, List[Any]]
+    errors: List[Tuple[int, Exception]]
+
+    @property
+    def rows(self) -> int:
+        return len(next(iter(self.columns.values()), []))
+
+def _access(path: Tuple, required: bool) -> str:
+    """Source for reading ``path`` from ``d``; optional paths return None when a key is missing."""
+    if required:
+        return "d" + "".join(f"[{step!r}]" for step in path)
+    if any(isinstance(step, int) for step in path):
+        raise ValueError(f"Optional path {path} cannot index into a list")
+    expression = "d"
+    for step in path[:-1]:
+        expression = f"{expression}.get({step!r}, _EMPTY)"
+    return f"{expression}.get({path[-1]!r})"
+
+class CompiledFlattener:
+    """
+    Flattens JSON payloads into raw columns with code generated from a field spec.
+
+    The spec (``RAW_FIELDS`` by default) is compiled once into a Python
+    function with one direct lookup per column, so a batch is flattened in a
+    single pass without interpreting paths per record. ``constants`` are
+    columns supplied by the caller instead of the payload (e.g. the location
+    of History API observations) and ``omit`` columns are always empty.
+    """
+
+    def __init__(self, fields: Sequence[RawField] = RAW_FIELDS, constants: Sequence[str] = (),
+                 omit: Sequence[str] = ()):
+        self.fields = list(fields)
+        self.columns = [field.name for field in self.fields]
+        self.constants = list(constants)
+        unknown = set(self.constants) | set(omit)
+        unknown -= set(self.columns)
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+
+        namespace = {"_EMPTY": {}}
+        values = []
+        for i, field in enumerate(self.fields):
+            if field.name in self.constants:
+                values.append(f"c_{field.name}")
+            elif field.name in omit:
+                values.append("None")
+            else:
+                expression = _access(field.path, field.required)
+                converter = CONVERTERS.get(field.logical_type)
+                if converter is not None:
+                    namespace[f"_convert_{i}"] = converter
+                    expression = (f"_convert_{i}({expression})" if field.required
+                                  else f"(None if (v := {expression}) is None else _convert_{i}(v))")
+                values.append(expression)
+
+        arguments = "".join(f", c_{name}" for name in self.constants)
+        appends = "".join(f", a_{i}" for i in range(len(values)))
+        source = "\n".join([
+            f"def flatten_row(d{arguments}):",
+            f"    return ({', '.join(values)},)",
+            "",
+            f"def flatten_batch(payloads, errors{arguments}{appends}):",
+            "    for i, d in enumerate(payloads):",
+            "        try:",
+            f"            row = ({', '.join(values)},)",
+            "        except _MALFORMED as e:",
+            "            errors.append((i, e))",
+            "            continue",
+            *[f"        a_{i}(row[{i}])" for i in range(len(values))],
+        ])
+        namespace["_MALFORMED"] = MALFORMED_ERRORS
+        exec(compile(source, f"<flattener {id(self):x}>", "exec"), namespace)
+        self._flatten_row = namespace["flatten_row"]
+        self._flatten_batch = namespace["flatten_batch"]
+
+    def _constant_values(self, constants: Dict[str, Any]) -> List[Any]:
+        missing = set(self.constants) - set(constants)
+        if missing:
+            raise ValueError(f"Missing constant columns: {', '.join(sorted(missing))}")
+        return [constants[name] for name in self.constants]
+
+    def flatten(self, payload: Dict[str, Any], **constants: Any) -> Dict[str, Any]:
+        """Flatten one payload into a {column: value} row; raises KeyError/IndexError/TypeError if malformed."""
+        return dict(zip(self.columns, self._flatten_row(payload, *self._constant_values(constants))))
+
+    def flatten_batch(self, payloads: Iterable[Dict[str, Any]], **constants: Any) -> FlattenedBatch:
+        """Flatten payloads into columnar lists in one pass, skipping (and reporting) malformed ones."""
+        columns = {name: [] for name in self.columns}
+        errors = []
+        self._flatten_batch(payloads, errors, *self._constant_values(constants),
+                            *(columns[name].append for name in self.columns))
+        return FlattenedBatch(columns, errors)
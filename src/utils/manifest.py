@@ -0,0 +1,278 @@
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from loguru import logger
+
+from src.utils.checkpoint import read_checkpoint, write_checkpoint
+from src.utils.metrics import REGISTRY
+from src.utils.s3_upload import (
+    COMPRESSION_EXTENSIONS, CONTENT_TYPES, compress_stream, create_s3_client, iter_csv_chunks, multipart_upload
+)
+from src.utils.weather_loader import load_weather_data
+from src.utils.weather_schema import DATE_FORMAT, PROCESSED_COLUMNS
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+QUERY_FILES = REGISTRY.counter(
+    "query_files_total", "Stored files considered by manifest queries", labels=("outcome",)
+)
+QUERY_ROWS = REGISTRY.counter("query_rows_total", "Rows returned by manifest queries")
+
+def file_format(name: str) -> Optional[Tuple[str, Optional[str]]]:
+    """(format, compression) of a stored data file from its name, or None if it is not one."""
+    if name.endswith(".parquet"):
+        return "parquet", None
+    for compression, extension in COMPRESSION_EXTENSIONS.items():
+        if name.endswith(f".csv{extension}"):
+            return "csv", compression
+    return None
+
+def _format_time(value: Optional[Union[str, pd.Timestamp]]) -> Optional[str]:
+    """A time bound as a DATE_FORMAT string, which compares in time order."""
+    if value is None:
+        return None
+    value = pd.Timestamp(value)
+    return None if pd.isna(value) else value.strftime(DATE_FORMAT)
+
+def file_stats(df: pd.DataFrame) -> Dict[str, Any]:
+    """Manifest entry of one stored file: row count, columns, locations and timestamp range."""
+    timestamps = df['timestamp']
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps, format='ISO8601')
+    return {
+        "rows": len(df),
+        "columns": list(df.columns),
+        "locations": sorted(str(location) for location in df['location_name'].dropna().unique()),
+        "min_timestamp": _format_time(timestamps.min()),
+        "max_timestamp": _format_time(timestamps.max()),
+    }
+
+class DataManifest:
+    """
+    Index of the weather files stored under a local directory or an ``s3://``
+    URL, kept as ``manifest.json`` next to them.
+
+    Each file (by its path relative to ``root``) is recorded with its row
+    count, columns, locations and min/max timestamp, so ``query`` can rule
+    out files from the manifest alone and only reads the ones that may hold
+    matching rows. Local files are read through memory-mapping; S3 objects
+    are fetched whole. Hive-partitioned Parquet datasets (paths with
+    ``key=value`` directories) are not indexed, as read_processed_parquet
+    already prunes them by partition.
+    """
+
+    def __init__(self, root: Union[str, Path], storage_options: Optional[Dict[str, Any]] = None):
+        self.root = str(root).rstrip("/")
+        self.storage_options = storage_options
+        if self.is_s3:
+            bucket, _, prefix = self.root[len("s3://"):].partition("/")
+            self.bucket = bucket
+            self.prefix = f"{prefix}/" if prefix else ""
+            self._client = create_s3_client(storage_options)
+        self.files: Dict[str, Dict[str, Any]] = self._load().get("files", {})
+
+    @property
+    def is_s3(self) -> bool:
+        return self.root.startswith("s3://")
+
+    @property
+    def url(self) -> str:
+        return f"{self.root}/{MANIFEST_NAME}"
+
+    def _load(self) -> Dict[str, Any]:
+        if not self.is_s3:
+            return read_checkpoint(Path(self.root) / MANIFEST_NAME)
+        try:
+            body = self._client.get_object(Bucket=self.bucket, Key=self.prefix + MANIFEST_NAME)['Body'].read()
+        except self._client.exceptions.NoSuchKey:
+            return {}
+        return json.loads(body)
+
+    def save(self) -> None:
+        """Write the manifest (atomically when local)."""
+        state = {"version": MANIFEST_VERSION, "files": self.files}
+        if not self.is_s3:
+            write_checkpoint(Path(self.root) / MANIFEST_NAME, state)
+            return
+        self._client.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + MANIFEST_NAME,
+            Body=json.dumps(state, indent=2, sort_keys=True).encode('utf-8'),
+            ContentType="application/json"
+        )
+
+    def add(self, name: str, df: pd.DataFrame) -> None:
+        """Record (or replace) the entry of the file ``name`` holding the rows of ``df``."""
+        if file_format(name) is None:
+            raise ValueError(f"Not a weather data file: {name}")
+        self.files[name] = file_stats(df)
+
+    def remove(self, name: str) -> None:
+        self.files.pop(name, None)
+
+    def list_files(self) -> Iterator[str]:
+        """Names of the data files under the root, relative to it."""
+        if self.is_s3:
+            paginator = self._client.get_paginator("list_objects_v2")
+            names = (obj['Key'][len(self.prefix):]
+                     for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix)
+                     for obj in page.get('Contents', []))
+        else:
+            root = Path(self.root)
+            names = (path.relative_to(root).as_posix() for path in root.rglob("*") if path.is_file()) \
+                if root.exists() else iter(())
+        for name in names:
+            if file_format(name) is not None and not any("=" in part for part in name.split("/")):
+                yield name
+
+    def scan(self, rebuild: bool = False) -> int:
+        """
+        Bring the manifest in line with the stored files: index files it does
+        not know (reading each once) and drop entries of deleted files.
+        ``rebuild`` re-indexes every file. Returns the number of files indexed.
+        """
+        names = set(self.list_files())
+        if rebuild:
+            self.files = {}
+        for name in set(self.files) - names:
+            self.remove(name)
+        indexed = 0
+        for name in sorted(names - set(self.files)):
+            self.files[name] = file_stats(self.read(name))
+            indexed += 1
+        if indexed:
+            logger.info(f"Indexed {indexed} files under {self.root}")
+        return indexed
+
+    def read(self, name: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Read one stored file (only ``columns`` when given) with the shared schema types."""
+        data_format, compression = file_format(name)
+        if self.is_s3:
+            body = self._client.get_object(Bucket=self.bucket, Key=self.prefix + name)['Body'].read()
+            source, memory_map = io.BytesIO(body), False
+        else:
+            source, memory_map = str(Path(self.root) / name), True
+        if data_format == "parquet":
+            import pyarrow.parquet as pq
+            return pq.read_table(source, columns=columns, memory_map=memory_map).to_pandas()
+        # The C parser maps uncompressed files instead of copying them through a read buffer
+        return load_weather_data(source, columns=columns, compression=compression,
+                                 memory_map=memory_map and compression is None)
+
+    def write(self, name: str, df: pd.DataFrame, compression: Optional[str] = None) -> None:
+        """
+        Store ``df`` as the CSV file ``name``, replacing it if it exists. The
+        file appears only once complete (multipart upload or rename); the
+        manifest entry is left to the caller.
+        """
+        stream = compress_stream(iter_csv_chunks(df), compression)
+        if self.is_s3:
+            multipart_upload(self._client, self.bucket, self.prefix + name, stream,
+                             extra_args={"ContentType": CONTENT_TYPES[compression]})
+            return
+        path = Path(self.root) / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            for chunk in stream:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+
+    def delete(self, names: Sequence[str]) -> None:
+        """Delete stored files (missing ones are ignored); manifest entries are left to the caller."""
+        names = list(names)
+        if not self.is_s3:
+            for name in names:
+                (Path(self.root) / name).unlink(missing_ok=True)
+            return
+        # DeleteObjects takes at most 1000 keys per request
+        for start in range(0, len(names), 1000):
+            response = self._client.delete_objects(Bucket=self.bucket, Delete={
+                "Objects": [{"Key": self.prefix + name} for name in names[start:start + 1000]],
+                "Quiet": True
+            })
+            errors = response.get("Errors", [])
+            if errors:
+                raise RuntimeError(f"Failed to delete {len(errors)} objects, first: {errors[0]}")
+
+    def select(
+        self,
+        locations: Optional[Sequence[str]] = None,
+        start: Optional[Union[str, pd.Timestamp]] = None,
+        end: Optional[Union[str, pd.Timestamp]] = None
+    ) -> List[str]:
+        """Files that may hold rows of ``locations`` in [start, end), oldest first."""
+        start, end = _format_time(start), _format_time(end)
+        wanted = None if locations is None else set(locations)
+        selected = []
+        for name, entry in self.files.items():
+            if not entry["rows"]:
+                continue
+            if wanted is not None and wanted.isdisjoint(entry["locations"]):
+                continue
+            if start is not None and entry["max_timestamp"] < start:
+                continue
+            if end is not None and entry["min_timestamp"] >= end:
+                continue
+            selected.append(name)
+        return sorted(selected, key=lambda name: (self.files[name]["min_timestamp"], name))
+
+    def query(
+        self,
+        locations: Optional[Sequence[str]] = None,
+        start: Optional[Union[str, pd.Timestamp]] = None,
+        end: Optional[Union[str, pd.Timestamp]] = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Rows of ``locations`` with timestamps in [start, end), restricted to
+        ``columns`` (all by default). Files are pruned with the manifest first
+        and only the needed columns of the remaining files are parsed.
+        """
+        names = self.select(locations, start, end)
+        QUERY_FILES.inc(len(self.files) - len(names), outcome="pruned")
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        needed = None if columns is None else list(dict.fromkeys([*columns, 'timestamp', 'location_name']))
+
+        frames = []
+        for name in names:
+            available = self.files[name]["columns"]
+            df = self.read(name, None if needed is None else [column for column in needed if column in available])
+            QUERY_FILES.inc(outcome="read")
+            mask = np.ones(len(df), dtype=bool)
+            if locations is not None:
+                mask &= df['location_name'].isin(list(locations)).to_numpy()
+            if start is not None:
+                mask &= (df['timestamp'] >= start).to_numpy()
+            if end is not None:
+                mask &= (df['timestamp'] < end).to_numpy()
+            frames.append(df.loc[mask])
+
+        if not frames:
+            return pd.DataFrame(columns=list(columns) if columns is not None else PROCESSED_COLUMNS)
+        result = pd.concat(frames, ignore_index=True)
+        # Categoricals with different categories per file concatenate to object
+        for name, dtype in frames[0].dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype) and result[name].dtype == object:
+                result[name] = result[name].astype('category')
+        if columns is not None:
+            result = result.reindex(columns=list(columns))
+        QUERY_ROWS.inc(len(result))
+        return result
+
+def query(
+    root: Union[str, Path],
+    locations: Optional[Sequence[str]] = None,
+    start: Optional[Union[str, pd.Timestamp]] = None,
+    end: Optional[Union[str, pd.Timestamp]] = None,
+    columns: Optional[Sequence[str]] = None,
+    storage_options: Optional[Dict[str, Any]] = None
+) -> pd.DataFrame:
+    """Query the files indexed in the manifest under ``root`` (see DataManifest.query)."""
+    return DataManifest(root, storage_options).query(locations, start, end, columns)
@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Default latency buckets in seconds, from fast cache-like responses to slow uploads
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+class _Metric:
+    """Base class for a named metric family with a fixed set of label names."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Metric {self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _format_labels(self, values: LabelValues, extra: Optional[Dict[str, str]] = None) -> str:
+        pairs = list(zip(self.label_names, values)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+        return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class Counter(_Metric):
+    """Monotonically increasing value, e.g. requests or rows processed."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[Tuple[str, LabelValues, Dict[str, str], float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for values, total in items:
+            yield self.name, values, {}, total
+
+class Gauge(Counter):
+    """Value that can go up and down, e.g. the throughput of the last upload."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(_Metric):
+    """Distribution of observed values over cumulative ``buckets`` plus their sum and count."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # Per-bucket counts followed by +Inf count and sum
+            counts = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            counts[bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall time of the ``with`` block, also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> float:
+        counts = self._values.get(self._key(labels))
+        return sum(counts[:-1]) if counts else 0
+
+    def samples(self) -> Iterator[Tuple[str, LabelValues, Dict[str, str], float]]:
+        with self._lock:
+            items = [(values, list(counts)) for values, counts in self._values.items()]
+        for values, counts in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", values, {"le": repr(float(bound))}, cumulative
+            cumulative += counts[len(self.buckets)]
+            yield f"{self.name}_bucket", values, {"le": "+Inf"}, cumulative
+            yield f"{self.name}_sum", values, {}, counts[-1]
+            yield f"{self.name}_count", values, {}, cumulative
+
+class MetricsRegistry:
+    """
+    Process-wide collection of metrics, exportable as a Prometheus textfile
+    (for node_exporter's textfile collector) or as JSON lines.
+
+    Metrics are registered once by name; registering the same name again
+    returns the existing metric so modules can declare what they use.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, help: str, labels: Sequence[str], **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labels, **kwargs)
+            elif not isinstance(metric, cls) or metric.label_names != tuple(labels):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help, labels, buckets=buckets)
+
+    def to_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in sorted(self._metrics.values(), key=lambda m: m.name):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, values, extra, value in metric.samples():
+                lines.append(f"{name}{metric._format_labels(values, extra)} {value:.10g}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Union[str, Path]) -> None:
+        """Atomically replace ``path`` with the current metrics in Prometheus format."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def write_json_lines(self, path: Union[str, Path], **context: str) -> None:
+        """Append one JSON object per sample, stamped with the time and ``context`` (e.g. the command)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        timestamp = time.time()
+        with open(path, "a", encoding="utf-8") as f:
+            for metric in sorted(self._metrics.values(), key=lambda m: m.name):
+                for name, values, extra, value in metric.samples():
+                    labels = dict(zip(metric.label_names, values), **extra)
+                    f.write(json.dumps({"timestamp": timestamp, "metric": name, "labels": labels,
+                                        "value": value, **context}) + "\n")
+
+REGISTRY = MetricsRegistry()
+
+def export_metrics(config: Dict[str, object], registry: MetricsRegistry = REGISTRY, **context: str) -> None:
+    """Write ``registry`` to the outputs configured in the ``metrics`` section of the API config."""
+    metrics_config = config.get("metrics") or {}
+    if metrics_config.get("prometheus_textfile"):
+        registry.write_textfile(metrics_config["prometheus_textfile"])
+    if metrics_config.get("json_lines"):
+        registry.write_json_lines(metrics_config["json_lines"], **context)
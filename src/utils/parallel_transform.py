@@ -0,0 +1,271 @@
+import csv
+import heapq
+import os
+import shutil
+import tempfile
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import quote
+from loguru import logger
+
+from src.utils.def_transformations import TRANSFORM_DTYPES, process_weather_data_chunked
+from src.utils.weather_loader import iter_weather_data
+
+# Ways of splitting the raw input into independently processed shards
+SHARD_KEYS = ('file', 'day', 'location')
+
+# Leading column added to split shards: the row's position in the input, to merge outputs back in input order
+ROW_COLUMN = '_row'
+
+class Shard(NamedTuple):
+    """One unit of parallel work: a raw CSV holding every row of one file, day or location."""
+    name: str
+    input_file: Path
+
+class ShardResult(NamedTuple):
+    """Outcome of transforming one shard; ``error`` is None when it succeeded."""
+    shard: str
+    rows: int
+    output_file: Optional[Path]
+    error: Optional[str]
+
+def split_into_shards(
+    input_files: Iterable[Union[str, Path]],
+    shard_by: str,
+    work_dir: Union[str, Path],
+    flush_bytes: int = 1 << 20,
+    number_rows: bool = False
+) -> List[Shard]:
+    """
+    Split raw CSVs into one file per day (``timestamp`` date) or per location.
+
+    Locations are identified by their rounded coordinates, as in
+    observation_key, so every possible duplicate of a row lands in its shard
+    (stations reported under several names share coordinates). Lines are
+    copied byte for byte and keep their original order within each shard;
+    as written by the extractor, every record must fit on one line. With
+    ``number_rows`` each line is prefixed with its position across the inputs,
+    in a leading ROW_COLUMN column. Returns the shards sorted by name.
+    """
+    if shard_by not in ('day', 'location'):
+        raise ValueError(f"Cannot split rows by '{shard_by}'")
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    header = None
+    shard_header = None
+    row = 0
+    paths: Dict[str, Path] = {}
+    buffers: Dict[str, List[bytes]] = {}
+    buffered: Dict[str, int] = {}
+    # Coordinate text -> shard name, so each distinct pair is only parsed once
+    location_names: Dict[tuple, str] = {}
+
+    def flush(name: str) -> None:
+        with open(paths[name], 'ab') as f:
+            f.writelines(buffers[name])
+        buffers[name] = []
+        buffered[name] = 0
+
+    for input_file in input_files:
+        with open(input_file, 'rb') as f:
+            file_header = f.readline()
+            if not file_header:
+                continue
+            if header is None:
+                header = file_header
+                shard_header = f"{ROW_COLUMN},".encode('utf-8') + header if number_rows else header
+                names = next(csv.reader([header.decode('utf-8')]))
+                if shard_by == 'day':
+                    columns = [names.index('timestamp')]
+                else:
+                    columns = [names.index('latitude'), names.index('longitude')]
+            elif file_header.rstrip(b'\r\n') != header.rstrip(b'\r\n'):
+                raise ValueError(f"{input_file} does not have the same columns as the other input files")
+
+            for line in f:
+                if not line.endswith(b'\n'):
+                    line += b'\n'
+                if b'"' in line:
+                    fields = next(csv.reader([line.decode('utf-8')]))
+                else:
+                    fields = line.split(b',')
+                if len(fields) != len(names):
+                    raise ValueError(f"Unexpected number of fields in {input_file}: {line[:80]!r}")
+
+                if shard_by == 'day':
+                    name = fields[columns[0]][:10]
+                    name = name.decode('ascii') if isinstance(name, bytes) else name
+                else:
+                    coordinates = (fields[columns[0]], fields[columns[1]])
+                    name = location_names.get(coordinates)
+                    if name is None:
+                        name = ':'.join(str(round(float(value), 4)) for value in coordinates)
+                        location_names[coordinates] = name
+                if name not in paths:
+                    paths[name] = work_dir / f"{len(paths):05d}.csv"
+                    buffers[name] = [shard_header]
+                    buffered[name] = 0
+                if number_rows:
+                    line = b'%d,%b' % (row, line)
+                    row += 1
+                buffers[name].append(line)
+                buffered[name] += len(line)
+                if buffered[name] >= flush_bytes:
+                    flush(name)
+
+    for name in paths:
+        if buffers[name]:
+            flush(name)
+    return [Shard(name, paths[name]) for name in sorted(paths)]
+
+def _transform_shard(
+    input_file: Path,
+    output_file: Path,
+    chunksize: int,
+    parquet_dir: Optional[str]
+) -> int:
+    """Worker: run the chunked transform over one shard."""
+    on_batch = None
+    if parquet_dir:
+        from src.utils.parquet_store import write_processed_parquet
+
+        on_batch = lambda batch: write_processed_parquet(batch, parquet_dir)
+    return process_weather_data_chunked(input_file, output_file, chunksize=chunksize, on_batch=on_batch)
+
+def _numbered_lines(f: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    """(row number, line without it) for every remaining line of a CSV file led by ROW_COLUMN."""
+    for line in f:
+        row, _, rest = line.partition(b',')
+        yield int(row), rest
+
+def _drop_row_column(path: Path) -> None:
+    """Rewrite a shard output without its leading ROW_COLUMN."""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(path, 'rb') as f, open(tmp_path, 'wb') as out:
+        out.write(f.readline().partition(b',')[2])
+        out.writelines(line for _, line in _numbered_lines(f))
+    os.replace(tmp_path, path)
+
+def _merge_outputs(shard_outputs: List[Path], output_file: Union[str, Path], by_row: bool = False) -> None:
+    """
+    Concatenate shard outputs in order, keeping only the first header, and swap the result in atomically.
+    With ``by_row`` the outputs are instead merged on their leading ROW_COLUMN, which is dropped.
+    """
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_file.with_name(output_file.name + '.tmp')
+    header_written = False
+    with open(tmp_path, 'wb') as out:
+        files = [open(path, 'rb') for path in shard_outputs]
+        try:
+            readers = []
+            for f in files:
+                header = f.readline()
+                if not header:
+                    continue
+                if not header_written:
+                    out.write(header.partition(b',')[2] if by_row else header)
+                    header_written = True
+                if not by_row:
+                    shutil.copyfileobj(f, out)
+                    continue
+                readers.append(_numbered_lines(f))
+            # Rows keep their input order within a shard, so a k-way merge restores it across shards
+            out.writelines(line for _, line in heapq.merge(*readers, key=lambda item: item[0]))
+        finally:
+            for f in files:
+                f.close()
+    os.replace(tmp_path, output_file)
+
+def parallel_transform(
+    input_files: Iterable[Union[str, Path]],
+    output_file: Optional[Union[str, Path]] = None,
+    output_dir: Optional[Union[str, Path]] = None,
+    shard_by: str = 'day',
+    workers: Optional[int] = None,
+    chunksize: int = 100_000,
+    parquet_dir: Optional[str] = None,
+    on_batch: Optional[Callable[[pd.DataFrame], None]] = None
+) -> List[ShardResult]:
+    """
+    Transform raw weather data on a pool of ``workers`` processes.
+
+    The input is sharded by ``file``, ``day`` or ``location`` and every shard
+    runs the regular chunked transform in its own process. Results are
+    deterministic whatever order shards finish in:
+
+    - ``output_file`` receives the successful shards, all read with
+      TRANSFORM_DTYPES so values are formatted consistently. File shards are
+      concatenated in input order; day and location shards are merged back
+      by the position of each row in the input, so the output is the one the
+      single-process transform writes, whatever the order of the raw rows;
+    - ``output_dir`` keeps one processed CSV per shard, named after it;
+    - ``parquet_dir`` is written by the workers (partition files have unique names).
+
+    ``on_batch`` is called in this process with every processed chunk, shard
+    by shard in the same order. A failing shard is logged and reported in its
+    ShardResult; the other shards are still transformed and written.
+    Duplicate observations are dropped within each shard, which with day or
+    location sharding covers every duplicate; files are deduplicated separately.
+    """
+    if shard_by not in SHARD_KEYS:
+        raise ValueError(f"Unknown shard key '{shard_by}', expected one of {list(SHARD_KEYS)}")
+    input_files = [Path(path) for path in input_files]
+    workers = workers or os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory(prefix="weather-shards-") as work_dir:
+        work_dir = Path(work_dir)
+        if shard_by == 'file':
+            shards = [Shard(path.stem, path) for path in input_files]
+            if len({shard.name for shard in shards}) != len(shards):
+                raise ValueError("Input files sharded by file must have distinct names")
+        else:
+            shards = split_into_shards(input_files, shard_by, work_dir / "input", number_rows=True)
+
+        shard_output_dir = Path(output_dir) if output_dir else work_dir / "output"
+        shard_output_dir.mkdir(parents=True, exist_ok=True)
+        outputs = {shard.name: shard_output_dir / f"{quote(shard.name, safe='')}.csv" for shard in shards}
+
+        errors: Dict[str, str] = {}
+        rows: Dict[str, int] = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_transform_shard, shard.input_file, outputs[shard.name], chunksize, parquet_dir): shard
+                for shard in shards
+            }
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    rows[shard.name] = future.result()
+                except Exception as e:
+                    errors[shard.name] = f"{type(e).__name__}: {str(e)}"
+
+        results = []
+        for shard in shards:
+            if shard.name in errors:
+                logger.error(f"Transform of shard '{shard.name}' failed: {errors[shard.name]}")
+            results.append(ShardResult(
+                shard.name,
+                rows.get(shard.name, 0),
+                outputs[shard.name] if output_dir and shard.name in rows else None,
+                errors.get(shard.name)
+            ))
+
+        succeeded = [outputs[shard.name] for shard in shards if shard.name in rows]
+        if output_file:
+            _merge_outputs(succeeded, output_file, by_row=(shard_by != 'file'))
+        if on_batch is not None:
+            for path in succeeded:
+                if path.stat().st_size:
+                    for chunk in iter_weather_data(path, chunksize, dtypes=TRANSFORM_DTYPES):
+                        on_batch(chunk.drop(columns=ROW_COLUMN, errors='ignore'))
+        if output_dir and shard_by != 'file':
+            for path in succeeded:
+                _drop_row_column(path)
+
+    logger.info(f"Transformed {sum(rows.values())} rows in {len(rows)}/{len(shards)} shards "
+                f"on {workers} worker processes")
+    return results
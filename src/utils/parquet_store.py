@@ -0,0 +1,173 @@
+import re
+import uuid
+import pandas as pd
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.utils.weather_schema import PROCESSED_SCHEMA
+
+PARTITION_COLUMNS = ['date', 'location']
+RUN_FILE_PATTERN = re.compile(r'^part-run(?P<run>\d+)-[0-9a-f]+-\d+\.parquet$')
+
+def _arrow_type(logical_type: str):
+    import pyarrow as pa
+    return {
+        'datetime': pa.timestamp('s'),
+        'category': pa.dictionary(pa.int32(), pa.string()),
+        'string': pa.string(),
+        'float64': pa.float64(),
+        'float32': pa.float32(),
+        'int32': pa.int32(),
+        'int16': pa.int16(),
+    }[logical_type]
+
+def arrow_schema(schema: List[Tuple[str, str]] = PROCESSED_SCHEMA):
+    """Build the explicit Arrow schema for a list of (column, logical type) pairs."""
+    import pyarrow as pa
+    return pa.schema([pa.field(name, _arrow_type(logical_type)) for name, logical_type in schema])
+
+def _resolve_filesystem(root: Union[str, Path], storage_options: Optional[Dict[str, Any]] = None):
+    """Return (filesystem, path) for a local directory or an s3:// URL."""
+    root = str(root)
+    if not root.startswith("s3://"):
+        return None, root
+    from pyarrow import fs
+    storage_options = storage_options or {}
+    filesystem = fs.S3FileSystem(
+        access_key=storage_options.get('key'),
+        secret_key=storage_options.get('secret'),
+        session_token=storage_options.get('token'),
+        endpoint_override=storage_options.get('endpoint_url'),
+        region=storage_options.get('region')
+    )
+    return filesystem, root[len("s3://"):]
+
+def _to_arrow_table(df: pd.DataFrame, schema: List[Tuple[str, str]]):
+    import pyarrow as pa
+
+    columns = {}
+    for name, logical_type in schema:
+        if name not in df.columns:
+            continue
+        values = df[name]
+        if logical_type == 'datetime' and not pd.api.types.is_datetime64_any_dtype(values):
+            values = pd.to_datetime(values)
+        columns[name] = values
+
+    frame = pd.DataFrame(columns, index=df.index)
+    target = arrow_schema([(name, logical_type) for name, logical_type in schema if name in frame.columns])
+    table = pa.Table.from_pandas(frame, schema=target, preserve_index=False)
+
+    timestamps = pd.to_datetime(df['timestamp'])
+    table = table.append_column('date', pa.array(timestamps.dt.strftime('%Y-%m-%d').to_numpy(dtype=object), pa.string()))
+    table = table.append_column('location', pa.array(df['location_name'].astype(str).to_numpy(dtype=object), pa.string()))
+    return table
+
+def write_processed_parquet(
+    df: pd.DataFrame,
+    root: Union[str, Path],
+    compression: str = 'zstd',
+    storage_options: Optional[Dict[str, Any]] = None,
+    schema: List[Tuple[str, str]] = PROCESSED_SCHEMA,
+    run: Optional[int] = None
+) -> int:
+    """
+    Append processed rows to a Parquet dataset partitioned as ``date=YYYY-MM-DD/location=<name>``.
+
+    Columns are written with the explicit types from ``schema``. ``root`` may be a
+    local directory or an ``s3://bucket/prefix`` URL (credentials taken from
+    ``storage_options`` like save_weather_data_to_url). Each call writes new
+    uniquely named files, so repeated calls append. With ``run`` the file names
+    carry that incremental run number so discard_parquet_runs can remove them.
+    Returns the number of rows written.
+    """
+    import pyarrow.parquet as pq
+
+    if df.empty:
+        return 0
+
+    filesystem, path = _resolve_filesystem(root, storage_options)
+    if filesystem is None:
+        Path(path).mkdir(parents=True, exist_ok=True)
+
+    table = _to_arrow_table(df, schema)
+    pq.write_to_dataset(
+        table,
+        root_path=path,
+        partition_cols=PARTITION_COLUMNS,
+        filesystem=filesystem,
+        compression=compression,
+        basename_template=f"part-{'' if run is None else f'run{run:08d}-'}{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore'
+    )
+    return table.num_rows
+
+def discard_parquet_runs(
+    root: Union[str, Path],
+    from_run: int,
+    storage_options: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Delete the files written by incremental runs numbered ``from_run`` or higher.
+
+    Used to roll back the Parquet output of runs that never committed their
+    checkpoint. Files written without a run number are kept. Returns the number
+    of files deleted.
+    """
+    from pyarrow import fs
+
+    filesystem, path = _resolve_filesystem(root, storage_options)
+    if filesystem is None:
+        if not Path(path).exists():
+            return 0
+        filesystem = fs.LocalFileSystem()
+    deleted = 0
+    for info in filesystem.get_file_info(fs.FileSelector(path, recursive=True, allow_not_found=True)):
+        match = RUN_FILE_PATTERN.match(info.base_name)
+        if info.type == fs.FileType.File and match and int(match.group('run')) >= from_run:
+            filesystem.delete_file(info.path)
+            deleted += 1
+    return deleted
+
+def _as_date_string(value: Union[str, date, datetime]) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)[:10]
+
+def read_processed_parquet(
+    root: Union[str, Path],
+    columns: Optional[Sequence[str]] = None,
+    locations: Optional[Sequence[str]] = None,
+    start_date: Optional[Union[str, date]] = None,
+    end_date: Optional[Union[str, date]] = None,
+    filters=None,
+    storage_options: Optional[Dict[str, Any]] = None
+) -> pd.DataFrame:
+    """
+    Read a processed Parquet dataset, pushing projections and filters down to the scan.
+
+    ``locations`` and the inclusive ``start_date``/``end_date`` prune whole
+    partitions before any file is opened; ``filters`` is an optional extra
+    ``pyarrow.dataset`` expression evaluated against row groups.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    filesystem, path = _resolve_filesystem(root, storage_options)
+    partitioning = ds.partitioning(pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS]), flavor='hive')
+    dataset = ds.dataset(path, format='parquet', partitioning=partitioning, filesystem=filesystem)
+
+    expression = filters
+    conditions = []
+    if locations is not None:
+        conditions.append(ds.field('location').isin(list(locations)))
+    if start_date is not None:
+        conditions.append(ds.field('date') >= _as_date_string(start_date))
+    if end_date is not None:
+        conditions.append(ds.field('date') <= _as_date_string(end_date))
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    table = dataset.to_table(columns=list(columns) if columns is not None else None, filter=expression)
+    return table.to_pandas()
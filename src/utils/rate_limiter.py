@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional, Mapping, Union
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves still merge, without a lock
+    fcntl = None
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float, tokens: Optional[float] = None, updated: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = self.capacity if tokens is None else min(float(tokens), self.capacity)
+        self.updated = time.time() if updated is None else updated
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float, tokens: float = 1) -> float:
+        """Seconds until ``tokens`` can be consumed (0 if available now)."""
+        self._refill(now)
+        if self.tokens >= tokens:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (tokens - self.tokens) / self.rate
+
+    def consume(self, now: float, tokens: float = 1) -> None:
+        self._refill(now)
+        self.tokens -= tokens
+
+class RateLimiter:
+    """
+    Thread-safe request budget shared by all workers of an API client.
+
+    Combines a per-second bucket (burst control) with a per-day bucket
+    (quota control). The per-second rate adapts to server signals: it is
+    halved whenever the server throttles us and creeps back towards the
+    configured maximum on every successful call. A ``Retry-After`` pause
+    blocks every worker until it expires.
+
+    The per-day bucket can be persisted to ``state_file`` so that the budget
+    is shared across the short-lived processes started by cron and concurrent
+    ones. It is saved every ``save_every`` requests or ``save_interval``
+    seconds, outside the lock admitting requests, and on ``close``. A save
+    re-reads the file under an exclusive file lock and subtracts this
+    process's requests since its last save from the stored budget, so
+    processes sharing the file do not overwrite each other's usage.
+    """
+
+    MIN_RATE = 0.1
+
+    def __init__(
+        self,
+        max_per_second: float = 10,
+        max_per_day: Optional[int] = None,
+        state_file: Optional[Union[str, Path]] = None,
+        save_every: int = 20,
+        save_interval: float = 5.0
+    ):
+        self.max_per_second = float(max_per_second)
+        self.state_file = Path(state_file) if state_file else None
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        # Requests consumed from the daily budget since it was last saved
+        self._unsaved = 0
+        self._last_save = time.time()
+        self._paused_until = 0.0
+        self._second = TokenBucket(self.max_per_second, max(1.0, self.max_per_second))
+        self._day = None
+        if max_per_day:
+            self._day = TokenBucket(max_per_day / 86400.0, max_per_day, **self._load_state())
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RateLimiter":
+        """Build a limiter from the ``collection`` section of the API config."""
+        collection = config.get("collection", {})
+        return cls(
+            max_per_second=collection.get("max_requests_per_second", 10),
+            max_per_day=collection.get("max_requests_per_day"),
+            state_file=collection.get("rate_limit_state_file"),
+            save_every=collection.get("rate_limit_save_every", 20),
+            save_interval=collection.get("rate_limit_save_interval", 5.0)
+        )
+
+    def _load_state(self) -> Dict[str, float]:
+        if not self.state_file or not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            return {"tokens": float(state["tokens"]), "updated": float(state["updated"])}
+        except (ValueError, KeyError, OSError) as e:
+            logger.warning(f"Ignoring unreadable rate limit state {self.state_file}: {str(e)}")
+            return {}
+
+    @contextmanager
+    def _locked_state(self):
+        """Hold an exclusive lock on the state file's lock file (a no-op where fcntl is unavailable)."""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.state_file.with_suffix(self.state_file.suffix + ".lock"), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save_state(self, force: bool = False) -> None:
+        """
+        Merge this process's usage into the state file if a save is due (or
+        ``force``), then adopt the merged budget. A due save is skipped while
+        another thread saves; a forced one waits for it.
+        """
+        if not self.state_file or self._day is None or not self._save_lock.acquire(blocking=force):
+            return
+        try:
+            with self._lock:
+                due = self._unsaved >= self.save_every or time.time() - self._last_save >= self.save_interval
+                if not self._unsaved or not (force or due):
+                    return
+                consumed, self._unsaved = self._unsaved, 0
+                self._last_save = time.time()
+                fallback = {"tokens": self._day.tokens, "updated": self._day.updated}
+
+            with self._locked_state():
+                stored = self._load_state()
+                if stored:
+                    merged = TokenBucket(self._day.rate, self._day.capacity, **stored)
+                    merged.consume(time.time(), consumed)
+                else:
+                    merged = TokenBucket(self._day.rate, self._day.capacity, **fallback)
+                tmp_file = self.state_file.with_suffix(self.state_file.suffix + ".tmp")
+                with open(tmp_file, 'w') as f:
+                    json.dump({"tokens": merged.tokens, "updated": merged.updated}, f)
+                os.replace(tmp_file, self.state_file)
+
+            with self._lock:
+                # Take in other processes' usage; requests admitted meanwhile stay unsaved
+                now = time.time()
+                merged._refill(now)
+                self._day._refill(now)
+                self._day.tokens = min(self._day.tokens, merged.tokens - self._unsaved)
+        finally:
+            self._save_lock.release()
+
+    def close(self) -> None:
+        """Save the requests not persisted yet."""
+        self._save_state(force=True)
+
+    def acquire(self, max_wait: Optional[float] = None) -> bool:
+        """
+        Block until one request may be sent and consume it from both buckets.
+
+        Returns False without consuming anything if the request could not be
+        admitted within ``max_wait`` seconds (e.g. the daily quota is spent).
+        """
+        deadline = None if max_wait is None else time.time() + max_wait
+        while True:
+            with self._lock:
+                now = time.time()
+                wait = max(self._paused_until - now, self._second.wait_time(now))
+                if self._day is not None:
+                    wait = max(wait, self._day.wait_time(now))
+                if wait <= 0:
+                    self._second.consume(now)
+                    if self._day is not None:
+                        self._day.consume(now)
+                        self._unsaved += 1
+                    break
+            if deadline is not None and time.time() + wait > deadline:
+                return False
+            time.sleep(min(wait, 1.0))
+        self._save_state()
+        return True
+
+    def record_success(self) -> None:
+        """Additively restore the per-second rate after a successful call."""
+        with self._lock:
+            if self._second.rate < self.max_per_second:
+                self._second.rate = min(self.max_per_second, self._second.rate + 0.1 * self.max_per_second)
+
+    def record_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Halve the per-second rate and pause all workers after a server throttle."""
+        with self._lock:
+            self._second.rate = max(self.MIN_RATE, self._second.rate / 2)
+            pause = retry_after if retry_after is not None else 1.0 / self._second.rate
+            self._paused_until = max(self._paused_until, time.time() + pause)
+            logger.warning(f"API throttled us, pausing {pause:.1f}s and lowering rate to {self._second.rate:.2f} req/s")
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Pause until the window resets when the server reports an exhausted quota."""
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            if int(remaining) > 0:
+                return
+            reset = float(reset)
+        except ValueError:
+            return
+        # Reset may be an epoch timestamp or a delay in seconds
+        pause = reset - time.time() if reset > 1e9 else reset
+        if pause > 0:
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.time() + pause)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a ``Retry-After`` header given in seconds; HTTP dates are ignored."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
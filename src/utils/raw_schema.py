@@ -0,0 +1,46 @@
+from typing import List, NamedTuple, Tuple, Union
+
+# Kept free of pandas/numpy imports so the extractor starts quickly;
+# weather_schema builds the raw and processed schemas from RAW_FIELDS.
+
+class RawField(NamedTuple):
+    """A raw column, its logical type and its JSON path in a current weather payload."""
+    name: str
+    logical_type: str
+    path: Tuple[Union[str, int], ...]
+    required: bool = True
+
+# Single spec for the raw data: drives the flattener (src/utils/flattener.py),
+# the raw CSV header and, through weather_schema, the Parquet schema.
+# Optional fields are written empty when the payload lacks them.
+RAW_FIELDS: List[RawField] = [
+    RawField('timestamp', 'datetime', ('dt',)),
+    RawField('location_name', 'category', ('name',)),
+    RawField('latitude', 'float64', ('coord', 'lat')),
+    RawField('longitude', 'float64', ('coord', 'lon')),
+    RawField('weather_main', 'category', ('weather', 0, 'main')),
+    RawField('weather_description', 'category', ('weather', 0, 'description')),
+    RawField('weather_icon', 'category', ('weather', 0, 'icon')),
+    RawField('temp', 'float64', ('main', 'temp')),
+    RawField('feels_like', 'float64', ('main', 'feels_like')),
+    RawField('temp_min', 'float64', ('main', 'temp_min')),
+    RawField('temp_max', 'float64', ('main', 'temp_max')),
+    RawField('pressure', 'int32', ('main', 'pressure')),
+    RawField('humidity', 'int16', ('main', 'humidity')),
+    RawField('sea_level', 'int32', ('main', 'sea_level'), required=False),
+    RawField('ground_level', 'int32', ('main', 'grnd_level'), required=False),
+    RawField('wind_speed', 'float64', ('wind', 'speed')),
+    RawField('wind_direction', 'int16', ('wind', 'deg'), required=False),
+    RawField('cloud_cover', 'int16', ('clouds', 'all')),
+    RawField('visibility', 'int32', ('visibility',), required=False),
+    RawField('country', 'category', ('sys', 'country')),
+    RawField('sunrise', 'datetime', ('sys', 'sunrise')),
+    RawField('sunset', 'datetime', ('sys', 'sunset')),
+    RawField('timezone', 'int32', ('timezone',)),
+]
+
+# History API observations may lack these, they are written empty rather than dropped
+HISTORY_OPTIONAL_FIELDS = ('feels_like', 'temp_min', 'temp_max', 'wind_speed', 'cloud_cover')
+HISTORY_FIELDS: List[RawField] = [
+    field._replace(required=False) if field.name in HISTORY_OPTIONAL_FIELDS else field for field in RAW_FIELDS
+]
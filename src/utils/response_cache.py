@@ -0,0 +1,163 @@
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
+from loguru import logger
+
+class ResponseCache(ABC):
+    """
+    Base class for API response caches.
+
+    Entries are keyed by endpoint and coordinates rounded to
+    ``coordinate_precision`` decimals, expire after ``ttl`` seconds and the
+    least recently used entry is evicted once ``max_entries`` is reached.
+    Subclasses implement ``_get``, ``_set`` and ``__len__``.
+    """
+
+    def __init__(self, ttl: float = 600, max_entries: int = 1000, coordinate_precision: int = 2):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.coordinate_precision = coordinate_precision
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, endpoint: str, lat: float, lng: float) -> str:
+        """Build the cache key for an endpoint and a pair of coordinates."""
+        return f"{endpoint}:{round(lat, self.coordinate_precision)}:{round(lng, self.coordinate_precision)}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached response or None, updating the hit/miss counters."""
+        with self._lock:
+            value = self._get(key, time.time())
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response, evicting the least recently used entries if needed."""
+        with self._lock:
+            self._set(key, value, time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters; every hit is one API call saved."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self)
+        }
+
+    @abstractmethod
+    def _get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        """Return the entry for ``key`` if it has not expired at ``now``, marking it recently used."""
+
+    @abstractmethod
+    def _set(self, key: str, value: Dict[str, Any], now: float) -> None:
+        """Store ``value`` under ``key``, expiring ``ttl`` seconds after ``now``."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored entries."""
+
+class MemoryCache(ResponseCache):
+    """In-process LRU cache backed by an OrderedDict."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._entries = OrderedDict()
+
+    def _get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: Dict[str, Any], now: float) -> None:
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class DiskCache(ResponseCache):
+    """
+    SQLite-backed cache that survives between the short-lived cron processes.
+    """
+
+    def __init__(self, path: Union[str, Path] = "data/state/response_cache.sqlite", **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    def _get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        return json.loads(row[0])
+
+    def _set(self, key: str, value: Dict[str, Any], now: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now + self.ttl, now)
+        )
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+def create_cache(config: Dict[str, Any]) -> Optional[ResponseCache]:
+    """Build the response cache described by the ``cache`` section of the API config."""
+    cache_config = config.get("cache") or {}
+    backend = cache_config.get("backend", "none")
+    options = {
+        "ttl": cache_config.get("ttl", 600),
+        "max_entries": cache_config.get("max_entries", 1000),
+        "coordinate_precision": cache_config.get("coordinate_precision", 2)
+    }
+    if backend == "memory":
+        return MemoryCache(**options)
+    if backend == "disk":
+        return DiskCache(path=cache_config.get("path", "data/state/response_cache.sqlite"), **options)
+    if backend not in (None, "none"):
+        logger.warning(f"Unknown cache backend '{backend}', response caching disabled")
+    return None
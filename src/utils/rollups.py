@@ -0,0 +1,196 @@
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+from loguru import logger
+
+from src.utils.dedup_index import ObservationIndex
+from src.utils.def_transformations import drop_duplicate_observations
+
+# Rolled-up metric name -> processed column it summarises
+ROLLUP_METRICS: Dict[str, str] = {
+    'temperature': 'temp_celsius',
+    'humidity': 'humidity',
+    'pressure': 'pressure',
+    'wind_speed': 'wind_speed',
+}
+
+# Granularity -> (bucket frequency, strftime of the file a bucket is stored in)
+GRANULARITIES: Dict[str, Tuple[str, str]] = {
+    'hourly': ('h', '%Y-%m'),
+    'daily': ('D', '%Y'),
+}
+
+KEY_COLUMNS = ['location_name', 'bucket', 'metric']
+STAT_COLUMNS = ['count', 'mean', 'm2', 'min', 'max']
+
+def batch_statistics(df: pd.DataFrame, freq: str, metrics: Dict[str, str] = ROLLUP_METRICS) -> pd.DataFrame:
+    """
+    Aggregate processed rows into per-(location, bucket, metric) count, mean,
+    sum of squared deviations (m2), min and max. Missing values are ignored.
+    """
+    buckets = pd.to_datetime(df['timestamp']).dt.floor(freq)
+    parts = []
+    for metric, column in metrics.items():
+        if column not in df.columns:
+            continue
+        parts.append(pd.DataFrame({
+            'location_name': df['location_name'].to_numpy(),
+            'bucket': buckets.to_numpy(),
+            'metric': metric,
+            'value': df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        }))
+    if not parts:
+        return pd.DataFrame(columns=KEY_COLUMNS + STAT_COLUMNS)
+
+    long = pd.concat(parts, ignore_index=True).dropna(subset=['value'])
+    grouped = long.groupby(KEY_COLUMNS, sort=True)['value']
+    stats = grouped.agg(['count', 'mean', 'min', 'max'])
+    stats['m2'] = grouped.var(ddof=0) * stats['count']
+    return stats.reset_index()[KEY_COLUMNS + STAT_COLUMNS]
+
+def combine_statistics(existing: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge two sets of running statistics with the parallel form of Welford's
+    algorithm (Chan et al.), so variance stays numerically stable without
+    keeping the underlying rows.
+    """
+    if existing.empty:
+        return new.copy()
+    if new.empty:
+        return existing.copy()
+
+    a = existing.set_index(KEY_COLUMNS)
+    b = new.set_index(KEY_COLUMNS)
+    a, b = a.align(b, join='outer')
+    na = a['count'].fillna(0).to_numpy(dtype=np.float64)
+    nb = b['count'].fillna(0).to_numpy(dtype=np.float64)
+    mean_a = a['mean'].fillna(0).to_numpy()
+    mean_b = b['mean'].fillna(0).to_numpy()
+    n = na + nb
+    delta = mean_b - mean_a
+
+    merged = pd.DataFrame(index=a.index)
+    merged['count'] = n.astype(np.int64)
+    merged['mean'] = mean_a + delta * nb / n
+    merged['m2'] = (a['m2'].fillna(0).to_numpy() + b['m2'].fillna(0).to_numpy()
+                    + delta * delta * na * nb / n)
+    merged['min'] = np.fmin(a['min'].to_numpy(), b['min'].to_numpy())
+    merged['max'] = np.fmax(a['max'].to_numpy(), b['max'].to_numpy())
+    return merged.reset_index()[KEY_COLUMNS + STAT_COLUMNS]
+
+class RollupStore:
+    """
+    Per-location hourly and daily trend rollups maintained incrementally.
+
+    Each call to ``update`` folds a batch of processed rows into the running
+    statistics; ``save`` persists the touched files as Parquet under
+    ``root/<granularity>/`` (one file per month for hourly buckets, per year
+    for daily ones). Observations already rolled up are skipped using a
+    persistent ObservationIndex, so reprocessing the same raw file is harmless.
+    """
+
+    def __init__(self, root: Union[str, Path], index_path: Optional[Union[str, Path]] = None):
+        self.root = Path(root)
+        self.index = ObservationIndex(index_path if index_path is not None else self.root / "observation_index.json")
+        self._partitions: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._dirty = set()
+
+    def _path(self, granularity: str, key: str) -> Path:
+        return self.root / granularity / f"{key}.parquet"
+
+    def _load(self, granularity: str, key: str) -> pd.DataFrame:
+        if (granularity, key) not in self._partitions:
+            path = self._path(granularity, key)
+            if path.exists():
+                frame = pd.read_parquet(path)
+                frame['metric'] = frame['metric'].astype(str)
+                frame['location_name'] = frame['location_name'].astype(str)
+            else:
+                frame = pd.DataFrame(columns=KEY_COLUMNS + STAT_COLUMNS)
+            self._partitions[(granularity, key)] = frame
+        return self._partitions[(granularity, key)]
+
+    def update(self, df: pd.DataFrame) -> int:
+        """Fold a batch of processed rows into the rollups. Returns the number of new rows."""
+        if df.empty or not {'location_name', 'timestamp'} <= set(df.columns):
+            return 0
+        df = drop_duplicate_observations(df, self.index)
+        if df.empty:
+            return 0
+
+        for granularity, (freq, file_format) in GRANULARITIES.items():
+            stats = batch_statistics(df, freq)
+            keys = stats['bucket'].dt.strftime(file_format)
+            for key, part in stats.groupby(keys):
+                existing = self._load(granularity, key)
+                self._partitions[(granularity, key)] = combine_statistics(existing, part)
+                self._dirty.add((granularity, key))
+        return len(df)
+
+    def save(self) -> None:
+        """Write the rollup files touched since the last save, then the observation index."""
+        for granularity, key in sorted(self._dirty):
+            path = self._path(granularity, key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            frame = self._partitions[(granularity, key)].sort_values(KEY_COLUMNS)
+            tmp_path = path.with_suffix('.parquet.tmp')
+            frame.astype({'location_name': 'category', 'metric': 'category'}).to_parquet(
+                tmp_path, index=False, compression='zstd'
+            )
+            os.replace(tmp_path, path)
+        if self._dirty:
+            logger.info(f"Saved {len(self._dirty)} rollup files under {self.root}")
+        self._dirty.clear()
+        self.index.save()
+
+    def query(
+        self,
+        granularity: str = 'daily',
+        locations: Optional[Iterable[str]] = None,
+        start: Optional[Union[str, pd.Timestamp]] = None,
+        end: Optional[Union[str, pd.Timestamp]] = None,
+        metrics: Optional[Iterable[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Return rollups for buckets starting in [start, end), one row per
+        (location, bucket, metric) with count, mean, std, min and max.
+        Only the files overlapping the range are read.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of {list(GRANULARITIES)}")
+        freq, file_format = GRANULARITIES[granularity]
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        directory = self.root / granularity
+        keys = sorted(path.stem for path in directory.glob("*.parquet")) if directory.exists() else []
+        keys = sorted(set(keys) | {key for g, key in self._partitions if g == granularity})
+        if start is not None:
+            keys = [key for key in keys if key >= start.strftime(file_format)]
+        if end is not None:
+            keys = [key for key in keys if key <= end.strftime(file_format)]
+
+        frames = [self._load(granularity, key) for key in keys]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=KEY_COLUMNS + ['count', 'mean', 'std', 'min', 'max'])
+        result = pd.concat(frames, ignore_index=True)
+
+        mask = np.ones(len(result), dtype=bool)
+        if locations is not None:
+            mask &= result['location_name'].isin(list(locations)).to_numpy()
+        if metrics is not None:
+            mask &= result['metric'].isin(list(metrics)).to_numpy()
+        if start is not None:
+            mask &= (result['bucket'] >= start).to_numpy()
+        if end is not None:
+            mask &= (result['bucket'] < end).to_numpy()
+        result = result.loc[mask]
+
+        counts = result['count'].to_numpy(dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.sqrt(result['m2'].to_numpy() / (counts - 1))
+        result = result.assign(std=np.where(counts > 1, std, np.nan))
+        return result[KEY_COLUMNS + ['count', 'mean', 'std', 'min', 'max']].sort_values(KEY_COLUMNS).reset_index(drop=True)
@@ -0,0 +1,197 @@
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, Optional
+from loguru import logger
+from retry.api import retry_call
+
+from src.utils.metrics import REGISTRY
+
+# S3 rejects multipart parts smaller than 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+COMPRESSION_EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+CONTENT_TYPES = {None: "text/csv", "gzip": "application/gzip", "zstd": "application/zstd"}
+
+UPLOAD_SECONDS = REGISTRY.histogram("upload_seconds", "Wall time of completed S3 uploads")
+UPLOAD_BYTES = REGISTRY.counter("upload_bytes_total", "Bytes uploaded to S3 by completed uploads")
+UPLOAD_PARTS = REGISTRY.counter("upload_parts_total", "Parts (or single PutObject bodies) uploaded to S3")
+UPLOAD_PART_RETRIES = REGISTRY.counter("upload_part_retries_total", "S3 part uploads retried after an error")
+UPLOAD_THROUGHPUT = REGISTRY.gauge("upload_throughput_bytes_per_second", "Throughput of the last completed S3 upload")
+
+def create_s3_client(storage_options: Optional[Dict[str, Any]] = None):
+    """
+    A boto3 S3 client from fsspec-style ``storage_options``: ``key``/``secret``
+    and optionally ``token``, ``region`` and ``endpoint_url`` (e.g. a local S3 stand-in).
+    """
+    import boto3
+
+    storage_options = storage_options or {}
+    return boto3.client(
+        's3',
+        aws_access_key_id=storage_options.get('key'),
+        aws_secret_access_key=storage_options.get('secret'),
+        aws_session_token=storage_options.get('token'),
+        region_name=storage_options.get('region'),
+        endpoint_url=storage_options.get('endpoint_url')
+    )
+
+def iter_csv_chunks(df, rows_per_chunk: int = 50_000) -> Iterator[bytes]:
+    """
+    Serialize a DataFrame to CSV bytes a slice at a time, header on the first slice only.
+    Datetime columns are written in the same format as the CSV files they were loaded from.
+    """
+    from src.utils.weather_loader import to_csv_frame
+
+    if len(df) == 0:
+        yield df.to_csv(index=False).encode('utf-8')
+        return
+    for start in range(0, len(df), rows_per_chunk):
+        chunk = to_csv_frame(df.iloc[start:start + rows_per_chunk])
+        yield chunk.to_csv(index=False, header=(start == 0)).encode('utf-8')
+
+def check_compression(compression: Optional[str]) -> None:
+    """Raise if ``compression`` is unknown or its codec is not installed, before any work is done."""
+    if compression not in COMPRESSION_EXTENSIONS:
+        raise ValueError(f"Unsupported compression: {compression}")
+    if compression == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            raise ImportError("zstd compression requires the 'zstandard' package (pip install zstandard)") from None
+
+def compress_stream(chunks: Iterable[bytes], compression: Optional[str] = None) -> Iterator[bytes]:
+    """
+    Compress a stream of byte chunks with gzip or zstd (``None`` passes it through).
+    An unavailable codec raises here, not once the stream is being uploaded.
+    """
+    check_compression(compression)
+    return _compress_stream(chunks, compression)
+
+def _compress_stream(chunks: Iterable[bytes], compression: Optional[str]) -> Iterator[bytes]:
+    if compression is None:
+        yield from chunks
+        return
+    if compression == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    else:
+        import zstandard
+        compressor = zstandard.ZstdCompressor().compressobj()
+
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def iter_parts(stream: Iterable[bytes], part_size: int = DEFAULT_PART_SIZE) -> Iterator[bytes]:
+    """Re-buffer a byte stream into parts of at least ``part_size`` bytes (the last may be smaller)."""
+    buffer = bytearray()
+    for data in stream:
+        buffer += data
+        while len(buffer) >= part_size:
+            yield bytes(buffer[:part_size])
+            del buffer[:part_size]
+    if buffer:
+        yield bytes(buffer)
+
+def _counting_retries(func):
+    """Wrap ``func`` so every call after the first counts as a part retry."""
+    attempts = 0
+
+    def attempt(**kwargs):
+        nonlocal attempts
+        attempts += 1
+        if attempts > 1:
+            UPLOAD_PART_RETRIES.inc()
+        return func(**kwargs)
+    return attempt
+
+def _upload_part(s3_client, bucket: str, key: str, upload_id: str, part_number: int, body: bytes, retries: int) -> Dict[str, Any]:
+    response = retry_call(
+        _counting_retries(s3_client.upload_part),
+        fkwargs={"Bucket": bucket, "Key": key, "UploadId": upload_id, "PartNumber": part_number, "Body": body},
+        tries=retries,
+        delay=1,
+        backoff=2,
+        logger=logger
+    )
+    UPLOAD_PARTS.inc()
+    return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+def _record_upload(size: int, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    UPLOAD_SECONDS.observe(elapsed)
+    UPLOAD_BYTES.inc(size)
+    if elapsed > 0:
+        UPLOAD_THROUGHPUT.set(size / elapsed)
+
+def multipart_upload(
+    s3_client,
+    bucket: str,
+    key: str,
+    stream: Iterable[bytes],
+    part_size: int = DEFAULT_PART_SIZE,
+    max_workers: int = 4,
+    part_retries: int = 3,
+    extra_args: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Upload a byte stream to S3 without staging it on disk.
+
+    Parts are uploaded concurrently by up to ``max_workers`` threads and at
+    most ``max_workers`` parts are buffered at once, so memory stays around
+    ``max_workers * part_size``. Each part is retried independently; if the
+    upload still fails it is aborted so no orphaned parts are left behind.
+    Streams smaller than one part are sent with a single PutObject.
+    Returns the number of bytes uploaded.
+    """
+    started = time.perf_counter()
+    part_size = max(part_size, MIN_PART_SIZE)
+    extra_args = extra_args or {}
+    parts = iter_parts(stream, part_size)
+
+    first = next(parts, b"")
+    second = next(parts, None)
+    if second is None:
+        retry_call(_counting_retries(s3_client.put_object), fkwargs={"Bucket": bucket, "Key": key, "Body": first, **extra_args},
+                   tries=part_retries, delay=1, backoff=2, logger=logger)
+        UPLOAD_PARTS.inc()
+        _record_upload(len(first), started)
+        return len(first)
+
+    upload_id = s3_client.create_multipart_upload(Bucket=bucket, Key=key, **extra_args)["UploadId"]
+    completed = []
+    total = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+
+            def submit(part_number: int, body: bytes) -> None:
+                pending.add(executor.submit(_upload_part, s3_client, bucket, key, upload_id, part_number, body, part_retries))
+
+            submit(1, first)
+            submit(2, second)
+            total = len(first) + len(second)
+            for part_number, body in enumerate(parts, start=3):
+                # Backpressure: wait for a slot before buffering another part
+                while len(pending) >= max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    completed.extend(future.result() for future in done)
+                submit(part_number, body)
+                total += len(body)
+
+            done, _ = wait(pending)
+            completed.extend(future.result() for future in done)
+
+        completed.sort(key=lambda part: part["PartNumber"])
+        s3_client.complete_multipart_upload(
+            Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": completed}
+        )
+        _record_upload(total, started)
+        return total
+    except Exception:
+        logger.error(f"Multipart upload of s3://{bucket}/{key} failed, aborting")
+        s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        raise
@@ -1,13 +1,32 @@
-import pandas as pd
 import time
 import os
+from typing import TYPE_CHECKING, Optional
 from dotenv import load_dotenv
 
-def load_weather_data(file_path: str) -> pd.DataFrame:
-    return pd.read_csv(file_path)
+from src.utils.s3_upload import (
+    CONTENT_TYPES, DEFAULT_PART_SIZE, compress_stream, create_s3_client, iter_csv_chunks, multipart_upload
+)
 
-def save_weather_data_to_url(df: pd.DataFrame, url: str, storage_options: dict) -> None:
-    import boto3
+if TYPE_CHECKING:
+    import pandas as pd
+
+def save_weather_data_to_url(
+    df: "pd.DataFrame",
+    url: str,
+    storage_options: dict,
+    compression: Optional[str] = None,
+    part_size: int = DEFAULT_PART_SIZE,
+    max_workers: int = 4
+) -> None:
+    """
+    Stream a DataFrame as CSV straight to an S3 URL.
+    
+    Rows are serialized in slices, optionally compressed with ``gzip`` or
+    ``zstd``, and sent as a concurrent multipart upload with per-part retries,
+    so nothing is staged on disk and overlapping runs cannot collide.
+    ``storage_options`` holds ``key``/``secret`` and optionally ``token``,
+    ``region`` and ``endpoint_url`` (e.g. a local S3 stand-in).
+    """
     from urllib.parse import urlparse
     
     # Parse the S3 URL
@@ -15,25 +34,18 @@ def save_weather_data_to_url(df: pd.DataFrame, url: str, storage_options: dict)
     bucket_name = parsed_url.netloc
     key = parsed_url.path.lstrip('/')
     
-    # Create a temporary CSV file
-    temp_file = "temp_weather_data.csv"
-    df.to_csv(temp_file, index=False)
+    s3_client = create_s3_client(storage_options)
     
-    # Initialize S3 client with only access key and secret key
-    s3_client = boto3.client(
-        's3',
-        aws_access_key_id=storage_options['key'],
-        aws_secret_access_key=storage_options['secret']
+    stream = compress_stream(iter_csv_chunks(df), compression)
+    multipart_upload(
+        s3_client,
+        bucket_name,
+        key,
+        stream,
+        part_size=part_size,
+        max_workers=max_workers,
+        extra_args={"ContentType": CONTENT_TYPES[compression]}
     )
-    
-    # Upload the file
-    try:
-        s3_client.upload_file(temp_file, bucket_name, key)
-        os.remove(temp_file)  # Clean up temporary file
-    except Exception as e:
-        if os.path.exists(temp_file):
-            os.remove(temp_file)  # Clean up temporary file even if upload fails
-        raise e
         
 """
 if __name__ == "__main__":
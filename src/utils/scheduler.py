@@ -0,0 +1,88 @@
+import heapq
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+from loguru import logger
+
+class Job:
+    """A named callable run every ``interval`` seconds, offset by up to ``jitter`` seconds."""
+
+    def __init__(self, name: str, func: Callable[[], None], interval: float, jitter: float = 0.0, start: float = 0.0):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self._slot = start
+        self.next_run = start + random.uniform(0, jitter)
+
+    def reschedule(self, now: float) -> None:
+        """
+        Advance to the next slot on the original grid, skipping slots missed while
+        the job was running, so runs do not drift the way chained sleeps do.
+        """
+        self._slot += self.interval
+        if self._slot <= now:
+            self._slot += self.interval * ((now - self._slot) // self.interval + 1)
+        self.next_run = self._slot + random.uniform(0, self.jitter)
+
+    def __lt__(self, other: "Job") -> bool:
+        return self.next_run < other.next_run
+
+class Scheduler:
+    """
+    Minimal in-process scheduler running jobs one at a time on the calling thread.
+
+    ``run`` blocks until ``stop`` is called (e.g. from a signal handler); a job
+    that raises is logged and rescheduled rather than stopping the loop.
+    """
+
+    def __init__(self):
+        self._jobs: List[Job] = []
+        self._stop_event = threading.Event()
+
+    def add_job(self, name: str, func: Callable[[], None], interval: float,
+                jitter: float = 0.0, start: Optional[float] = None) -> Job:
+        """Run ``func`` every ``interval`` seconds, first at ``start`` (default: now plus jitter)."""
+        start = time.time() if start is None else start
+        job = Job(name, func, interval, jitter, start)
+        heapq.heappush(self._jobs, job)
+        return job
+
+    def add_daily_job(self, name: str, func: Callable[[], None], at: str) -> Job:
+        """Run ``func`` once a day at local time ``at`` (``HH:MM``)."""
+        hour, minute = (int(part) for part in at.split(":"))
+        now = datetime.now()
+        first = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if first <= now:
+            first += timedelta(days=1)
+        return self.add_job(name, func, 24 * 3600, start=first.timestamp())
+
+    def stop(self) -> None:
+        """Ask the run loop to exit after the current job finishes."""
+        self._stop_event.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def run(self) -> None:
+        """Run jobs as they become due until stopped."""
+        while self._jobs and not self._stop_event.is_set():
+            job = self._jobs[0]
+            delay = job.next_run - time.time()
+            if delay > 0:
+                # Wake up early on stop, and re-check the heap at least every minute
+                self._stop_event.wait(min(delay, 60))
+                continue
+
+            heapq.heappop(self._jobs)
+            started = time.time()
+            try:
+                job.func()
+            except Exception as e:
+                logger.error(f"Scheduled job '{job.name}' failed: {str(e)}")
+            logger.debug(f"Job '{job.name}' took {time.time() - started:.2f}s")
+            job.reschedule(time.time())
+            heapq.heappush(self._jobs, job)
@@ -0,0 +1,361 @@
+import csv
+import os
+import queue
+import threading
+import time
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+from loguru import logger
+from retry.api import retry_call
+
+from src.utils.def_transformations import transform_weather_frame
+from src.utils.metrics import REGISTRY
+from src.utils.weather_loader import frame_from_columns, load_weather_data, to_csv_frame
+from src.utils.weather_schema import RAW_SCHEMA
+
+STREAM_ROWS = REGISTRY.counter("stream_rows_total", "Rows passed through each streaming stage", labels=("stage",))
+STREAM_QUEUE_DEPTH = REGISTRY.gauge(
+    "stream_queue_depth", "Micro-batches waiting in each streaming queue", labels=("queue",)
+)
+STREAM_BLOCKED_SECONDS = REGISTRY.counter(
+    "stream_blocked_seconds_total", "Time producers waited on a full streaming queue (backpressure)", labels=("queue",)
+)
+STREAM_LATENCY_SECONDS = REGISTRY.histogram(
+    "stream_latency_seconds", "Seconds from extraction to the sink storing a micro-batch",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+)
+STREAM_SINK_FAILURES = REGISTRY.counter("stream_sink_failures_total", "Sink writes that failed after retries")
+STREAM_TRANSFORM_FAILURES = REGISTRY.counter(
+    "stream_transform_failures_total", "Micro-batches that could not be read or transformed and were set aside"
+)
+
+# Marks the end of the stream on a queue
+_CLOSED = object()
+
+class StreamBatch(NamedTuple):
+    """Rows moving between streaming stages, with the spool entries they came from and when they were extracted."""
+    ids: List[str]
+    data: Union[Dict[str, List[Any]], pd.DataFrame]
+    rows: int
+    created: float
+
+class Spool:
+    """
+    Write-ahead spool of extracted micro-batches, one raw CSV per batch,
+    deleted once the sink has stored it. Batches left after a crash or a
+    failed sink write are replayed on the next start. Batches that cannot be
+    transformed are moved to a ``quarantine`` subdirectory instead, so they
+    are kept for inspection but not replayed.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def write(self, columns: Dict[str, List[Any]]) -> str:
+        """Durably store a columnar batch as a raw CSV and return its id."""
+        batch_id = f"{time.time_ns():020d}"
+        path = self.directory / f"{batch_id}.csv"
+        tmp_path = path.with_suffix(".csv.tmp")
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(zip(*columns.values()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return batch_id
+
+    def pending(self) -> List[str]:
+        """Ids of the batches not acknowledged yet, oldest first."""
+        return sorted(path.stem for path in self.directory.glob("*.csv"))
+
+    def read(self, batch_id: str) -> pd.DataFrame:
+        return load_weather_data(self.directory / f"{batch_id}.csv", schema=RAW_SCHEMA)
+
+    def ack(self, batch_ids: List[str]) -> None:
+        """Forget batches the sink has stored."""
+        for batch_id in batch_ids:
+            (self.directory / f"{batch_id}.csv").unlink(missing_ok=True)
+
+    def quarantine(self, batch_ids: List[str]) -> Path:
+        """Move batches out of the replay set into the quarantine directory, which is returned."""
+        quarantine_dir = self.directory / "quarantine"
+        quarantine_dir.mkdir(exist_ok=True)
+        for batch_id in batch_ids:
+            path = self.directory / f"{batch_id}.csv"
+            if path.exists():
+                os.replace(path, quarantine_dir / path.name)
+        return quarantine_dir
+
+class CsvSink:
+    """Appends processed micro-batches to a processed CSV (e.g. the one the daily load uploads)."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, df: pd.DataFrame) -> None:
+        to_csv_frame(df).to_csv(self.path, mode='a', header=not self.path.exists(), index=False)
+
+    def close(self) -> None:
+        pass
+
+class DatabaseSink:
+    """Upserts processed micro-batches with a WeatherDatabaseLoader, so replayed batches are harmless."""
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.loader.create_tables()
+
+    def write(self, df: pd.DataFrame) -> None:
+        self.loader.load_dataframe(df)
+
+    def close(self) -> None:
+        self.loader.close()
+
+class S3Sink:
+    """
+    Stores each flushed micro-batch as ``weather_data_YYYYMMDD_HHMMSS_NNNNNNNNN.csv``
+    (local time with nanoseconds, unique per flush) under a manifest root and
+    records it in the manifest. These files are compacted into monthly files
+    like the daily uploads.
+    """
+
+    def __init__(self, manifest, compression: Optional[str] = None):
+        from src.utils.s3_upload import COMPRESSION_EXTENSIONS, check_compression
+
+        check_compression(compression)
+        self.manifest = manifest
+        self.compression = compression
+        self.extension = COMPRESSION_EXTENSIONS[compression]
+        self._last_ns = 0
+
+    def _name(self) -> str:
+        # Strictly increasing, so flushes in the same second (or a coarse clock tick) never share a key
+        self._last_ns = max(time.time_ns(), self._last_ns + 1)
+        seconds, nanos = divmod(self._last_ns, 1_000_000_000)
+        return f"weather_data_{time.strftime('%Y%m%d_%H%M%S', time.localtime(seconds))}_{nanos:09d}.csv{self.extension}"
+
+    def write(self, df: pd.DataFrame) -> None:
+        name = self._name()
+        self.manifest.write(name, df, compression=self.compression)
+        self.manifest.add(name, df)
+        self.manifest.save()
+
+    def close(self) -> None:
+        pass
+
+class StreamPipeline:
+    """
+    Extract -> transform -> sink in one process, connected by bounded queues.
+
+    ``submit`` spools a flattened batch (when a spool is given) and queues it
+    for the transform thread, which merges queued batches into micro-batches
+    of up to ``max_batch_rows`` rows, converts them in memory and queues them
+    for the sink thread. The sink thread buffers processed rows until
+    ``flush_rows`` are buffered or the oldest is ``flush_interval`` seconds
+    old, writes them with up to ``sink_retries`` attempts, and then
+    acknowledges their spool entries. Both queues hold at most ``queue_size``
+    batches, so a slow sink blocks the transform thread and then ``submit``
+    instead of letting memory grow. When a write still fails, the sink thread
+    keeps the rows and retries them with backoff (up to
+    ``max_retry_interval`` seconds apart) without taking anything off its
+    queue, so extraction pauses until the sink recovers. ``interrupt`` stops
+    that waiting on shutdown; unwritten batches then stay in the spool and
+    are replayed by the next ``start``. When a merged micro-batch fails to
+    transform, its batches are transformed one at a time so only the bad ones
+    are set aside: they are counted and quarantined in the spool (dropped
+    without one) rather than replayed forever.
+
+    Only DatabaseSink is replay-safe: a crash between a CsvSink or S3Sink
+    write and the acknowledgement writes those rows again on replay
+    (compaction drops such duplicates from the S3 archive).
+    """
+
+    def __init__(
+        self,
+        sink,
+        spool: Optional[Spool] = None,
+        queue_size: int = 8,
+        max_batch_rows: int = 5000,
+        flush_rows: int = 1,
+        flush_interval: float = 0.0,
+        sink_retries: int = 3,
+        max_retry_interval: float = 60.0
+    ):
+        self.sink = sink
+        self.spool = spool
+        self.max_batch_rows = max_batch_rows
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.sink_retries = sink_retries
+        self.max_retry_interval = max_retry_interval
+        self._transform_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._sink_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._threads: List[threading.Thread] = []
+        self._sequence = 0
+        self._interrupted = threading.Event()
+
+    def start(self) -> None:
+        """Start the transform and sink threads, then queue the batches left in the spool."""
+        self._threads = [
+            threading.Thread(target=self._transform_loop, name="stream-transform", daemon=True),
+            threading.Thread(target=self._sink_loop, name="stream-sink", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        if self.spool is not None:
+            pending = self.spool.pending()
+            if pending:
+                logger.info(f"Replaying {len(pending)} spooled micro-batches")
+            for batch_id in pending:
+                try:
+                    df = self.spool.read(batch_id)
+                except Exception as e:
+                    self._set_aside([batch_id], e)
+                    continue
+                created = int(batch_id) / 1e9
+                self._put(self._transform_queue, "transform", StreamBatch([batch_id], df, len(df), created))
+
+    def submit(self, columns: Dict[str, List[Any]]) -> None:
+        """Queue a columnar batch of raw records, blocking while the pipeline is full."""
+        rows = len(next(iter(columns.values()), []))
+        if not rows:
+            return
+        created = time.time()
+        if self.spool is not None:
+            batch_id = self.spool.write(columns)
+        else:
+            self._sequence += 1
+            batch_id = str(self._sequence)
+        STREAM_ROWS.inc(rows, stage="extract")
+        self._put(self._transform_queue, "transform", StreamBatch([batch_id], columns, rows, created))
+
+    def interrupt(self) -> None:
+        """Stop retrying a failing sink (e.g. from a signal handler), so ``submit`` and ``close`` return."""
+        self._interrupted.set()
+
+    def close(self) -> None:
+        """Drain both queues, flush the sink and stop the threads."""
+        self._put(self._transform_queue, "transform", _CLOSED)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.sink.close()
+
+    @property
+    def _kept(self) -> str:
+        return ", kept in the spool for replay" if self.spool is not None else ", rows dropped"
+
+    def _put(self, target: "queue.Queue", name: str, item: Any) -> None:
+        started = time.perf_counter()
+        target.put(item)
+        STREAM_BLOCKED_SECONDS.inc(time.perf_counter() - started, queue=name)
+        STREAM_QUEUE_DEPTH.set(target.qsize(), queue=name)
+
+    def _transform_loop(self) -> None:
+        closed = False
+        while not closed:
+            batches = [self._transform_queue.get()]
+            # Merge whatever else is already queued into one micro-batch
+            while batches[-1] is not _CLOSED and sum(batch.rows for batch in batches) < self.max_batch_rows:
+                try:
+                    batches.append(self._transform_queue.get_nowait())
+                except queue.Empty:
+                    break
+            STREAM_QUEUE_DEPTH.set(self._transform_queue.qsize(), queue="transform")
+            if batches[-1] is _CLOSED:
+                closed = True
+                batches.pop()
+            if batches:
+                self._transform_and_queue(batches)
+        self._put(self._sink_queue, "sink", _CLOSED)
+
+    def _transform_and_queue(self, batches: List[StreamBatch]) -> None:
+        try:
+            processed = self._transform(batches)
+        except Exception as e:
+            if len(batches) == 1:
+                self._set_aside(batches[0].ids, e)
+                return
+            # The merged frame was a copy, so each batch can be retried on its own
+            logger.warning(f"Failed to transform {len(batches)} merged micro-batches, retrying them one by one: {str(e)}")
+            for batch in batches:
+                self._transform_and_queue([batch])
+            return
+        self._put(self._sink_queue, "sink", processed)
+
+    def _set_aside(self, batch_ids: List[str], error: Exception) -> None:
+        """Count a micro-batch that cannot be transformed and quarantine it, so it is not replayed."""
+        STREAM_TRANSFORM_FAILURES.inc()
+        if self.spool is None:
+            logger.error(f"Failed to transform micro-batch {', '.join(batch_ids)}, rows dropped: {str(error)}")
+            return
+        quarantine_dir = self.spool.quarantine(batch_ids)
+        logger.error(f"Failed to transform micro-batch {', '.join(batch_ids)}, "
+                     f"moved to {quarantine_dir}: {str(error)}")
+
+    def _transform(self, batches: List[StreamBatch]) -> StreamBatch:
+        frames = [batch.data if isinstance(batch.data, pd.DataFrame) else frame_from_columns(batch.data, RAW_SCHEMA)
+                  for batch in batches]
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        transform_weather_frame(df)
+        STREAM_ROWS.inc(len(df), stage="transform")
+        return StreamBatch([batch_id for batch in batches for batch_id in batch.ids], df, len(df),
+                           min(batch.created for batch in batches))
+
+    def _sink_loop(self) -> None:
+        buffered: List[StreamBatch] = []
+        failures = 0
+        closed = False
+        while not closed:
+            if failures and not self._interrupted.is_set():
+                # Hold the failed rows and leave the queue alone, so backpressure pauses extraction
+                self._interrupted.wait(min(2.0 ** failures, self.max_retry_interval))
+                item = None
+            else:
+                timeout = None
+                if buffered:
+                    timeout = max(0.0, buffered[0].created + self.flush_interval - time.time())
+                try:
+                    item = self._sink_queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+            STREAM_QUEUE_DEPTH.set(self._sink_queue.qsize(), queue="sink")
+            if item is _CLOSED:
+                closed = True
+            elif item is not None:
+                buffered.append(item)
+            if buffered and (failures or closed or sum(batch.rows for batch in buffered) >= self.flush_rows
+                             or time.time() - buffered[0].created >= self.flush_interval):
+                if self._flush(buffered):
+                    buffered, failures = [], 0
+                elif closed or self._interrupted.is_set():
+                    self._drop(buffered)
+                    buffered, failures = [], 0
+                else:
+                    failures += 1
+                    logger.warning(f"Sink unavailable, retrying {len(buffered)} micro-batches "
+                                   f"in {min(2.0 ** failures, self.max_retry_interval):.0f}s")
+
+    def _flush(self, batches: List[StreamBatch]) -> bool:
+        """Write buffered micro-batches to the sink and acknowledge them; False if the write failed."""
+        df = batches[0].data if len(batches) == 1 else pd.concat([batch.data for batch in batches], ignore_index=True)
+        ids = [batch_id for batch in batches for batch_id in batch.ids]
+        try:
+            retry_call(self.sink.write, fargs=[df], tries=self.sink_retries, delay=1, backoff=2, logger=logger)
+        except Exception as e:
+            STREAM_SINK_FAILURES.inc()
+            logger.error(f"Sink write of {len(df)} rows from {len(ids)} micro-batches failed: {str(e)}")
+            return False
+        if self.spool is not None:
+            self.spool.ack(ids)
+        STREAM_ROWS.inc(len(df), stage="sink")
+        STREAM_LATENCY_SECONDS.observe(time.time() - min(batch.created for batch in batches))
+        return True
+
+    def _drop(self, batches: List[StreamBatch]) -> None:
+        logger.error(f"Giving up on {sum(batch.rows for batch in batches)} rows from "
+                     f"{len(batches)} micro-batches{self._kept}")
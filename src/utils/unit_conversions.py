@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Registry of vectorized unit kernels keyed by (from_unit, to_unit).
+# Kernels take and return float64 arrays; NaN propagates through them.
+# The arithmetic mirrors the scalar helpers in def_transformations so that
+# results are bit-identical to the previous Series.apply implementation.
+UNIT_KERNELS: Dict[Tuple[str, str], Callable[[np.ndarray], np.ndarray]] = {}
+
+def register_kernel(from_unit: str, to_unit: str):
+    """Decorator registering a vectorized conversion from ``from_unit`` to ``to_unit``."""
+    def decorator(kernel: Callable[[np.ndarray], np.ndarray]) -> Callable[[np.ndarray], np.ndarray]:
+        UNIT_KERNELS[(from_unit, to_unit)] = kernel
+        return kernel
+    return decorator
+
+@register_kernel("K", "C")
+def _kelvin_to_celsius(values: np.ndarray) -> np.ndarray:
+    return values - 273.15
+
+@register_kernel("K", "F")
+def _kelvin_to_fahrenheit(values: np.ndarray) -> np.ndarray:
+    return (values - 273.15) * (9/5) + 32
+
+@register_kernel("F", "C")
+def _fahrenheit_to_celsius(values: np.ndarray) -> np.ndarray:
+    return (values - 32) * 5/9
+
+@register_kernel("m/s", "km/h")
+def _meters_per_second_to_kilometers_per_hour(values: np.ndarray) -> np.ndarray:
+    return values * 3.6
+
+@register_kernel("mph", "km/h")
+def _miles_per_hour_to_kilometers_per_hour(values: np.ndarray) -> np.ndarray:
+    return values * 1.60934
+
+@register_kernel("mph", "m/s")
+def _miles_per_hour_to_meters_per_second(values: np.ndarray) -> np.ndarray:
+    return values * 0.44704
+
+@register_kernel("hPa", "inHg")
+def _hectopascal_to_inches_mercury(values: np.ndarray) -> np.ndarray:
+    return values * 0.02953
+
+@register_kernel("mb", "hPa")
+def _millibar_to_hectopascal(values: np.ndarray) -> np.ndarray:
+    return values
+
+@register_kernel("mb", "atm")
+def _millibar_to_atmosphere(values: np.ndarray) -> np.ndarray:
+    return values / 1013.25
+
+@register_kernel("m", "km")
+def _meters_to_kilometers(values: np.ndarray) -> np.ndarray:
+    return values / 1000
+
+@register_kernel("mi", "km")
+def _miles_to_kilometers(values: np.ndarray) -> np.ndarray:
+    return values * 1.60934
+
+class Conversion(NamedTuple):
+    """Declarative conversion of ``column`` into a new ``output`` column."""
+    column: str
+    from_unit: str
+    to_unit: str
+    output: str
+    decimals: Optional[int] = 2
+
+def _temperature_conversions(columns: List[str]) -> List[Conversion]:
+    conversions = []
+    for col in columns:
+        conversions.append(Conversion(col, "K", "C", f"{col}_celsius"))
+        conversions.append(Conversion(col, "K", "F", f"{col}_fahrenheit"))
+    return conversions
+
+# Conversions applied by process_weather_data, in output column order
+WEATHER_CONVERSIONS: List[Conversion] = (
+    _temperature_conversions(['temp', 'feels_like', 'temp_min', 'temp_max'])
+    + [Conversion('wind_speed', "m/s", "km/h", 'wind_speed_kmh')]
+    + [Conversion(col, "hPa", "inHg", f"{col}_inHg") for col in ['pressure', 'sea_level', 'ground_level']]
+    + [Conversion('visibility', "m", "km", 'visibility_km')]
+)
+
+def convert_array(values, from_unit: str, to_unit: str) -> np.ndarray:
+    """Convert an array-like of numbers between units using the registered kernel."""
+    try:
+        kernel = UNIT_KERNELS[(from_unit, to_unit)]
+    except KeyError:
+        raise ValueError(f"No conversion registered from '{from_unit}' to '{to_unit}'")
+    return kernel(np.asarray(values, dtype=np.float64))
+
+def apply_conversions(df: pd.DataFrame, conversions: List[Conversion] = WEATHER_CONVERSIONS) -> pd.DataFrame:
+    """
+    Apply a list of conversions to ``df`` in a single pass.
+
+    Output columns are added to ``df`` in place (no intermediate frame copies)
+    and ``df`` is returned for chaining. Conversions whose source column is
+    missing are skipped; missing values propagate as NaN.
+    """
+    for conversion in conversions:
+        if conversion.column not in df.columns:
+            continue
+        values = df[conversion.column].to_numpy(dtype=np.float64, na_value=np.nan)
+        result = convert_array(values, conversion.from_unit, conversion.to_unit)
+        if conversion.decimals is not None:
+            result = np.round(result, conversion.decimals)
+        df[conversion.output] = result
+    return df
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from src.utils.weather_schema import DATE_FORMAT, PROCESSED_SCHEMA
+
+# Logical types read directly by the CSV parser; datetime and integer columns
+# are converted after parsing (see _apply_schema)
+PARSER_DTYPES: Dict[str, str] = {
+    'category': 'category',
+    'string': 'object',
+    'float64': 'float64',
+    'float32': 'float32',
+}
+
+def read_dtypes(schema: List[Tuple[str, str]] = PROCESSED_SCHEMA,
+                overrides: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """The ``dtype`` argument for pd.read_csv, with ``overrides`` (e.g. float-only columns) taking precedence."""
+    dtypes = {name: PARSER_DTYPES[logical_type] for name, logical_type in schema if logical_type in PARSER_DTYPES}
+    dtypes.update(overrides or {})
+    return dtypes
+
+def _apply_schema(df: pd.DataFrame, schema: List[Tuple[str, str]]) -> pd.DataFrame:
+    """Parse datetime columns once and downcast integer columns in place."""
+    for name, logical_type in schema:
+        if name not in df.columns:
+            continue
+        values = df[name]
+        if logical_type == 'datetime':
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                df[name] = pd.to_datetime(values, format='ISO8601')
+        elif logical_type.startswith('int') and values.dtype.kind == 'i' and len(values) and not values.hasnans:
+            # Columns with missing values keep their parser dtype (float64, or nullable Int64 when requested)
+            limits = np.iinfo(logical_type)
+            if limits.min <= values.min() and values.max() <= limits.max:
+                df[name] = values.astype(logical_type)
+    return df
+
+def load_weather_data(
+    source: Union[str, Path, IO],
+    columns: Optional[Sequence[str]] = None,
+    schema: List[Tuple[str, str]] = PROCESSED_SCHEMA,
+    dtypes: Optional[Dict[str, str]] = None,
+    **read_csv_kwargs
+) -> pd.DataFrame:
+    """
+    Load a raw or processed weather CSV with the types from ``schema``.
+
+    Low-cardinality strings become categoricals, integers are downcast to the
+    schema width, and ``timestamp``/``sunrise``/``sunset`` are parsed into
+    datetimes, so a frame takes several times less memory than a plain
+    ``pd.read_csv``. Floats stay float64 so values round-trip unchanged; write
+    frames back through to_csv_frame to keep timestamps in DATE_FORMAT. ``columns`` restricts the
+    read to those columns; ``dtypes`` overrides individual parser dtypes.
+    Columns missing from ``schema`` are left as pandas infers them.
+    """
+    df = pd.read_csv(source, usecols=columns, dtype=read_dtypes(schema, dtypes), **read_csv_kwargs)
+    return _apply_schema(df, schema)
+
+def frame_from_columns(
+    columns: Dict[str, List[Any]],
+    schema: List[Tuple[str, str]] = PROCESSED_SCHEMA
+) -> pd.DataFrame:
+    """
+    Build a typed frame from columnar values (e.g. a flattened batch of API
+    records) with the same types load_weather_data gives the CSV they would be
+    written to, so in-memory batches skip the CSV round trip.
+    """
+    df = pd.DataFrame(columns)
+    dtypes = read_dtypes(schema)
+    for name, logical_type in schema:
+        if name not in df.columns:
+            continue
+        if name in dtypes:
+            df[name] = df[name].astype(dtypes[name])
+        elif logical_type.startswith('int') and df[name].dtype == object:
+            # Only missing values, which the CSV parser would read as float64 NaN
+            df[name] = pd.to_numeric(df[name]).astype('float64')
+    return _apply_schema(df, schema)
+
+def iter_weather_data(
+    source: Union[str, Path, IO],
+    chunksize: int,
+    columns: Optional[Sequence[str]] = None,
+    schema: List[Tuple[str, str]] = PROCESSED_SCHEMA,
+    dtypes: Optional[Dict[str, str]] = None,
+    **read_csv_kwargs
+) -> Iterator[pd.DataFrame]:
+    """Like load_weather_data, yielding typed frames of at most ``chunksize`` rows."""
+    reader = pd.read_csv(source, usecols=columns, dtype=read_dtypes(schema, dtypes),
+                         chunksize=chunksize, **read_csv_kwargs)
+    with reader:
+        for chunk in reader:
+            yield _apply_schema(chunk, schema)
+
+def to_csv_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    A shallow copy of ``df`` with datetime columns rendered as DATE_FORMAT
+    strings, ready for ``to_csv``; far faster than ``to_csv(date_format=...)``.
+    """
+    datetimes = [name for name, dtype in df.dtypes.items() if pd.api.types.is_datetime64_any_dtype(dtype)]
+    if not datetimes:
+        return df
+    return df.assign(**{name: format_datetimes(df[name]) for name in datetimes})
+
+def format_datetimes(values: pd.Series) -> pd.Series:
+    """Render a datetime column as in the CSV files (DATE_FORMAT); strings pass through unchanged."""
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype(str)
+    # numpy's ISO rendering matches DATE_FORMAT and is much faster than Series.dt.strftime
+    text = np.datetime_as_string(values.to_numpy(dtype='datetime64[s]'), unit='s')
+    return pd.Series(text, index=values.index, dtype=object).where(values.notna().to_numpy())
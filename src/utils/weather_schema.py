@@ -0,0 +1,28 @@
+from typing import Dict, List, Tuple
+
+from src.utils.derived_metrics import DERIVED_COLUMNS
+from src.utils.raw_schema import RAW_FIELDS
+from src.utils.unit_conversions import WEATHER_CONVERSIONS
+
+# How datetime columns are written to CSV, the format the extractor writes them in
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# Logical column types shared by every storage backend:
+#   datetime  - ISO-8601 timestamps (naive local time, as written by the extractor)
+#   category  - low-cardinality strings
+#   string    - free-form strings
+#   float64 / int16 / int32 - numeric values, integers may be missing
+# Raw columns, their types and JSON paths are specified once in raw_schema.RAW_FIELDS
+RAW_SCHEMA: List[Tuple[str, str]] = [(field.name, field.logical_type) for field in RAW_FIELDS]
+
+# Columns added by the transform stage
+PROCESSED_SCHEMA: List[Tuple[str, str]] = RAW_SCHEMA + [
+    (conversion.output, 'float64') for conversion in WEATHER_CONVERSIONS
+] + [(column, 'float64') for column in DERIVED_COLUMNS]
+
+RAW_COLUMNS: List[str] = [name for name, _ in RAW_SCHEMA]
+PROCESSED_COLUMNS: List[str] = [name for name, _ in PROCESSED_SCHEMA]
+
+def column_types(schema: List[Tuple[str, str]]) -> Dict[str, str]:
+    """Map column names to logical types."""
+    return dict(schema)
@@ -0,0 +1,104 @@
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+import pytest
+import yaml
+
+from benchmarks.mock_api import MockWeatherAPI
+from benchmarks.synthetic import synthetic_locations
+from src.data.extraction.extract_weather import backfill_weather
+from src.utils.api_client import OpenWeatherMapClient
+from src.utils.backfill import BackfillProgress, plan_units
+
+API_CONFIG = "config/api_config.template.yaml"
+START = datetime(2024, 12, 1)
+END = datetime(2024, 12, 4)
+# Stations spread over both hemispheres, so half the coordinates (and backfill keys) are negative
+LOCATIONS = synthetic_locations(4)
+
+@pytest.fixture
+def api():
+    with MockWeatherAPI() as api:
+        fetched = Counter()
+        history = api.routes["/history/city"]
+
+        def record(params):
+            status, payload = history(params)
+            if status == 200:
+                for hour in range(int(params["start"]), int(params["end"]), 3600):
+                    fetched[(float(params["lat"]), float(params["lon"]), hour)] += 1
+            return status, payload
+
+        api.routes["/history/city"] = record
+        api.fetched = fetched
+        yield api
+
+def make_client(api, tmp_path, max_requests_per_day=None):
+    with open(API_CONFIG) as f:
+        config = yaml.safe_load(f)
+    config["openweathermap"]["base_url"] = api.base_url
+    config["openweathermap"]["history_base_url"] = api.base_url
+    config["cache"] = {"backend": "none"}
+    config["dedup"] = {}
+    config["locations"] = LOCATIONS
+    config["backfill"]["unit_hours"] = 12
+    config["collection"].update({
+        "max_requests_per_second": 1000,
+        "max_requests_per_day": max_requests_per_day,
+        "rate_limit_state_file": None,
+    })
+    path = tmp_path / "api_config.yaml"
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f)
+    return OpenWeatherMapClient(config_path=str(path))
+
+def test_interrupted_backfill_resumes_without_refetching(api, tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENWEATHERMAP_API_KEY", "test")
+    checkpoint = tmp_path / "backfill.json"
+    output_file = tmp_path / "weather_data.csv"
+    units = plan_units(LOCATIONS, START, END, unit_hours=12)
+
+    # The daily request budget runs out part way, as when a backfill is cut short
+    client = make_client(api, tmp_path, max_requests_per_day=10)
+    with pytest.raises(RuntimeError, match="rerun to resume"):
+        backfill_weather(START, END, client=client, checkpoint=checkpoint, output_file=output_file, max_workers=2)
+    client.close()
+
+    # Keys of negative coordinates are read back from the checkpoint intact
+    progress = BackfillProgress(checkpoint)
+    pending = progress.pending(units)
+    assert len(pending) == len(units) - 10
+    assert set(progress.completed) == {unit.slot for unit in units if unit not in pending}
+    assert any(unit.location["lon"] < 0 for unit in units if unit not in pending)
+
+    client = make_client(api, tmp_path)
+    backfill_weather(START, END, client=client, checkpoint=checkpoint, output_file=output_file, max_workers=2)
+    client.close()
+
+    hours = range(int(START.timestamp()), int(END.timestamp()), 3600)
+    expected = {(location["lat"], location["lon"], hour) for location in LOCATIONS for hour in hours}
+    assert set(api.fetched) == expected
+    assert set(api.fetched.values()) == {1}
+    assert BackfillProgress(checkpoint).pending(units) == []
+
+    raw = pd.read_csv(output_file)
+    assert len(raw) == len(expected)
+
+    # A third run has nothing left to fetch
+    client = make_client(api, tmp_path)
+    assert backfill_weather(START, END, client=client, checkpoint=checkpoint, output_file=output_file) == 0
+    client.close()
+    assert set(api.fetched.values()) == {1}
+
+def test_progress_parses_keys_with_negative_coordinates(tmp_path):
+    location = {"name": "Punta Arenas", "lat": -53.1638, "lon": -70.9171}
+    first, last = plan_units([location], START, datetime(2024, 12, 2, 6), unit_hours=24)
+
+    progress = BackfillProgress(tmp_path / "backfill.json")
+    progress.mark_done(first)
+    progress.mark_done(last._replace(end=last.end - 3600))
+
+    reloaded = BackfillProgress(tmp_path / "backfill.json")
+    assert reloaded.completed == {first.slot: first.end, last.slot: last.end - 3600}
+    assert reloaded.pending([first, last]) == [last]
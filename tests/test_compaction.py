@@ -0,0 +1,135 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+from moto import mock_aws
+
+from src.utils.compaction import compact_archive
+from src.utils.manifest import MANIFEST_NAME, DataManifest
+from src.utils.s3_upload import create_s3_client
+
+BUCKET = "weather-test"
+ROOT = f"s3://{BUCKET}/archive"
+STORAGE_OPTIONS = {"key": "testing", "secret": "testing", "region": "us-east-1"}
+LOCATIONS = {"Casablanca": (33.5731, -7.5898), "Rabat": (34.0209, -6.8416)}
+
+def daily_frame(day, hours=range(0, 24, 6)):
+    rows = []
+    for location, (latitude, longitude) in LOCATIONS.items():
+        for hour in hours:
+            rows.append({
+                "timestamp": pd.Timestamp(day) + pd.Timedelta(hours=hour),
+                "location_name": location,
+                "latitude": latitude,
+                "longitude": longitude,
+                "temp_celsius": 15.0 + hour / 2,
+            })
+    return pd.DataFrame(rows)
+
+def upload(manifest, day, df=None):
+    df = daily_frame(day) if df is None else df
+    name = f"weather_data_{pd.Timestamp(day):%Y%m%d}.csv"
+    manifest.write(name, df)
+    manifest.add(name, df)
+    manifest.save()
+    return name
+
+def stored_keys(s3):
+    return sorted(obj["Key"][len("archive/"):] for obj in s3.list_objects_v2(Bucket=BUCKET).get("Contents", []))
+
+def observations(df):
+    return list(zip(df["latitude"], df["longitude"], pd.to_datetime(df["timestamp"])))
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = create_s3_client(STORAGE_OPTIONS)
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+@pytest.fixture
+def manifest(s3):
+    return DataManifest(ROOT, STORAGE_OPTIONS)
+
+def test_daily_files_are_merged_into_a_monthly_file(s3, manifest):
+    for day in ("2024-11-01", "2024-11-02", "2024-11-30"):
+        upload(manifest, day)
+    upload(manifest, "2024-12-01")
+
+    plan = compact_archive(manifest, today=date(2024, 12, 10))
+
+    assert list(plan.merges) == ["weather_data_202411.csv.gz"]
+    assert stored_keys(s3) == [MANIFEST_NAME, "weather_data_202411.csv.gz", "weather_data_20241201.csv"]
+    reloaded = DataManifest(ROOT, STORAGE_OPTIONS)
+    assert sorted(reloaded.files) == ["weather_data_202411.csv.gz", "weather_data_20241201.csv"]
+    merged = reloaded.read("weather_data_202411.csv.gz")
+    assert len(merged) == 3 * 8
+    assert merged["timestamp"].is_monotonic_increasing
+    assert reloaded.files["weather_data_202411.csv.gz"]["rows"] == len(merged)
+
+def test_rerun_merges_late_daily_files_without_duplicates(s3, manifest):
+    upload(manifest, "2024-11-01")
+    upload(manifest, "2024-11-02")
+    compact_archive(manifest, today=date(2024, 12, 10))
+
+    # A late upload for a compacted month, partly repeating observations already merged
+    late = pd.concat([daily_frame("2024-11-02"), daily_frame("2024-11-03")], ignore_index=True)
+    upload(manifest, "2024-11-03", late)
+    plan = compact_archive(manifest, today=date(2024, 12, 11))
+
+    assert plan.merges == {"weather_data_202411.csv.gz": ["weather_data_202411.csv.gz", "weather_data_20241103.csv"]}
+    assert stored_keys(s3) == [MANIFEST_NAME, "weather_data_202411.csv.gz"]
+    merged = manifest.read("weather_data_202411.csv.gz")
+    assert len(merged) == 3 * 8
+    assert len(set(observations(merged))) == len(merged)
+
+def test_interrupted_run_is_completed_by_a_rerun(s3, manifest, monkeypatch):
+    sources = [upload(manifest, day) for day in ("2024-11-01", "2024-11-02")]
+
+    def crash(self, names):
+        raise ConnectionError("connection reset")
+
+    # The manifest is saved, then the run dies before the sources are deleted
+    with monkeypatch.context() as patch:
+        patch.setattr(DataManifest, "delete", crash)
+        with pytest.raises(ConnectionError):
+            compact_archive(manifest, today=date(2024, 12, 10))
+
+    assert stored_keys(s3) == [MANIFEST_NAME, "weather_data_202411.csv.gz"] + sources
+    assert sorted(DataManifest(ROOT, STORAGE_OPTIONS).files) == ["weather_data_202411.csv.gz"]
+
+    compact_archive(DataManifest(ROOT, STORAGE_OPTIONS), today=date(2024, 12, 10))
+
+    assert stored_keys(s3) == [MANIFEST_NAME, "weather_data_202411.csv.gz"]
+    merged = manifest.read("weather_data_202411.csv.gz")
+    assert len(merged) == 2 * 8
+    assert len(set(observations(merged))) == len(merged)
+
+def test_files_past_retention_are_deleted(s3, manifest):
+    upload(manifest, "2024-10-31")
+    upload(manifest, "2024-11-20")
+    upload(manifest, "2024-12-01")
+    compact_archive(manifest, today=date(2024, 12, 5))
+    assert stored_keys(s3) == [MANIFEST_NAME, "weather_data_202410.csv.gz", "weather_data_202411.csv.gz",
+                               "weather_data_20241201.csv"]
+
+    # October's monthly file ends on the 31st, more than 60 days before January 5th
+    plan = compact_archive(manifest, today=date(2025, 1, 5), retention_days=60)
+
+    assert plan.expired == ["weather_data_202410.csv.gz"]
+    assert stored_keys(s3) == [MANIFEST_NAME, "weather_data_202411.csv.gz", "weather_data_202412.csv.gz"]
+    assert sorted(DataManifest(ROOT, STORAGE_OPTIONS).files) == ["weather_data_202411.csv.gz",
+                                                                  "weather_data_202412.csv.gz"]
+
+def test_dry_run_changes_nothing(s3, manifest):
+    upload(manifest, "2024-10-01")
+    upload(manifest, "2024-11-01")
+    before = stored_keys(s3)
+    manifest_body = s3.get_object(Bucket=BUCKET, Key=f"archive/{MANIFEST_NAME}")["Body"].read()
+
+    plan = compact_archive(manifest, today=date(2024, 12, 10), retention_days=60, dry_run=True)
+
+    assert plan.expired == ["weather_data_20241001.csv"]
+    assert list(plan.merges) == ["weather_data_202411.csv.gz"]
+    assert stored_keys(s3) == before
+    assert s3.get_object(Bucket=BUCKET, Key=f"archive/{MANIFEST_NAME}")["Body"].read() == manifest_body
@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+
+import pandas as pd
+import pytest
+import yaml
+
+from src.utils.db_loader import WeatherDatabaseLoader
+
+DB_CONFIG = "config/db_config.yaml"
+
+def processed_frame(temperatures, locations=("Casablanca", "Rabat")):
+    rows = []
+    for i, temperature in enumerate(temperatures):
+        location = locations[i % len(locations)]
+        rows.append({
+            "timestamp": f"2024-12-01T{i // len(locations):02d}:00:00",
+            "location_name": location,
+            "country": "MA",
+            "latitude": 33.5731 if location == "Casablanca" else 34.0209,
+            "longitude": -7.5898 if location == "Casablanca" else -6.8416,
+            "temp_celsius": temperature,
+            "humidity": 70,
+            "pressure": 1015.0,
+            "wind_speed": 3.5,
+            "wind_direction": 270,
+            "weather_description": "clear sky",
+        })
+    return pd.DataFrame(rows)
+
+@pytest.fixture
+def db_config(tmp_path):
+    with open(DB_CONFIG) as f:
+        config = yaml.safe_load(f)
+    config["sqlite"] = {"path": str(tmp_path / "weather.sqlite")}
+    return config
+
+@pytest.fixture
+def loader(db_config):
+    loader = WeatherDatabaseLoader(db_config, batch_size=3)
+    loader.create_tables()
+    yield loader
+    loader.close()
+
+def fetch(db_config, query):
+    with sqlite3.connect(db_config["sqlite"]["path"]) as conn:
+        return conn.execute(query).fetchall()
+
+def test_loading_twice_is_idempotent(loader, db_config):
+    df = processed_frame([20.0, 18.5, 21.0, 19.0, 22.5])
+
+    assert loader.load_dataframe(df) == 5
+    first = fetch(db_config, "SELECT * FROM weather_measurements ORDER BY location_id, timestamp")
+    assert loader.load_dataframe(df) == 5
+    second = fetch(db_config, "SELECT * FROM weather_measurements ORDER BY location_id, timestamp")
+
+    assert len(first) == 5
+    assert second == first
+    assert fetch(db_config, "SELECT COUNT(*) FROM locations") == [(2,)]
+
+def test_upsert_updates_existing_measurements(loader, db_config):
+    loader.load_dataframe(processed_frame([20.0, 18.5]))
+    loader.load_dataframe(processed_frame([25.0, 18.5]))
+
+    rows = fetch(db_config, 'SELECT l."name", m."temperature" FROM weather_measurements m '
+                            'JOIN locations l ON l."id" = m."location_id" ORDER BY l."name"')
+    assert rows == [("Casablanca", 25.0), ("Rabat", 18.5)]
+
+def test_concurrent_loaders_share_location_ids(db_config):
+    loaders = [WeatherDatabaseLoader(db_config) for _ in range(4)]
+    loaders[0].create_tables()
+    df = processed_frame([20.0, 18.5, 21.0, 19.0], locations=("Casablanca", "Rabat", "Fes", "Tangier"))
+    errors = []
+
+    def load(loader):
+        try:
+            loader.load_dataframe(df)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load, args=(loader,)) for loader in loaders]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for loader in loaders:
+        loader.close()
+
+    assert errors == []
+    locations = fetch(db_config, 'SELECT "id", "name" FROM locations ORDER BY "id"')
+    assert len(locations) == 4
+    assert len({location_id for location_id, _ in locations}) == 4
+    assert fetch(db_config, "SELECT COUNT(*) FROM weather_measurements") == [(4,)]
@@ -0,0 +1,89 @@
+import gzip
+import io
+import os
+
+import pytest
+from moto import mock_aws
+
+from benchmarks.synthetic import raw_frame
+from src.utils.s3_upload import (
+    MIN_PART_SIZE,
+    compress_stream,
+    create_s3_client,
+    iter_csv_chunks,
+    multipart_upload
+)
+from src.utils.save_data import save_weather_data_to_url
+
+BUCKET = "weather-test"
+STORAGE_OPTIONS = {"key": "testing", "secret": "testing", "region": "us-east-1"}
+
+def decompress(body, compression):
+    if compression == "gzip":
+        return gzip.decompress(body)
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body)).read()
+    return body
+
+def codec(compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    return compression
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = create_s3_client(STORAGE_OPTIONS)
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+class FailingParts:
+    """S3 client whose upload_part always fails for one part number."""
+
+    def __init__(self, client, part_number):
+        self.client = client
+        self.part_number = part_number
+
+    def upload_part(self, **kwargs):
+        if kwargs["PartNumber"] == self.part_number:
+            raise ConnectionError("connection reset")
+        return self.client.upload_part(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+@pytest.mark.parametrize("compression", [None, "gzip", "zstd"])
+def test_multipart_upload_round_trips(s3, compression):
+    compression = codec(compression)
+    # Random bytes do not compress, so every codec needs three parts
+    data = os.urandom(2 * MIN_PART_SIZE + 1024)
+    chunks = (data[i:i + (1 << 20)] for i in range(0, len(data), 1 << 20))
+
+    size = multipart_upload(s3, BUCKET, "random.bin", compress_stream(chunks, compression),
+                            part_size=MIN_PART_SIZE, max_workers=2)
+
+    obj = s3.get_object(Bucket=BUCKET, Key="random.bin")
+    body = obj["Body"].read()
+    assert len(body) == size
+    assert obj["ETag"].strip('"').endswith("-3")
+    assert decompress(body, compression) == data
+
+@pytest.mark.parametrize("compression", [None, "gzip", "zstd"])
+def test_save_weather_data_to_url_round_trips(s3, compression):
+    compression = codec(compression)
+    df = raw_frame(5_000)
+
+    save_weather_data_to_url(df, f"s3://{BUCKET}/weather.csv", STORAGE_OPTIONS, compression=compression)
+
+    body = s3.get_object(Bucket=BUCKET, Key="weather.csv")["Body"].read()
+    assert decompress(body, compression) == b"".join(iter_csv_chunks(df))
+
+def test_failed_part_aborts_the_upload(s3):
+    data = os.urandom(2 * MIN_PART_SIZE + 1024)
+
+    with pytest.raises(ConnectionError):
+        multipart_upload(FailingParts(s3, part_number=2), BUCKET, "broken.bin", [data], part_retries=1)
+
+    assert "Uploads" not in s3.list_multipart_uploads(Bucket=BUCKET)
+    assert "Contents" not in s3.list_objects_v2(Bucket=BUCKET)
@@ -0,0 +1,126 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import raw_frame
+from src.utils.streaming import (
+    STREAM_BLOCKED_SECONDS,
+    STREAM_SINK_FAILURES,
+    STREAM_TRANSFORM_FAILURES,
+    Spool,
+    StreamPipeline
+)
+
+ROWS = 5
+
+class FakeSink:
+    """Records written frames; fails while ``failing`` is set or for the first ``failures`` writes."""
+
+    def __init__(self, failing=False, failures=0):
+        self.failing = failing
+        self.failures = failures
+        self.calls = 0
+        self.frames = []
+
+    def write(self, df):
+        self.calls += 1
+        if self.failing or self.calls <= self.failures:
+            raise ConnectionError("sink unavailable")
+        self.frames.append(df.copy())
+
+    def close(self):
+        pass
+
+    @property
+    def written(self):
+        return pd.concat(self.frames, ignore_index=True) if self.frames else pd.DataFrame()
+
+def batches(count):
+    df = raw_frame(count * ROWS)
+    df["timestamp"] = df["timestamp"].astype(str)
+    return [{column: df[column].iloc[i * ROWS:(i + 1) * ROWS].tolist() for column in df.columns}
+            for i in range(count)]
+
+def pipeline(sink, spool=None, **options):
+    options = {"queue_size": 1, "max_batch_rows": 1, "sink_retries": 1, "max_retry_interval": 0.05, **options}
+    return StreamPipeline(sink, spool=spool, **options)
+
+def test_failing_sink_blocks_submit_until_it_recovers(tmp_path):
+    sink = FakeSink(failing=True)
+    stream = pipeline(sink, Spool(tmp_path / "spool"))
+    stream.start()
+    blocked_before = STREAM_BLOCKED_SECONDS.value(queue="transform")
+
+    producer = threading.Thread(target=lambda: [stream.submit(batch) for batch in batches(10)])
+    producer.start()
+    producer.join(timeout=0.5)
+    assert producer.is_alive()
+
+    sink.failing = False
+    producer.join(timeout=10)
+    assert not producer.is_alive()
+    stream.close()
+
+    assert STREAM_BLOCKED_SECONDS.value(queue="transform") > blocked_before
+    assert len(sink.written) == 10 * ROWS
+    assert not sink.written.duplicated(subset=["latitude", "longitude", "timestamp"]).any()
+    assert Spool(tmp_path / "spool").pending() == []
+
+def test_batches_left_by_a_failing_sink_are_replayed(tmp_path):
+    spool = Spool(tmp_path / "spool")
+    stream = pipeline(FakeSink(failing=True), spool, queue_size=8)
+    stream.start()
+    for batch in batches(3):
+        stream.submit(batch)
+    stream.interrupt()
+    stream.close()
+    assert len(spool.pending()) == 3
+
+    sink = FakeSink()
+    stream = pipeline(sink, spool, queue_size=8)
+    stream.start()
+    stream.close()
+
+    assert len(sink.written) == 3 * ROWS
+    assert spool.pending() == []
+
+def test_sink_write_is_retried_until_it_succeeds(tmp_path):
+    failures_before = STREAM_SINK_FAILURES.value()
+    sink = FakeSink(failures=2)
+    spool = Spool(tmp_path / "spool")
+    stream = pipeline(sink, spool)
+    stream.start()
+    stream.submit(batches(1)[0])
+    stream.close()
+
+    assert sink.calls == 3
+    assert STREAM_SINK_FAILURES.value() - failures_before == 2
+    assert len(sink.written) == ROWS
+    assert spool.pending() == []
+
+@pytest.mark.parametrize("spooled", [True, False])
+def test_batch_that_fails_to_transform_is_set_aside(tmp_path, spooled):
+    failures_before = STREAM_TRANSFORM_FAILURES.value()
+    good, bad, other = batches(3)
+    bad["timestamp"] = ["not a timestamp"] * ROWS
+    sink = FakeSink()
+    spool = Spool(tmp_path / "spool") if spooled else None
+    stream = pipeline(sink, spool, queue_size=8, max_batch_rows=1000)
+    stream.start()
+    for batch in (good, bad, other):
+        stream.submit(batch)
+    stream.close()
+
+    assert STREAM_TRANSFORM_FAILURES.value() - failures_before == 1
+    assert len(sink.written) == 2 * ROWS
+    if spooled:
+        assert spool.pending() == []
+        assert len(list((tmp_path / "spool" / "quarantine").glob("*.csv"))) == 1
+
+        # Quarantined batches are not replayed
+        sink = FakeSink()
+        stream = pipeline(sink, spool)
+        stream.start()
+        stream.close()
+        assert sink.frames == []